@@ -2,9 +2,24 @@
 from django.contrib import admin
 from django.contrib.auth.models import User
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.contrib.admin.views.main import ChangeList
+from .binaires import differer_binaires
 from .models import (Role, Personne, Notification, PersonneNotification)
 
 
+class ChangeListSansBinaires(ChangeList):
+
+    def apply_select_related(self, qs):
+        return differer_binaires(super().apply_select_related(qs))
+
+
+class SansBinairesAdminMixin:
+    """Les listes ne rapatrient pas les colonnes binaires des modèles joints (photos, images)"""
+
+    def get_changelist(self, request, **kwargs):
+        return ChangeListSansBinaires
+
+
 # ========== ROLE ==========
 @admin.register(Role)
 class RoleAdmin(admin.ModelAdmin):
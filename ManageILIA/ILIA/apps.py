@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class IliaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ILIA'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,98 @@
+"""
+Chargement différé des colonnes binaires (photos, images de projet).
+
+Les modèles qui portent un BinaryField utilisent SansBinairesManager : leurs
+colonnes binaires ne sont jamais lues par défaut et doivent être demandées
+explicitement avec `.avec_binaires()`. Les requêtes qui joignent ces modèles
+via select_related passent par `differer_binaires()`, et les listes de
+l'administration par ILIA.admin.SansBinairesAdminMixin.
+"""
+import hashlib
+
+from django.db import models
+
+# Profondeur maximale suivie par select_related() sans argument (comme Django)
+_PROFONDEUR_MAX = 5
+
+
+def champs_binaires(model):
+    return [f.name for f in model._meta.concrete_fields if isinstance(f, models.BinaryField)]
+
+
+def empreinte_binaire(data):
+    """SHA-256 du contenu binaire, '' s'il est vide"""
+    return hashlib.sha256(bytes(data)).hexdigest() if data else ''
+
+
+def rafraichir_empreinte(instance, champ, champ_empreinte):
+    """
+    Recalcule l'empreinte avant enregistrement si la colonne binaire est chargée.
+    Retourne True si le contenu a changé.
+    """
+    if champ in instance.get_deferred_fields():
+        return False
+    empreinte = empreinte_binaire(getattr(instance, champ))
+    modifiee = empreinte != getattr(instance, champ_empreinte)
+    setattr(instance, champ_empreinte, empreinte)
+    return modifiee
+
+
+def _relations_jointes(model, select_related, prefixe='', profondeur=0):
+    """(chemin, modèle) de chaque relation suivie par select_related"""
+    if select_related is True:
+        if profondeur >= _PROFONDEUR_MAX:
+            return
+        for champ in model._meta.concrete_fields:
+            if champ.is_relation and not champ.null:
+                chemin = f"{prefixe}{champ.name}"
+                yield chemin, champ.related_model
+                yield from _relations_jointes(champ.related_model, True, f"{chemin}__", profondeur + 1)
+        return
+    for nom, suite in (select_related or {}).items():
+        champ = model._meta.get_field(nom)
+        cible = champ.related_model
+        chemin = f"{prefixe}{nom}"
+        yield chemin, cible
+        yield from _relations_jointes(cible, suite or {}, f"{chemin}__", profondeur + 1)
+
+
+def differer_binaires(qs):
+    """Diffère les colonnes binaires du modèle et de toutes les relations jointes"""
+    noms = champs_binaires(qs.model)
+    for chemin, cible in _relations_jointes(qs.model, qs.query.select_related):
+        noms += [f"{chemin}__{nom}" for nom in champs_binaires(cible)]
+    return qs.defer(*noms) if noms else qs
+
+
+class SansBinairesQuerySet(models.QuerySet):
+
+    def only(self, *fields):
+        """
+        Exactement les colonnes `fields`. Sans cela, only() retrancherait les
+        colonnes différées par le manager : `.only('Photo')` (lecture différée
+        de la photo par refresh_from_db, via le manager de base) chargerait
+        alors toutes les colonnes et écraserait les modifications non enregistrées.
+        """
+        clone = self._chain()
+        if clone.query.deferred_loading[1]:
+            clone.query.clear_deferred_loading()
+        return super(SansBinairesQuerySet, clone).only(*fields)
+
+    def avec_binaires(self, *noms):
+        """Charge les colonnes binaires du modèle (toutes, ou seulement celles nommées)"""
+        noms = set(noms or champs_binaires(self.model))
+        clone = self._chain()
+        champs, differes = clone.query.deferred_loading
+        if differes:
+            clone.query.deferred_loading = (frozenset(champs - noms), True)
+        else:
+            # Après only() : les colonnes demandées s'ajoutent à la sélection
+            clone.query.deferred_loading = (frozenset(champs | noms), False)
+        return clone
+
+
+class SansBinairesManager(models.Manager.from_queryset(SansBinairesQuerySet)):
+    """Manager par défaut : les colonnes binaires ne sont lues qu'à la demande"""
+
+    def get_queryset(self):
+        return differer_binaires(super().get_queryset())
@@ -0,0 +1,67 @@
+"""
+GET conditionnel pour les flux JSON interrogés par les calendriers.
+
+FullCalendar redemande ses flux à chaque navigation. Chaque flux déclare une
+fonction de version : quelques agrégats (nombre de lignes, dernière date de
+modification) de la fenêtre demandée, lus en une seule requête. Ils forment
+l'ETag ; si le client présente le même (If-None-Match), la réponse est un 304
+et le flux n'est ni relu ni sérialisé.
+"""
+import hashlib
+from functools import wraps
+
+from django.db.models import DateTimeField, F, Func, IntegerField, Subquery
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+
+def nombre(qs):
+    """Sous-requête scalaire : nombre de lignes de `qs`"""
+    return Subquery(qs.order_by().values(v=Func(F('pk'), function='COUNT', output_field=IntegerField())))
+
+
+def somme(qs, champ):
+    return Subquery(qs.order_by().values(v=Func(F(champ), function='SUM', output_field=IntegerField())))
+
+
+def derniere_maj(qs, champ):
+    """Sous-requête scalaire : plus grande valeur de `champ` (date de modification) dans `qs`"""
+    return Subquery(qs.order_by().values(v=Func(F(champ), function='MAX', output_field=DateTimeField())))
+
+
+def empreinte(*valeurs):
+    return hashlib.sha1(repr(valeurs).encode()).hexdigest()
+
+
+def version_agregats(qs, **agregats):
+    """Empreinte des agrégats de `qs` (Count, Max…), calculés en une requête"""
+    return empreinte(*qs.order_by().aggregate(**agregats).values())
+
+
+def version_ligne(ancre, *valeurs, **sous_requetes):
+    """
+    Empreinte de `valeurs` et des `sous_requetes`, ces dernières évaluées en une
+    requête sur la ligne `ancre` (queryset d'une ligne) ; None si elle n'existe pas.
+    """
+    ligne = ancre.annotate(**sous_requetes).values_list(*sous_requetes).first()
+    return None if ligne is None else empreinte(*valeurs, *ligne)
+
+
+def flux_versionne(version):
+    """
+    Décorateur d'une vue JSON : `version(request, *args, **kwargs)` donne l'ETag
+    (None : pas de GET conditionnel). Les réponses versionnées sont privées et
+    à revalider à chaque fois (no-cache) : le client les garde et les revalide
+    par un If-None-Match.
+    """
+    def decorateur(vue):
+        vue_conditionnelle = condition(etag_func=version)(vue)
+
+        @wraps(vue)
+        def enveloppe(request, *args, **kwargs):
+            reponse = vue_conditionnelle(request, *args, **kwargs)
+            if reponse.has_header('ETag'):
+                patch_cache_control(reponse, private=True, no_cache=True)
+            return reponse
+        return enveloppe
+    return decorateur
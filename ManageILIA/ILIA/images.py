@@ -0,0 +1,85 @@
+"""
+Service des images stockées en base (photos de profil, images de projet).
+
+Les URL contiennent l'empreinte SHA-256 de l'image : une URL désigne toujours
+le même contenu, que le navigateur peut donc garder en cache indéfiniment.
+Une nouvelle image change l'empreinte, donc l'URL. Les déclinaisons par
+taille sont servies en WebP aux navigateurs qui l'acceptent, en JPEG sinon.
+"""
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import quote_etag
+
+from .models import ImageRendition
+from .renditions import choisir_taille
+
+# Les pages étant réservées aux utilisateurs connectés, le cache reste privé
+CACHE_IMAGE = 'private, max-age=31536000, immutable'
+# Image d'origine servie faute de déclinaison : à redemander une fois celles-ci produites
+CACHE_PROVISOIRE = 'private, max-age=60'
+
+
+def type_image(data):
+    """Type MIME d'après les premiers octets (les images sont enregistrées en JPEG)"""
+    if data[:8] == b'\x89PNG\r\n\x1a\n':
+        return 'image/png'
+    if data[:6] in (b'GIF87a', b'GIF89a'):
+        return 'image/gif'
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'image/webp'
+    return 'image/jpeg'
+
+
+def reponse_image(request, qs, champ, champ_empreinte, empreinte):
+    """
+    Image `champ` de la ligne de `qs` dont l'empreinte vaut `empreinte`.
+    Un If-None-Match sur cette empreinte est servi en 304 sans toucher la base.
+    """
+    etag = quote_etag(empreinte)
+    reponse = get_conditional_response(request, etag=etag)
+    if reponse is None:
+        data = qs.filter(**{champ_empreinte: empreinte}).values_list(champ, flat=True).first()
+        if not data:
+            raise Http404("Image introuvable")
+        data = bytes(data)
+        reponse = HttpResponse(data, content_type=type_image(data))
+        reponse['Content-Length'] = str(len(data))
+    reponse['ETag'] = etag
+    reponse['Cache-Control'] = CACHE_IMAGE
+    return reponse
+
+
+def format_accepte(request):
+    if 'image/webp' in request.headers.get('Accept', ''):
+        return ImageRendition.TypeFormat.WEBP
+    return ImageRendition.TypeFormat.JPEG
+
+
+def reponse_rendition(request, source, id_source, empreinte, taille, qs, champ, champ_empreinte):
+    """
+    Plus petite déclinaison d'au moins `taille` pixels de l'image `empreinte`
+    (la plus grande sinon). Sans déclinaison disponible, l'image d'origine est
+    servie avec un cache court.
+    """
+    format = format_accepte(request)
+    taille = choisir_taille(taille)
+    etag = quote_etag(f"{empreinte}-{taille}-{format}")
+    reponse = get_conditional_response(request, etag=etag)
+    if reponse is None:
+        renditions = ImageRendition.objects.filter(
+            Source=source, Id_source=id_source, Empreinte_source=empreinte, Format=format,
+        ).values_list('Contenu', flat=True)
+        data = (renditions.filter(Taille__gte=taille).order_by('Taille').first()
+                or renditions.order_by('-Taille').first())
+        if not data:
+            reponse = reponse_image(request, qs, champ, champ_empreinte, empreinte)
+            reponse['Cache-Control'] = CACHE_PROVISOIRE
+            patch_vary_headers(reponse, ['Accept'])
+            return reponse
+        data = bytes(data)
+        reponse = HttpResponse(data, content_type=f'image/{format}')
+        reponse['Content-Length'] = str(len(data))
+    reponse['ETag'] = etag
+    reponse['Cache-Control'] = CACHE_IMAGE
+    patch_vary_headers(reponse, ['Accept'])
+    return reponse
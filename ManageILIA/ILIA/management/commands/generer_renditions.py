@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, OuterRef
+
+from ILIA.models import Personne, ImageRendition
+from ILIA.renditions import generer_renditions
+from projects.models import Projet
+
+
+class Command(BaseCommand):
+    help = "Produit les déclinaisons manquantes des photos de profil et des images de projet"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--toutes', action='store_true',
+                            help="Regénère aussi les déclinaisons existantes (après un changement de tailles)")
+
+    def handle(self, *args, **options):
+        sources = [
+            (ImageRendition.TypeSource.PHOTO, Personne, 'Photo', 'Photo_empreinte'),
+            (ImageRendition.TypeSource.PROJET, Projet, 'Image_projet', 'Image_empreinte'),
+        ]
+        for source, model, champ, champ_empreinte in sources:
+            qs = model.objects.exclude(**{champ_empreinte: ''})
+            if not options['toutes']:
+                qs = qs.exclude(Exists(ImageRendition.objects.filter(
+                    Source=source, Id_source=OuterRef('pk'), Empreinte_source=OuterRef(champ_empreinte),
+                )))
+            ids = list(qs.values_list('pk', champ_empreinte))
+            # Une image à la fois : seules ses données sont chargées
+            for pk, empreinte in ids:
+                data = model.objects.filter(pk=pk).values_list(champ, flat=True).first()
+                generer_renditions(source, pk, data, empreinte)
+            self.stdout.write(self.style.SUCCESS(f"{source} : {len(ids)} image(s) déclinée(s)."))
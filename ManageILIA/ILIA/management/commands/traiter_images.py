@@ -0,0 +1,42 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from ILIA import taches
+
+
+class Command(BaseCommand):
+    help = ("Traite la file des images téléversées (normalisation et déclinaisons). "
+            "Tourne en continu ; --une-fois vide la file puis s'arrête (tâche planifiée).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--une-fois', action='store_true',
+                            help="Vide la file puis s'arrête")
+        parser.add_argument('--intervalle', type=float, default=2,
+                            help="Secondes entre deux consultations d'une file vide (défaut : 2)")
+        parser.add_argument('--blocage', type=int, default=10,
+                            help="Minutes après lesquelles une tâche restée en cours est relancée (défaut : 10)")
+
+    def handle(self, *args, **options):
+        delai = datetime.timedelta(minutes=options['blocage'])
+        total = 0
+        try:
+            while True:
+                close_old_connections()
+                taches.relancer_bloquees(delai)
+                try:
+                    traitees = taches.traiter_file()
+                except Exception as e:
+                    # La tâche fautive est déjà remise en file ou marquée en échec
+                    self.stderr.write(f"Erreur de traitement : {e}")
+                    traitees = 1
+                total += traitees
+                if options['une_fois'] and not traitees:
+                    break
+                if not traitees:
+                    time.sleep(options['intervalle'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"{total} image(s) traitée(s)."))
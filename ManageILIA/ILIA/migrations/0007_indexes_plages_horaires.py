@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ILIA', '0006_alter_personne_photo'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='personnenotification',
+            index=models.Index(fields=['Id_Matricule', 'Lu'], name='ILIA_person_Id_Matr_18e173_idx'),
+        ),
+    ]
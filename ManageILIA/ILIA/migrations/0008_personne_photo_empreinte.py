@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:47
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def calculer_empreintes(apps, schema_editor):
+    """Empreinte des images existantes, une ligne à la fois"""
+    Personne = apps.get_model('ILIA', 'Personne')
+    ids = list(Personne.objects.filter(Photo__isnull=False).values_list('pk', flat=True))
+    for pk in ids:
+        data = Personne.objects.filter(pk=pk).values_list('Photo', flat=True).first()
+        if data:
+            Personne.objects.filter(pk=pk).update(Photo_empreinte=hashlib.sha256(bytes(data)).hexdigest())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ILIA', '0007_indexes_plages_horaires'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='personne',
+            options={'base_manager_name': 'objects'},
+        ),
+        migrations.AddField(
+            model_name='personne',
+            name='Photo_empreinte',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.RunPython(calculer_empreintes, migrations.RunPython.noop),
+    ]
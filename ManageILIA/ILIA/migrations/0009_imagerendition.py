@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ILIA', '0008_personne_photo_empreinte'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageRendition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('Source', models.CharField(choices=[('photo', 'Photo de profil'), ('projet', 'Image de projet')], max_length=10)),
+                ('Id_source', models.IntegerField()),
+                ('Empreinte_source', models.CharField(max_length=64)),
+                ('Taille', models.PositiveSmallIntegerField()),
+                ('Format', models.CharField(choices=[('webp', 'WebP'), ('jpeg', 'JPEG')], max_length=4)),
+                ('Contenu', models.BinaryField()),
+            ],
+            options={
+                'base_manager_name': 'objects',
+                'unique_together': {('Source', 'Id_source', 'Taille', 'Format')},
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ILIA', '0009_imagerendition'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TacheImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('Source', models.CharField(choices=[('photo', 'Photo de profil'), ('projet', 'Image de projet')], max_length=10)),
+                ('Id_source', models.IntegerField()),
+                ('Empreinte', models.CharField(max_length=64)),
+                ('Etat', models.CharField(choices=[('attente', 'En attente'), ('en_cours', 'En cours'), ('echec', 'Échec')], default='attente', max_length=10)),
+                ('Tentatives', models.PositiveSmallIntegerField(default=0)),
+                ('Erreur', models.TextField(blank=True)),
+                ('Date_creation', models.DateTimeField(auto_now_add=True)),
+                ('Date_maj', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['Etat', 'Date_maj'], name='ILIA_tachei_Etat_f5d74e_idx')],
+                'unique_together': {('Source', 'Id_source')},
+            },
+        ),
+    ]
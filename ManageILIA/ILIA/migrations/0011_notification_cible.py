@@ -0,0 +1,64 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:59
+
+import re
+
+from django.db import migrations, models
+
+INVITATION = re.compile(r"ID de l'événement\s*:\s*(\d+)")
+PREFIXES_PROJET = {
+    'PROJET': "Ajout au projet : ",
+    'PROJET_FICHIER': "Nouveau fichier dans le projet : ",
+}
+
+
+def renseigner_cibles(apps, schema_editor):
+    """
+    Cible des notifications existantes, déduite de leur texte : l'identifiant
+    cité dans les invitations, le nom du projet (s'il est unique) sinon.
+    """
+    Notification = apps.get_model('ILIA', 'Notification')
+    Event = apps.get_model('events', 'Event')
+    Projet = apps.get_model('projects', 'Projet')
+
+    evenements = set(Event.objects.values_list('id', flat=True))
+    for pk, contenu in Notification.objects.filter(Contenu__contains="ID de l'événement").values_list('pk', 'Contenu'):
+        match = INVITATION.search(contenu)
+        if match and int(match.group(1)) in evenements:
+            Notification.objects.filter(pk=pk).update(Cible_type='evenement', Cible_id=int(match.group(1)))
+
+    projets = {}
+    for pk, nom in Projet.objects.values_list('pk', 'Nom_projet'):
+        projets[nom] = None if nom in projets else pk  # Nom ambigu : pas de cible
+    for type_notif, prefixe in PREFIXES_PROJET.items():
+        notifications = Notification.objects.filter(Type=type_notif, Titre__startswith=prefixe, Cible_type='')
+        for pk, titre in notifications.values_list('pk', 'Titre'):
+            projet = projets.get(titre[len(prefixe):])
+            if projet:
+                Notification.objects.filter(pk=pk).update(Cible_type='projet', Cible_id=projet)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ILIA', '0010_tacheimage'),
+        ('events', '0002_indexes_plages_horaires'),
+        ('projects', '0010_projet_image_empreinte'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='Cible_id',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='Cible_type',
+            field=models.CharField(blank=True, choices=[('evenement', 'Événement'), ('projet', 'Projet'), ('fichier', 'Fichier')], max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['Cible_type', 'Cible_id'], name='ILIA_notifi_Cible_t_124d79_idx'),
+        ),
+        migrations.RunPython(renseigner_cibles, migrations.RunPython.noop),
+    ]
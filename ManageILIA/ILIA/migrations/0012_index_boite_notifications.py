@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ILIA', '0011_notification_cible'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='personnenotification',
+            index=models.Index(fields=['Id_Matricule', 'Date_notif', 'id'], name='ILIA_person_Id_Matr_dd00cc_idx'),
+        ),
+    ]
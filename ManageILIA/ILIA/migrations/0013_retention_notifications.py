@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ILIA', '0012_index_boite_notifications'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationArchivee',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('Id_Matricule', models.IntegerField(db_index=True)),
+                ('Id_notif', models.IntegerField()),
+                ('Titre', models.CharField(max_length=200)),
+                ('Contenu', models.TextField()),
+                ('Type', models.CharField(max_length=50)),
+                ('Cible_type', models.CharField(blank=True, max_length=10)),
+                ('Cible_id', models.IntegerField(blank=True, null=True)),
+                ('Date_notif', models.DateTimeField()),
+                ('Date_archivage', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='personnenotification',
+            index=models.Index(fields=['Lu', 'Date_notif'], name='ILIA_person_Lu_0358a9_idx'),
+        ),
+    ]
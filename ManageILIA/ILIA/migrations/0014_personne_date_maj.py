@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ILIA', '0013_retention_notifications'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='personne',
+            name='Date_maj',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
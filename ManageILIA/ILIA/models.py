@@ -1,7 +1,10 @@
 from django.contrib.auth.models import User
 from django.db import models
+from django.urls import reverse
 from django.core.validators import MaxValueValidator, MinValueValidator
 
+from .binaires import SansBinairesManager
+
 
 
 class Role(models.Model):
@@ -27,20 +30,61 @@ class Personne (models.Model):
     Universite = models.CharField(max_length=100, blank=True, null=True)
     Date_fin = models.DateField(blank=True, null=True)
     Photo = models.BinaryField(null=True, blank=True, editable=True)
+    Photo_empreinte = models.CharField(max_length=64, blank=True, editable=False)  # SHA-256 de Photo, utilisé dans l'URL
     Id_bureau = models.ForeignKey('reservations.Bureau', on_delete=models.SET_NULL, null=True, blank=True)
     Id_role = models.ForeignKey(Role, on_delete=models.SET_NULL, null=True, blank=True)
     roles = models.ManyToManyField(Role, related_name='personnes', blank=True)
+    Date_maj = models.DateTimeField(auto_now=True)  # Versionne les flux qui affichent nom et email (ILIA.conditionnel)
+
+    # La photo n'est lue qu'à la demande : Personne.objects.avec_binaires()
+    objects = SansBinairesManager()
+
+    class Meta:
+        # Aussi pour les accès par relation (user.personne, reservation.Id_Matricule…)
+        base_manager_name = 'objects'
 
     def __str__(self):
         return f"{self.Prenom} {self.Nom}"
 
+    @property
+    def photo_url(self):
+        """URL de la photo, stable tant que la photo ne change pas ('' sans photo)"""
+        if not self.Photo_empreinte:
+            return ''
+        return reverse('accounts:photo', args=[self.Id_Matricule, self.Photo_empreinte])
+
+    def photo_url_taille(self, taille):
+        """URL de la déclinaison de la photo adaptée à un affichage de `taille` pixels"""
+        if not self.Photo_empreinte:
+            return ''
+        return reverse('accounts:photo_taille', args=[self.Id_Matricule, self.Photo_empreinte, taille])
+
+    @property
+    def photo_en_traitement(self):
+        """La photo attend sa normalisation et ses déclinaisons"""
+        return TacheImage.objects.filter(
+            Source=ImageRendition.TypeSource.PHOTO, Id_source=self.pk,
+        ).exclude(Etat=TacheImage.TypeEtat.ECHEC).exists()
+
 
 class Notification(models.Model):
+
+    class TypeCible(models.TextChoices):
+        EVENEMENT = 'evenement', 'Événement'
+        PROJET = 'projet', 'Projet'
+        FICHIER = 'fichier', 'Fichier'
+
     Id_notif = models.AutoField(primary_key=True)
     Titre = models.CharField(max_length=200)
     Contenu = models.TextField()
     Type = models.CharField(max_length=50)
     Date = models.DateTimeField(auto_now_add=True, null=True, blank=True)
+    # Objet concerné (événement, projet, fichier), résolu par notifications.cibles
+    Cible_type = models.CharField(max_length=10, choices=TypeCible.choices, blank=True)
+    Cible_id = models.IntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['Cible_type', 'Cible_id'])]
 
     def __str__(self):
         return f"{self.Titre} - {self.Type}"
@@ -53,6 +97,91 @@ class PersonneNotification(models.Model):
 
     class Meta:
         unique_together = ('Id_Matricule', 'Id_notif')
+        indexes = [
+            models.Index(fields=['Id_Matricule', 'Lu']),
+            # Boîte de réception parcourue par curseur (notifications.boite)
+            models.Index(fields=['Id_Matricule', 'Date_notif', 'id']),
+            # Purge des notifications lues anciennes (notifications.retention)
+            models.Index(fields=['Lu', 'Date_notif']),
+        ]
     
     def __str__(self):
         return f"{self.Id_Matricule} - {self.Id_notif.Titre}"
+
+
+class NotificationArchivee(models.Model):
+    """
+    Notification lue retirée d'une boîte de réception par la purge
+    (commande purger_notifications --archiver). Copie autonome : la
+    notification d'origine peut avoir été supprimée depuis.
+    """
+    Id_Matricule = models.IntegerField(db_index=True)
+    Id_notif = models.IntegerField()
+    Titre = models.CharField(max_length=200)
+    Contenu = models.TextField()
+    Type = models.CharField(max_length=50)
+    Cible_type = models.CharField(max_length=10, blank=True)
+    Cible_id = models.IntegerField(null=True, blank=True)
+    Date_notif = models.DateTimeField()
+    Date_archivage = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.Id_Matricule} - {self.Titre}"
+
+
+class ImageRendition(models.Model):
+    """Déclinaison d'une photo ou d'une image de projet, produite au téléversement (voir ILIA.renditions)"""
+
+    class TypeSource(models.TextChoices):
+        PHOTO = 'photo', 'Photo de profil'
+        PROJET = 'projet', 'Image de projet'
+
+    class TypeFormat(models.TextChoices):
+        WEBP = 'webp', 'WebP'
+        JPEG = 'jpeg', 'JPEG'
+
+    Source = models.CharField(max_length=10, choices=TypeSource.choices)
+    Id_source = models.IntegerField()  # Matricule ou Id_projet
+    Empreinte_source = models.CharField(max_length=64)  # Empreinte de l'image déclinée
+    Taille = models.PositiveSmallIntegerField()  # Plus grand côté, en pixels
+    Format = models.CharField(max_length=4, choices=TypeFormat.choices)
+    Contenu = models.BinaryField()
+
+    objects = SansBinairesManager()
+
+    class Meta:
+        base_manager_name = 'objects'
+        unique_together = ('Source', 'Id_source', 'Taille', 'Format')
+
+    def __str__(self):
+        return f"{self.Source} {self.Id_source} - {self.Taille}px {self.Format}"
+
+
+class TacheImage(models.Model):
+    """
+    Traitement d'image en attente (normalisation et déclinaisons), exécuté hors
+    requête par la commande traiter_images (voir ILIA.taches). Tant que la tâche
+    existe, l'image d'origine est servie telle quelle, avec un cache court.
+    """
+
+    class TypeEtat(models.TextChoices):
+        ATTENTE = 'attente', 'En attente'
+        EN_COURS = 'en_cours', 'En cours'
+        ECHEC = 'echec', 'Échec'
+
+    Source = models.CharField(max_length=10, choices=ImageRendition.TypeSource.choices)
+    Id_source = models.IntegerField()
+    Empreinte = models.CharField(max_length=64)  # Empreinte de l'image à traiter
+    Etat = models.CharField(max_length=10, choices=TypeEtat.choices, default=TypeEtat.ATTENTE)
+    Tentatives = models.PositiveSmallIntegerField(default=0)
+    Erreur = models.TextField(blank=True)
+    Date_creation = models.DateTimeField(auto_now_add=True)
+    Date_maj = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # Une seule tâche par image : un nouveau téléversement remplace la tâche en attente
+        unique_together = ('Source', 'Id_source')
+        indexes = [models.Index(fields=['Etat', 'Date_maj'])]
+
+    def __str__(self):
+        return f"{self.Source} {self.Id_source} - {self.get_Etat_display()}"
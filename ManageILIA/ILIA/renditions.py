@@ -0,0 +1,109 @@
+"""
+Traitement des images téléversées (photos de profil, images de projet).
+
+L'image reçue est normalisée une fois (JPEG, côté le plus long borné), puis
+déclinée en plusieurs tailles, en WebP et en JPEG. Chaque page demande la
+taille qu'elle affiche ; le format est choisi selon l'en-tête Accept.
+"""
+import io
+import logging
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .models import ImageRendition
+
+TAILLES = (48, 128, 300, 800)
+FORMATS = (ImageRendition.TypeFormat.WEBP, ImageRendition.TypeFormat.JPEG)
+
+logger = logging.getLogger(__name__)
+
+_PILLOW = {
+    ImageRendition.TypeFormat.WEBP: ('WEBP', {'quality': 80, 'method': 4}),
+    ImageRendition.TypeFormat.JPEG: ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+
+
+def _ouvrir(source):
+    image = Image.open(source if hasattr(source, 'read') else io.BytesIO(bytes(source)))
+    # Les photos d'appareil sont souvent pivotées par une balise EXIF
+    image = ImageOps.exif_transpose(image)
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    return image
+
+
+def _encoder(image, format):
+    nom, options = _PILLOW[format]
+    buffer = io.BytesIO()
+    image.save(buffer, format=nom, **options)
+    return buffer.getvalue()
+
+
+def lire_image(source):
+    """
+    Octets d'une image téléversée (fichier ou octets), après un contrôle de son
+    en-tête qui ne décode pas les pixels. Lève une erreur si ce n'est pas une image.
+    """
+    data = source.read() if hasattr(source, 'read') else bytes(source)
+    try:
+        Image.open(io.BytesIO(data)).verify()
+    except Exception as e:
+        raise ValueError("Le fichier n'est pas une image valide.") from e
+    return data
+
+
+def normaliser_image(source, taille_max):
+    """Image téléversée (fichier ou octets) → JPEG dont le plus grand côté vaut au plus taille_max"""
+    image = _ouvrir(source)
+    image.thumbnail((taille_max, taille_max))
+    return _encoder(image, ImageRendition.TypeFormat.JPEG)
+
+
+def produire_renditions(data):
+    """
+    Déclinaisons [(taille, format, octets)] de l'image. Les tailles plus
+    grandes que l'image ne sont pas produites : la plus grande déclinaison
+    est alors l'image elle-même.
+    """
+    image = _ouvrir(data)
+    cote = max(image.size)
+    tailles = [t for t in TAILLES if t < cote] + [min(cote, TAILLES[-1])]
+    renditions = []
+    for taille in sorted(set(tailles), reverse=True):
+        # Réduction en cascade depuis la taille précédente : moins de pixels à traiter
+        image.thumbnail((taille, taille), Image.LANCZOS)
+        for format in FORMATS:
+            renditions.append((taille, format, _encoder(image, format)))
+    return renditions
+
+
+def generer_renditions(source, id_source, data, empreinte):
+    """
+    Remplace les déclinaisons de l'image `empreinte` de (source, id_source).
+    Une image illisible n'a pas de déclinaison : l'original reste servi tel quel.
+    """
+    renditions = []
+    if data:
+        try:
+            renditions = produire_renditions(data)
+        except (UnidentifiedImageError, OSError, ValueError) as e:
+            logger.warning("Image %s %s illisible, aucune déclinaison produite : %s", source, id_source, e)
+    return enregistrer_renditions(source, id_source, empreinte, renditions)
+
+
+def enregistrer_renditions(source, id_source, empreinte, renditions):
+    """Remplace les déclinaisons de (source, id_source) par `renditions` [(taille, format, octets)]"""
+    ImageRendition.objects.filter(Source=source, Id_source=id_source).delete()
+    ImageRendition.objects.bulk_create([
+        ImageRendition(
+            Source=source, Id_source=id_source, Empreinte_source=empreinte,
+            Taille=taille, Format=format, Contenu=contenu,
+        )
+        for taille, format, contenu in renditions
+    ])
+    return len(renditions)
+
+
+def choisir_taille(taille):
+    """Plus petite taille produite couvrant `taille` (la plus grande sinon)"""
+    return next((t for t in TAILLES if t >= taille), TAILLES[-1])
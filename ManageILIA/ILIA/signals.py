@@ -0,0 +1,30 @@
+"""
+Maintien de l'empreinte de la photo, qui sert d'adresse à l'image en cache,
+et mise en file de son traitement (ILIA.taches) lorsqu'elle change.
+"""
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .binaires import rafraichir_empreinte
+from .models import Personne, ImageRendition
+from .taches import annuler, mettre_en_file
+
+
+@receiver(pre_save, sender=Personne)
+def photo_enregistree(sender, instance, raw=False, **kwargs):
+    instance._photo_modifiee = rafraichir_empreinte(instance, 'Photo', 'Photo_empreinte') and not raw
+
+
+@receiver(post_save, sender=Personne)
+def photo_declinee(sender, instance, **kwargs):
+    if getattr(instance, '_photo_modifiee', False):
+        if instance.Photo_empreinte:
+            mettre_en_file(ImageRendition.TypeSource.PHOTO, instance.pk, instance.Photo_empreinte)
+        else:
+            annuler(ImageRendition.TypeSource.PHOTO, instance.pk)
+        instance._photo_modifiee = False
+
+
+@receiver(post_delete, sender=Personne)
+def personne_supprimee(sender, instance, **kwargs):
+    annuler(ImageRendition.TypeSource.PHOTO, instance.pk)
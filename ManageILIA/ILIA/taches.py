@@ -0,0 +1,120 @@
+"""
+File d'attente des traitements d'image, stockée en base.
+
+Un téléversement enregistre l'image telle quelle et met une tâche en file ;
+la commande `traiter_images` (un ou plusieurs processus) la normalise, produit
+ses déclinaisons puis supprime la tâche. Les requêtes web ne décodent donc
+jamais d'image. Les tâches sont prises avec SELECT … FOR UPDATE SKIP LOCKED :
+plusieurs processus peuvent tourner sans traiter deux fois la même image.
+"""
+import logging
+from datetime import timedelta
+
+from django.apps import apps
+from django.db import transaction
+from django.utils import timezone
+from PIL import UnidentifiedImageError
+
+from .binaires import empreinte_binaire
+from .models import ImageRendition, TacheImage
+from .renditions import enregistrer_renditions, normaliser_image, produire_renditions
+
+logger = logging.getLogger(__name__)
+
+# Source → (modèle, colonne binaire, colonne d'empreinte, plus grand côté conservé)
+SOURCES = {
+    ImageRendition.TypeSource.PHOTO: ('ILIA.Personne', 'Photo', 'Photo_empreinte', 300),
+    ImageRendition.TypeSource.PROJET: ('projects.Projet', 'Image_projet', 'Image_empreinte', 800),
+}
+
+MAX_TENTATIVES = 3
+
+
+def mettre_en_file(source, id_source, empreinte):
+    """Programme le traitement de l'image `empreinte` ; remplace la tâche précédente"""
+    TacheImage.objects.update_or_create(
+        Source=source, Id_source=id_source,
+        defaults={'Empreinte': empreinte, 'Etat': TacheImage.TypeEtat.ATTENTE, 'Tentatives': 0, 'Erreur': ''},
+    )
+
+
+def annuler(source, id_source):
+    """Image supprimée : plus rien à traiter ni à servir"""
+    TacheImage.objects.filter(Source=source, Id_source=id_source).delete()
+    ImageRendition.objects.filter(Source=source, Id_source=id_source).delete()
+
+
+def prendre_tache():
+    """Réserve la plus ancienne tâche en attente (None si la file est vide)"""
+    with transaction.atomic():
+        tache = (TacheImage.objects.select_for_update(skip_locked=True)
+                 .filter(Etat=TacheImage.TypeEtat.ATTENTE).order_by('Date_maj').first())
+        if tache is None:
+            return None
+        tache.Etat = TacheImage.TypeEtat.EN_COURS
+        tache.Tentatives += 1
+        tache.save(update_fields=['Etat', 'Tentatives', 'Date_maj'])
+    return tache
+
+
+def _terminer(tache):
+    # Une image remplacée pendant le traitement a sa propre tâche, à conserver
+    TacheImage.objects.filter(pk=tache.pk, Empreinte=tache.Empreinte).delete()
+
+
+def _echouer(tache, erreur, definitif):
+    etat = TacheImage.TypeEtat.ECHEC if definitif or tache.Tentatives >= MAX_TENTATIVES else TacheImage.TypeEtat.ATTENTE
+    TacheImage.objects.filter(pk=tache.pk, Empreinte=tache.Empreinte).update(
+        Etat=etat, Erreur=str(erreur), Date_maj=timezone.now(),
+    )
+
+
+def traiter(tache):
+    """
+    Normalise l'image, produit ses déclinaisons puis remplace l'original. Si
+    l'image a changé entre-temps, le résultat est abandonné.
+    """
+    label, champ, champ_empreinte, taille_max = SOURCES[tache.Source]
+    model = apps.get_model(label)
+    lignes = model.objects.filter(pk=tache.Id_source, **{champ_empreinte: tache.Empreinte})
+    data = lignes.values_list(champ, flat=True).first()
+    if not data:
+        _terminer(tache)
+        return
+    try:
+        image = normaliser_image(bytes(data), taille_max)
+        renditions = produire_renditions(image)
+    except (UnidentifiedImageError, OSError, ValueError) as e:
+        # Image illisible : elle reste servie telle quelle, réessayer ne changerait rien
+        logger.warning("Image %s %s illisible : %s", tache.Source, tache.Id_source, e)
+        _echouer(tache, e, definitif=True)
+        return
+    except Exception as e:
+        _echouer(tache, e, definitif=False)
+        raise
+
+    empreinte = empreinte_binaire(image)
+    with transaction.atomic():
+        # update() ne déclenche pas les signaux : l'image normalisée n'est pas remise en file
+        if lignes.update(**{champ: image, champ_empreinte: empreinte}):
+            enregistrer_renditions(tache.Source, tache.Id_source, empreinte, renditions)
+    _terminer(tache)
+
+
+def relancer_bloquees(delai=timedelta(minutes=10)):
+    """Remet en attente les tâches restées en cours (processus interrompu)"""
+    return TacheImage.objects.filter(
+        Etat=TacheImage.TypeEtat.EN_COURS, Date_maj__lt=timezone.now() - delai,
+    ).update(Etat=TacheImage.TypeEtat.ATTENTE, Date_maj=timezone.now())
+
+
+def traiter_file(limite=None):
+    """Traite les tâches en attente jusqu'à vider la file (ou `limite` tâches) ; retourne leur nombre"""
+    traitees = 0
+    while limite is None or traitees < limite:
+        tache = prendre_tache()
+        if tache is None:
+            break
+        traiter(tache)
+        traitees += 1
+    return traitees
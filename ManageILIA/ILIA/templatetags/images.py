@@ -0,0 +1,15 @@
+from django import template
+
+register = template.Library()
+
+
+@register.filter
+def photo_url(personne, taille):
+    """{{ personne|photo_url:48 }} : URL de la photo déclinée pour un affichage de 48 px"""
+    return personne.photo_url_taille(int(taille)) if personne else ''
+
+
+@register.filter
+def image_url(projet, taille):
+    """{{ projet|image_url:300 }} : URL de l'image de couverture déclinée pour un affichage de 300 px"""
+    return projet.image_url_taille(int(taille)) if projet else ''
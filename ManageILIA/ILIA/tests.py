@@ -1,3 +1,137 @@
+import datetime
+import re
+
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from projects.models import Projet, PersonneProjet, Fichier
+from reservations.models import Piece, Bureau, Reservation
+from timetable.models import PersonalSchedule, RecurringTelework
+from .models import Personne, Notification, PersonneNotification
+
+
+class HomeViewTest(TestCase):
+    """L'annuaire de l'accueil ne doit pas coûter une requête par personne."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('accueil', password='secret')
+        Personne.objects.create(Id_Matricule=100000, Nom="Zeta", Prenom="Alice", Email="alice@ilia.be", user=self.user)
+        self.client.login(username='accueil', password='secret')
+
+    def ajouter_personnes(self, nombre, debut):
+        today = timezone.now().date()
+        for i in range(debut, debut + nombre):
+            user = User.objects.create(username=f"personne{i}")
+            Personne.objects.create(Id_Matricule=100001 + i, Nom="Nom", Prenom=f"P{i:03d}", Email=f"{i}@ilia.be", user=user)
+            if i % 3 == 0:
+                RecurringTelework.objects.create(
+                    schedule=PersonalSchedule.objects.create(user=user),
+                    day_of_week=today.weekday(),
+                    start_date=today - datetime.timedelta(days=7),
+                    end_date=today + datetime.timedelta(days=7),
+                )
+
+    def nombre_de_requetes(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('home'))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response
+
+    def test_requetes_independantes_du_nombre_de_personnes(self):
+        self.ajouter_personnes(5, 0)
+        petit, _ = self.nombre_de_requetes()
+        self.ajouter_personnes(100, 5)
+        grand, response = self.nombre_de_requetes()
+        self.assertEqual(petit, grand)
+
+        statuts = [item['status'] for item in response.context['users_status']]
+        self.assertEqual(len(statuts), 50)
+        self.assertEqual(statuts, sorted(statuts))
+
+
+class ColonnesBinairesTest(TestCase):
+    """Aucune page ne doit rapatrier les photos ou images stockées en base : elles ont leur propre URL."""
+
+    COLONNE_BINAIRE = re.compile(r'[`"](Photo|Image_projet)[`"]')
+
+    def setUp(self):
+        self.user = User.objects.create_superuser('admin', password='secret')
+        self.personne = Personne.objects.create(
+            Id_Matricule=100000, Nom="Admin", Prenom="Ada", Email="ada@ilia.be", user=self.user, Photo=b"\xff" * 1000,
+        )
+        autre = Personne.objects.create(
+            Id_Matricule=100001, Nom="Autre", Prenom="Bob", Email="bob@ilia.be",
+            user=User.objects.create(username='bob'), Photo=b"\xff" * 1000,
+        )
+        self.projet = Projet.objects.create(Nom_projet="Projet", Image_projet=b"\xff" * 1000, createur=self.personne)
+        for p in (self.personne, autre):
+            PersonneProjet.objects.create(Id_Matricule=p, Id_projet=self.projet)
+        Fichier.objects.create(Nom="f.txt", Id_Matricule=autre, Id_projet=self.projet)
+        piece = Piece.objects.create(Nom="Salle", Etage=1)
+        self.bureau = Bureau.objects.create(Nom="B1", Id_piece=piece)
+        debut = timezone.now()
+        Reservation.objects.create(
+            Nom="R", Debut=debut, Fin=debut + datetime.timedelta(hours=1),
+            Id_Matricule=autre, Id_bureau=self.bureau, Id_piece=piece,
+        )
+        notif = Notification.objects.create(Titre="N", Contenu="C", Type="INFO")
+        PersonneNotification.objects.create(Id_Matricule=autre, Id_notif=notif)
+        self.client.login(username='admin', password='secret')
+
+    def colonnes_binaires_lues(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertLess(response.status_code, 400, url)
+        colonnes = set()
+        for requete in ctx.captured_queries:
+            sql = requete['sql']
+            if not sql.startswith('SELECT'):
+                continue
+            colonnes |= set(self.COLONNE_BINAIRE.findall(sql.split(' FROM ')[0]))
+        return colonnes
+
+    def test_pages_sans_colonnes_binaires(self):
+        semaine = '?start=2000-01-01T00:00:00&end=2100-01-01T00:00:00'
+        urls = [
+            reverse('home'),
+            reverse('reservations:events_json') + semaine,
+            reverse('reservations:occupation_locaux'),
+            reverse('reservations:bureau_events_json', args=[self.bureau.pk]) + semaine,
+            reverse('projects:mes_projets'),
+            reverse('projects:project_detail', args=[self.projet.Id_projet]),
+            reverse('projects:edit_projet', args=[self.projet.Id_projet]),
+            reverse('accounts:profil'),
+        ]
+        urls += [
+            reverse(f'admin:{model._meta.app_label}_{model._meta.model_name}_changelist')
+            for model in admin.site._registry
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.colonnes_binaires_lues(url), set())
+
+    def test_chargement_explicite(self):
+        personne = Personne.objects.get(pk=self.personne.pk)
+        self.assertEqual(personne.get_deferred_fields(), {'Photo'})
+        personne = Personne.objects.avec_binaires().get(pk=self.personne.pk)
+        self.assertEqual(personne.get_deferred_fields(), set())
+        personne = Personne.objects.only('Nom').avec_binaires().get(pk=self.personne.pk)
+        self.assertNotIn('Photo', personne.get_deferred_fields())
+        self.assertEqual(bytes(personne.Photo), b"\xff" * 1000)
 
-# Create your tests here.
+    def test_lecture_differee_sans_perte(self):
+        """Lire la photo différée ne recharge qu'elle : les modifications en cours sont conservées"""
+        personne = Personne.objects.get(pk=self.personne.pk)
+        personne.Nom = "MODIFIÉ"
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(bytes(personne.Photo), b"\xff" * 1000)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertNotIn('"Nom"', ctx.captured_queries[0]['sql'])
+        self.assertEqual(personne.Nom, "MODIFIÉ")
+        personne.save()
+        self.assertEqual(Personne.objects.get(pk=self.personne.pk).Nom, "MODIFIÉ")
@@ -1,10 +1,10 @@
 from django.shortcuts import render
 from django.views import View
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.paginator import Paginator
+from django.db.models.functions import Lower
 
-# ... existing code ...
-
-from timetable.models import PersonalSchedule, RecurringTelework
+from reservations.presence import annoter_teletravail
 from ILIA.models import Personne
 from django.utils import timezone
 
@@ -12,50 +12,35 @@ from django.utils import timezone
 class HomeView(LoginRequiredMixin, View):
     login_url = 'login'
     redirect_field_name = 'next'
+    users_per_page = 50
 
     def get(self, request):
         # Récupérer la personne actuelle
         personne = Personne.objects.filter(user=request.user).first()
 
-        # Récupérer tous les utilisateurs
-        all_users = Personne.objects.all().order_by('Prenom', 'Nom')
-
-        # Déterminer le statut de chaque utilisateur (sur place ou télétravail)
-        users_status = []
+        # Annuaire du jour : statut calculé et trié directement en base
+        # (sur place d'abord, puis par prénom et nom)
         today = timezone.now().date()
-        today_weekday = today.weekday()  # 0 = lundi, 6 = dimanche
-
-        for user in all_users:
-            # Vérifier si l'utilisateur est en télétravail aujourd'hui
-            is_teleworking = False
-
-            if user.user:
-                # Récupérer le schedule de l'utilisateur
-                schedule = PersonalSchedule.objects.filter(user=user.user).first()
-                if schedule:
-                    # Vérifier s'il y a un télétravail récurrent pour aujourd'hui
-                    is_teleworking = RecurringTelework.objects.filter(
-                        schedule=schedule,
-                        day_of_week=today_weekday,
-                        start_date__lte=today,
-                        end_date__gte=today
-                    ).exists()
-
-            status = 'telework' if is_teleworking else 'present'
-            users_status.append({
+        annuaire = annoter_teletravail(
+            Personne.objects.only('Id_Matricule', 'Nom', 'Prenom', 'user_id'),
+            today,
+        ).order_by('en_teletravail', Lower('Prenom'), Lower('Nom'))
+
+        page_obj = Paginator(annuaire, self.users_per_page).get_page(request.GET.get('page'))
+
+        users_status = [
+            {
                 'personne': user,
-                'user_id': user.user.id if user.user else None,  # Ajouter cette ligne
-                'status': status,
+                'user_id': user.user_id,
+                'status': 'telework' if user.en_teletravail else 'present',
                 'display_name': f"{user.Prenom} {user.Nom}"
-            })
-
-            users_status = sorted(
-                users_status,
-                key=lambda u: (u['status'], u['personne'].Prenom.lower(), u['personne'].Nom.lower())
-            )
+            }
+            for user in page_obj
+        ]
 
         context = {
             'personne': personne,
             'users_status': users_status,
+            'page_obj': page_obj,
         }
-        return render(request, 'home.html', context)
\ No newline at end of file
+        return render(request, 'home.html', context)
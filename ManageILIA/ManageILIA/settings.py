@@ -103,6 +103,20 @@ DATABASES = {
         }
     }
 }
+
+# Cache partagé entre les processus du serveur (le compteur de notifications non
+# lues y est invalidé). Ex. : CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# et CACHE_LOCATION=redis://127.0.0.1:6379/1, ou le cache en base
+# (django.core.cache.backends.db.DatabaseCache, table créée par createcachetable).
+# Sans réglage : LocMemCache, propre à chaque processus (développement seulement).
+if os.getenv('CACHE_BACKEND'):
+    CACHES = {
+        'default': {
+            'BACKEND': os.getenv('CACHE_BACKEND'),
+            'LOCATION': os.getenv('CACHE_LOCATION', ''),
+        }
+    }
+
 LOGIN_URL = 'login'
 LOGOUT_REDIRECT_URL = 'login'
 LOGIN_REDIRECT_URL = 'home'
@@ -1,3 +1,163 @@
+import io
+
+from PIL import Image
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ILIA.binaires import empreinte_binaire
+from ILIA import taches
+from ILIA.models import Personne, ImageRendition, TacheImage
+
+
+def image_jpeg(largeur, hauteur, couleur=(200, 30, 30)):
+    buffer = io.BytesIO()
+    Image.new('RGB', (largeur, hauteur), couleur).save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+JPEG = image_jpeg(1000, 600)
+
+
+class PhotoProfilTest(TestCase):
+    """Les photos sont servies par URL, avec un cache long invalidé par l'empreinte."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('photo', password='secret')
+        self.personne = Personne.objects.create(
+            Id_Matricule=100000, Nom="Photo", Prenom="Paul", Email="paul@ilia.be", user=self.user, Photo=JPEG,
+        )
+        self.client.login(username='photo', password='secret')
+
+    def test_url_et_cache(self):
+        self.assertEqual(self.personne.Photo_empreinte, empreinte_binaire(JPEG))
+        url = self.personne.photo_url
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, JPEG)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['ETag'], f'"{self.personne.Photo_empreinte}"')
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+
+        # Revalidation sans requête en base
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=f'"{self.personne.Photo_empreinte}"')
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse([q for q in ctx.captured_queries if 'ILIA_personne' in q['sql']])
+
+    def test_nouvelle_photo_nouvelle_url(self):
+        ancienne = self.personne.photo_url
+        personne = Personne.objects.get(pk=self.personne.pk)
+        personne.Photo = image_jpeg(400, 400, (0, 0, 255))
+        personne.save()
+        personne.refresh_from_db()
+        self.assertNotEqual(personne.photo_url, ancienne)
+        self.assertEqual(self.client.get(ancienne).status_code, 404)
+        self.assertEqual(self.client.get(personne.photo_url).status_code, 200)
+
+        # Enregistrer sans toucher la photo (colonne différée) ne change pas l'empreinte
+        personne = Personne.objects.get(pk=self.personne.pk)
+        personne.Nom = "Autre"
+        personne.save()
+        personne.refresh_from_db()
+        self.assertEqual(personne.Photo_empreinte, empreinte_binaire(image_jpeg(400, 400, (0, 0, 255))))
+
+        personne.Photo = None
+        personne.save()
+        self.assertEqual(personne.photo_url, '')
+        self.assertFalse(ImageRendition.objects.filter(Id_source=personne.pk).exists())
+
+    def test_declinaisons(self):
+        self.assertEqual(taches.traiter_file(), 1)
+        self.personne.refresh_from_db()
+        renditions = ImageRendition.objects.filter(Source=ImageRendition.TypeSource.PHOTO, Id_source=self.personne.pk)
+        self.assertEqual(
+            sorted(renditions.filter(Format='webp').values_list('Taille', flat=True)), [48, 128, 300],
+        )
+        self.assertEqual(renditions.count(), 6)
+
+        url = self.personne.photo_url_taille(100)
+        response = self.client.get(url, HTTP_ACCEPT='image/avif,image/webp,*/*')
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        self.assertIn('Accept', response['Vary'])
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(max(Image.open(io.BytesIO(response.content)).size), 128)
+
+        response = self.client.get(url, HTTP_ACCEPT='image/*')
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertLess(len(response.content), len(JPEG))
+
+    def test_original_tant_que_non_decline(self):
+        self.assertTrue(self.personne.photo_en_traitement)
+        response = self.client.get(self.personne.photo_url_taille(48))
+        self.assertEqual(response.content, JPEG)
+        self.assertNotIn('immutable', response['Cache-Control'])
+
+    def test_televersement_hors_requete(self):
+        taches.traiter_file()
+        photo = image_jpeg(2000, 1500, (0, 120, 0))
+        response = self.client.post(reverse('accounts:upload_photo'), {
+            'photo_file': SimpleUploadedFile('photo.jpg', photo, content_type='image/jpeg'),
+        })
+        self.assertRedirects(response, reverse('accounts:profil'), fetch_redirect_response=False)
+
+        # La requête enregistre l'original tel quel et met son traitement en file
+        personne = Personne.objects.avec_binaires().get(pk=self.personne.pk)
+        self.assertEqual(bytes(personne.Photo), photo)
+        self.assertTrue(personne.photo_en_traitement)
+        self.assertContains(self.client.get(reverse('accounts:profil')), "en cours d'optimisation")
+
+        self.assertEqual(taches.traiter_file(), 1)
+        personne = Personne.objects.avec_binaires().get(pk=self.personne.pk)
+        self.assertEqual(Image.open(io.BytesIO(personne.Photo)).size, (300, 225))
+        self.assertEqual(personne.Photo_empreinte, empreinte_binaire(personne.Photo))
+        self.assertFalse(personne.photo_en_traitement)
+        self.assertFalse(TacheImage.objects.exists())
+
+        response = self.client.post(reverse('accounts:upload_photo'), {
+            'photo_file': SimpleUploadedFile('photo.jpg', b'pas une image', content_type='image/jpeg'),
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(TacheImage.objects.exists())
+
+    def test_photo_remplacee_pendant_le_traitement(self):
+        tache = taches.prendre_tache()
+        personne = Personne.objects.get(pk=self.personne.pk)
+        personne.Photo = image_jpeg(100, 100)
+        personne.save()
+
+        taches.traiter(tache)
+        # Le résultat périmé est abandonné, la nouvelle photo reste en file
+        personne.refresh_from_db()
+        self.assertEqual(personne.Photo_empreinte, empreinte_binaire(image_jpeg(100, 100)))
+        self.assertEqual(TacheImage.objects.get().Etat, TacheImage.TypeEtat.ATTENTE)
+        self.assertFalse(ImageRendition.objects.exists())
+
+        self.assertEqual(taches.traiter_file(), 1)
+        self.assertEqual(ImageRendition.objects.count(), 4)
+
+    def test_image_illisible(self):
+        illisible = b'\xff\xd8 tronquee'
+        empreinte = empreinte_binaire(illisible)
+        Personne.objects.filter(pk=self.personne.pk).update(Photo=illisible, Photo_empreinte=empreinte)
+        TacheImage.objects.update(Empreinte=empreinte)
+
+        with self.assertLogs('ILIA.taches', 'WARNING'):
+            self.assertEqual(taches.traiter_file(), 1)
 
+        # Échec définitif : la photo n'est plus « en traitement » et la tâche n'est pas relancée
+        tache = TacheImage.objects.get()
+        self.assertEqual(tache.Etat, TacheImage.TypeEtat.ECHEC)
+        self.assertFalse(self.personne.photo_en_traitement)
+        self.assertEqual(taches.traiter_file(), 0)
 
+    def test_page_sans_base64(self):
+        response = self.client.get(reverse('accounts:profil'))
+        self.assertContains(response, self.personne.photo_url_taille(48))
+        self.assertContains(response, self.personne.photo_url_taille(128))
+        self.assertNotContains(response, 'data:image/jpeg;base64')
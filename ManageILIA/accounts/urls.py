@@ -7,6 +7,8 @@ app_name = 'accounts'
 urlpatterns = [
     path('profil/', views.profile_view, name='profil'),
     path('profil/photo/', views.upload_photo_view, name='upload_photo'),
+    path('photo/<int:matricule>/<str:empreinte>/', views.photo_view, name='photo'),
+    path('photo/<int:matricule>/<str:empreinte>/<int:taille>/', views.photo_taille_view, name='photo_taille'),
     path('password_change/', auth_views.PasswordChangeView.as_view(
         template_name='accounts/password_change.html',
         success_url='/accounts/password_change/done/'
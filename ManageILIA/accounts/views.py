@@ -5,9 +5,9 @@ from django.views import View
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, get_object_or_404
 from .forms import RegistrationForm, ProfilePhotoForm
-from ILIA.models import Personne
-import io
-from PIL import Image
+from ILIA.images import reponse_image, reponse_rendition
+from ILIA.models import Personne, ImageRendition
+from ILIA.renditions import lire_image
 from django.core.files.base import ContentFile
 from django.contrib.auth.models import User
 
@@ -89,25 +89,12 @@ def upload_photo_view(request):
             uploaded_file = request.FILES['photo_file']
 
             try:
-
-                image = Image.open(uploaded_file)
-
-
-                if image.mode != 'RGB':
-                    image = image.convert('RGB')
-
-
-                image.thumbnail((300, 300))
-
-
-                buffer = io.BytesIO()
-                image.save(buffer, format="JPEG", quality=85)  # Qualité 85%
-
-
-                personne.Photo = buffer.getvalue()
+                # Enregistrée telle quelle : la réduction et les déclinaisons sont faites
+                # hors requête par la commande traiter_images
+                personne.Photo = lire_image(uploaded_file)
                 personne.save()
 
-                messages.success(request, "Photo mise à jour et compressée !")
+                messages.success(request, "Photo mise à jour ! Elle sera optimisée dans quelques instants.")
                 return redirect('accounts:profil')
 
             except Exception as e:
@@ -115,4 +102,19 @@ def upload_photo_view(request):
     else:
         form = ProfilePhotoForm()
 
-    return render(request, 'accounts/upload_photo.html', {'form': form})
\ No newline at end of file
+    return render(request, 'accounts/upload_photo.html', {'form': form})
+
+
+@login_required
+def photo_view(request, matricule, empreinte):
+    """Photo de profil servie avec un cache long (l'URL change avec la photo)"""
+    return reponse_image(request, Personne.objects.filter(pk=matricule), 'Photo', 'Photo_empreinte', empreinte)
+
+
+@login_required
+def photo_taille_view(request, matricule, empreinte, taille):
+    """Déclinaison de la photo pour un affichage de `taille` pixels"""
+    return reponse_rendition(
+        request, ImageRendition.TypeSource.PHOTO, matricule, empreinte, taille,
+        Personne.objects.filter(pk=matricule), 'Photo', 'Photo_empreinte',
+    )
@@ -1,11 +1,13 @@
 from django.contrib import admin
+from ILIA.admin import SansBinairesAdminMixin
 from .models import Event
 from .models import Participant
 
 
 @admin.register(Event)
-class EventAdmin(admin.ModelAdmin):
+class EventAdmin(SansBinairesAdminMixin, admin.ModelAdmin):
     list_display = ('title', 'start', 'end', 'organiser', 'co_organisers_list')
+    list_select_related = ('organiser',)
     list_filter = ('start', 'end')
     search_fields = ('title', 'description')
 
@@ -15,8 +17,9 @@ class EventAdmin(admin.ModelAdmin):
 
 
 @admin.register(Participant)
-class ParticipantAdmin(admin.ModelAdmin):
+class ParticipantAdmin(SansBinairesAdminMixin, admin.ModelAdmin):
     list_display = ('person_display', 'event', 'status')
+    list_select_related = ('person', 'event')
     list_filter = ('status', 'event')
     search_fields = ('person__Nom', 'person__Prenom', 'event__title')
 
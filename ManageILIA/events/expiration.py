@@ -0,0 +1,44 @@
+"""
+Purge des événements terminés, hors des requêtes web.
+
+Les vues ne lisent que les événements actifs (Event.objects.actifs()) ; la
+commande purger_evenements supprime les autres par lots, éventuellement après
+les avoir copiés dans EvenementArchive. Chaque lot est une transaction courte :
+les participants et co-organisateurs partent avec l'événement (cascade).
+"""
+from django.db import transaction
+from django.db.models import Prefetch
+
+from .models import Event, EvenementArchive, Participant
+
+TAILLE_LOT = 500
+
+
+def _archiver(ids):
+    events = Event.objects.filter(pk__in=ids).prefetch_related(
+        Prefetch('participants', queryset=Participant.objects.only('event_id', 'person_id', 'status')),
+        Prefetch('co_organisers', to_attr='co_organisateurs'),
+    )
+    EvenementArchive.objects.bulk_create([
+        EvenementArchive(
+            Id_event=ev.id, title=ev.title, description=ev.description, start=ev.start, end=ev.end,
+            organiser_matricule=ev.organiser_id,
+            co_organisers=[p.pk for p in ev.co_organisateurs],
+            participants=[{'matricule': p.person_id, 'status': p.status} for p in ev.participants.all()],
+        )
+        for ev in events
+    ])
+
+
+def purger_expires(avant, archiver=False, taille=TAILLE_LOT):
+    """Supprime (ou archive puis supprime) les événements terminés avant `avant` ; retourne leur nombre"""
+    total = 0
+    while True:
+        ids = list(Event.objects.filter(end__lt=avant).values_list('pk', flat=True)[:taille])
+        if not ids:
+            return total
+        with transaction.atomic():
+            if archiver:
+                _archiver(ids)
+            Event.objects.filter(pk__in=ids).delete()
+        total += len(ids)
@@ -0,0 +1,93 @@
+"""
+Résolution des invités saisis à la création d'un événement.
+
+Le formulaire accepte des matricules (séparés par des virgules), des noms
+« Prénom Nom » (séparés par des points-virgules) et des rôles. Chaque sorte est
+résolue en une seule requête, quel que soit le nombre d'invités.
+"""
+from typing import NamedTuple
+
+from django.db.models import Q
+
+from ILIA.models import Personne
+
+from .models import Participant
+
+CHAMPS = ('Id_Matricule', 'Nom', 'Prenom')
+
+
+class Invites(NamedTuple):
+    personnes: dict  # matricule → {'id', 'nom', 'prenom'}
+    erreurs: list
+
+
+def _entree(ligne):
+    return {'id': ligne['Id_Matricule'], 'nom': ligne['Nom'], 'prenom': ligne['Prenom']}
+
+
+def resoudre(matricules='', noms='', roles=()):
+    """Personnes désignées par les trois champs, et messages d'erreur pour les saisies introuvables"""
+    personnes, erreurs = {}, []
+
+    demandes = []
+    for texte in matricules.split(','):
+        texte = texte.strip()
+        if not texte:
+            continue
+        try:
+            demandes.append(int(texte))
+        except ValueError:
+            erreurs.append(f"Matricule invalide : '{texte}'. Veuillez entrer des nombres séparés par des virgules.")
+    if demandes:
+        trouves = {ligne['Id_Matricule']: ligne for ligne in Personne.objects.filter(pk__in=demandes).values(*CHAMPS)}
+        for mat in demandes:
+            if mat in trouves:
+                personnes[mat] = _entree(trouves[mat])
+            else:
+                erreurs.append(f"Personne avec le matricule {mat} non trouvée.")
+
+    paires = []
+    for nom in noms.split(';'):
+        nom = nom.strip()
+        if not nom:
+            continue
+        morceaux = nom.split()
+        if len(morceaux) >= 2:
+            paires.append((morceaux[0], ' '.join(morceaux[1:])))
+        else:
+            erreurs.append(f"Format de nom invalide : '{nom}'. Veuillez entrer : Prénom Nom")
+    if paires:
+        condition = Q()
+        for prenom, nom in paires:
+            condition |= Q(Prenom__iexact=prenom, Nom__iexact=nom)
+        trouves = {}
+        # Homonymes : la première personne créée, comme auparavant avec .first()
+        for ligne in Personne.objects.filter(condition).order_by('pk').values(*CHAMPS):
+            trouves.setdefault((ligne['Prenom'].lower(), ligne['Nom'].lower()), ligne)
+        for prenom, nom in paires:
+            ligne = trouves.get((prenom.lower(), nom.lower()))
+            if ligne:
+                personnes[ligne['Id_Matricule']] = _entree(ligne)
+            else:
+                erreurs.append(f"Personne '{prenom} {nom}' non trouvée.")
+
+    ids_roles = [int(r) for r in roles if str(r).isdigit()]
+    if ids_roles:
+        for ligne in Personne.objects.filter(roles__Id_role__in=ids_roles).distinct().values(*CHAMPS):
+            personnes[ligne['Id_Matricule']] = _entree(ligne)
+
+    return Invites(personnes, erreurs)
+
+
+def creer_participants(event, matricules):
+    """
+    Organisateur accepté et invités en attente, en un INSERT ; les personnes
+    disparues depuis la saisie sont ignorées. Retourne les matricules invités.
+    """
+    invites = set(Personne.objects.filter(pk__in=set(matricules)).values_list('pk', flat=True))
+    invites.discard(event.organiser_id)
+    lignes = [Participant(event=event, person_id=m) for m in sorted(invites)]
+    if event.organiser_id:
+        lignes.append(Participant(event=event, person_id=event.organiser_id, status=Participant.Status.ACCEPTED))
+    Participant.objects.bulk_create(lignes, ignore_conflicts=True)
+    return sorted(invites)
@@ -0,0 +1,24 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from events import expiration
+
+
+class Command(BaseCommand):
+    help = "Supprime (ou archive) les événements terminés et leurs participants (à lancer chaque nuit)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--archiver', action='store_true',
+                            help="Copie les événements supprimés dans EvenementArchive")
+        parser.add_argument('--jours', type=int, default=0,
+                            help="Délai après la fin de l'événement avant sa purge (défaut : 0)")
+        parser.add_argument('--lot', type=int, default=expiration.TAILLE_LOT,
+                            help=f"Événements supprimés par transaction (défaut : {expiration.TAILLE_LOT})")
+
+    def handle(self, *args, **options):
+        avant = timezone.now() - datetime.timedelta(days=options['jours'])
+        nombre = expiration.purger_expires(avant, archiver=options['archiver'], taille=options['lot'])
+        action = "archivé(s)" if options['archiver'] else "supprimé(s)"
+        self.stdout.write(self.style.SUCCESS(f"{nombre} événement(s) terminé(s) {action}."))
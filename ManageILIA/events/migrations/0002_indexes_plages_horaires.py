@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['start', 'end'], name='events_even_start_bfe45a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='participant',
+            index=models.Index(fields=['person', 'status'], name='events_part_person__1035ac_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0002_indexes_plages_horaires'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EvenementArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('Id_event', models.IntegerField()),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True)),
+                ('start', models.DateTimeField()),
+                ('end', models.DateTimeField(db_index=True)),
+                ('organiser_matricule', models.IntegerField(blank=True, null=True)),
+                ('co_organisers', models.JSONField(default=list)),
+                ('participants', models.JSONField(default=list)),
+                ('date_archivage', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
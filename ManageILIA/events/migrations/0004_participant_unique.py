@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:09
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def dedoublonner(apps, schema_editor):
+    """Une seule participation par personne et par événement : la plus ancienne est gardée"""
+    Participant = apps.get_model('events', 'Participant')
+    doublons = (Participant.objects.values('event', 'person')
+                .annotate(n=Count('id'), premier=Min('id')).filter(n__gt=1))
+    for ligne in doublons:
+        Participant.objects.filter(event=ligne['event'], person=ligne['person']).exclude(pk=ligne['premier']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0003_evenement_archive'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedoublonner, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='participant',
+            unique_together={('event', 'person')},
+        ),
+    ]
@@ -1,4 +1,12 @@
 from django.db import models
+from django.utils import timezone
+
+
+class EventQuerySet(models.QuerySet):
+
+    def actifs(self):
+        """Événements non terminés (les terminés sont purgés par la commande purger_evenements)"""
+        return self.filter(end__gte=timezone.now())
 
 
 class Event(models.Model):
@@ -10,6 +18,12 @@ class Event(models.Model):
 
     organiser = models.ForeignKey('ILIA.Personne', on_delete=models.SET_NULL, null=True, blank=True)
     co_organisers = models.ManyToManyField('ILIA.Personne', related_name='co_events', blank=True)
+    updated_at = models.DateTimeField(auto_now=True)  # Version des flux JSON du calendrier
+
+    objects = EventQuerySet.as_manager()
+
+    class Meta:
+        indexes = [models.Index(fields=['start', 'end'])]
 
     def __str__(self):
         return self.title
@@ -25,6 +39,30 @@ class Participant(models.Model):
     event = models.ForeignKey(Event, related_name='participants', on_delete=models.CASCADE)
     person = models.ForeignKey('ILIA.Personne', on_delete=models.CASCADE)
     status = models.IntegerField(choices=Status.choices, default=Status.INVITED)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('event', 'person')
+        indexes = [models.Index(fields=['person', 'status'])]
 
     def __str__(self):
         return f"{self.person} - {self.get_status_display()}"
+
+
+class EvenementArchive(models.Model):
+    """
+    Événement terminé, archivé par `purger_evenements --archiver` avant sa
+    suppression. Copie autonome : organisateur et participants y sont figés.
+    """
+    Id_event = models.IntegerField()
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    start = models.DateTimeField()
+    end = models.DateTimeField(db_index=True)
+    organiser_matricule = models.IntegerField(null=True, blank=True)
+    co_organisers = models.JSONField(default=list)  # [matricule, …]
+    participants = models.JSONField(default=list)  # [{"matricule": …, "status": …}, …]
+    date_archivage = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.title} (archivé)"
@@ -1,7 +1,18 @@
+import io
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
-from .models import Event
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from . import invitations
+from .models import Event, EvenementArchive, Participant
 from django.utils import timezone
 
+from ILIA.models import Personne, PersonneNotification, Role
+
 
 class EventModelTest(TestCase):
     def test_create_event(self):
@@ -9,3 +20,141 @@ class EventModelTest(TestCase):
         end = start + timezone.timedelta(hours=1)
         e = Event.objects.create(title='Test', description='Desc', start=start, end=end)
         self.assertEqual(str(e), 'Test')
+
+
+class PurgeEvenementsTest(TestCase):
+    """Les pages ne suppriment rien ; les événements terminés sont purgés par commande."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('orga', password='secret')
+        self.personne = Personne.objects.create(
+            Id_Matricule=700000, Nom="Orga", Prenom="Olga", Email="olga@ilia.be", user=self.user,
+        )
+        self.invite = Personne.objects.create(Id_Matricule=700001, Nom="Invité", Prenom="Igor", Email="igor@ilia.be")
+        maintenant = timezone.now()
+        self.passe = Event.objects.create(
+            title="Passé", start=maintenant - timedelta(days=3), end=maintenant - timedelta(days=2), organiser=self.personne,
+        )
+        self.passe.co_organisers.add(self.invite)
+        Participant.objects.create(event=self.passe, person=self.invite, status=Participant.Status.ACCEPTED)
+        self.futur = Event.objects.create(
+            title="Futur", start=maintenant + timedelta(days=1), end=maintenant + timedelta(days=2), organiser=self.personne,
+        )
+        self.client.login(username='orga', password='secret')
+
+    def test_pages_en_lecture_seule(self):
+        response = self.client.get(reverse('events:dashboard'))
+        self.assertEqual(list(response.context['created_events']), [self.futur])
+        response = self.client.get(reverse('events:list'))
+        self.assertEqual(list(response.context['events']), [self.futur])
+        response = self.client.get(reverse('events:detail', args=[self.passe.pk]))
+        self.assertRedirects(response, reverse('events:dashboard'), fetch_redirect_response=False)
+        self.assertTrue(Event.objects.filter(pk=self.passe.pk).exists())
+
+    def test_purge_archivee(self):
+        sortie = io.StringIO()
+        call_command('purger_evenements', '--archiver', stdout=sortie)
+        self.assertIn("1 événement(s)", sortie.getvalue())
+        self.assertEqual(list(Event.objects.all()), [self.futur])
+        self.assertFalse(Participant.objects.filter(event_id=self.passe.pk).exists())
+
+        archive = EvenementArchive.objects.get()
+        self.assertEqual((archive.Id_event, archive.organiser_matricule), (self.passe.pk, self.personne.pk))
+        self.assertEqual(archive.co_organisers, [self.invite.pk])
+        self.assertEqual(archive.participants, [{'matricule': self.invite.pk, 'status': Participant.Status.ACCEPTED}])
+
+
+class DashboardTest(TestCase):
+    """Le tableau de bord coûte un nombre de requêtes fixe, quel que soit le nombre d'événements."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('tableau', password='secret')
+        self.moi = Personne.objects.create(
+            Id_Matricule=710000, Nom="Moi", Prenom="Mia", Email="mia@ilia.be", user=self.user,
+        )
+        self.autres = [
+            Personne.objects.create(Id_Matricule=710001 + i, Nom=f"Autre{i}", Prenom="A", Email=f"a{i}@ilia.be")
+            for i in range(3)
+        ]
+        self.client.login(username='tableau', password='secret')
+
+    def creer(self, n):
+        """n événements de chaque sorte : créés, acceptés, en attente, refusés"""
+        debut = timezone.now() + timedelta(days=1)
+        for i in range(n):
+            cree = Event.objects.create(title=f"Créé {i}", start=debut, end=debut + timedelta(hours=1), organiser=self.moi)
+            cree.co_organisers.add(self.autres[0])
+            Participant.objects.create(event=cree, person=self.moi, status=Participant.Status.ACCEPTED)
+            Participant.objects.create(event=cree, person=self.autres[1])
+            for statut in (Participant.Status.ACCEPTED, Participant.Status.INVITED, Participant.Status.DECLINED):
+                ev = Event.objects.create(title=f"{statut} {i}", start=debut, end=debut + timedelta(hours=1),
+                                          organiser=self.autres[2])
+                ev.co_organisers.add(self.autres[0])
+                Participant.objects.create(event=ev, person=self.moi, status=statut)
+                Participant.objects.create(event=ev, person=self.autres[1])
+
+    def afficher(self):
+        self.client.get(reverse('events:dashboard'))  # Compteur de notifications mis en cache
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('events:dashboard'))
+        self.assertEqual(response.status_code, 200)
+        return response, len(ctx.captured_queries)
+
+    def test_budget_de_requetes(self):
+        self.creer(1)
+        response, requetes = self.afficher()
+        self.assertEqual(len(response.context['created_events']), 1)
+        self.assertEqual(len(response.context['accepted_events']), 1)
+        self.assertEqual(len(response.context['pending_invitations']), 1)
+        self.assertContains(response, "Participants (2)")
+
+        self.creer(5)
+        response, requetes_6 = self.afficher()
+        self.assertEqual(len(response.context['created_events']), 6)
+        self.assertEqual(len(response.context['accepted_events']), 6)
+        self.assertEqual(len(response.context['pending_invitations']), 6)
+        self.assertEqual(requetes_6, requetes)
+
+
+class InvitationsTest(TestCase):
+    """Les invités sont résolus en au plus trois requêtes et insérés en une seule."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('hote', password='secret')
+        self.hote = Personne.objects.create(
+            Id_Matricule=720000, Nom="Hôte", Prenom="Hugo", Email="hugo@ilia.be", user=self.user,
+        )
+        self.role = Role.objects.create(Nom_role="Chercheur")
+        self.equipe = [
+            Personne.objects.create(Id_Matricule=720001 + i, Nom=f"Membre{i}", Prenom="Eva", Email=f"m{i}@ilia.be")
+            for i in range(20)
+        ]
+        for p in self.equipe:
+            p.roles.add(self.role)
+        self.client.login(username='hote', password='secret')
+
+    def test_resolution_ensembliste(self):
+        with CaptureQueriesContext(connection) as ctx:
+            invites = invitations.resoudre("720001, 720002, 799999, abc", "eva MEMBRE3; Inconnu Total; Seul",
+                                           [str(self.role.pk)])
+        self.assertEqual(len(ctx.captured_queries), 3)
+        self.assertEqual(set(invites.personnes), {p.pk for p in self.equipe})
+        self.assertEqual(invites.personnes[720004], {'id': 720004, 'nom': "Membre3", 'prenom': "Eva"})
+        self.assertEqual(len(invites.erreurs), 4)
+
+    def test_creation(self):
+        self.client.post(reverse('events:create'), {
+            'add_invited': '1', 'invited_matricules': str(self.hote.pk), 'invited_roles': [self.role.pk],
+        })
+        self.assertEqual(len(self.client.session['invited_temp']), 21)
+        debut = timezone.localtime() + timedelta(days=1)
+        response = self.client.post(reverse('events:create'), {
+            'title': "Séminaire", 'description': '',
+            'start': debut.strftime('%Y-%m-%dT%H:%M'), 'end': (debut + timedelta(hours=2)).strftime('%Y-%m-%dT%H:%M'),
+        })
+        self.assertRedirects(response, reverse('events:dashboard'))
+        ev = Event.objects.get(title="Séminaire")
+        self.assertEqual(ev.participants.count(), 21)
+        self.assertEqual(ev.participants.get(person=self.hote).status, Participant.Status.ACCEPTED)
+        # L'organisateur ne reçoit pas sa propre invitation
+        self.assertEqual(PersonneNotification.objects.filter(Id_notif__Cible_id=ev.pk).count(), 20)
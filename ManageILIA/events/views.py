@@ -1,11 +1,16 @@
+from django.http import Http404
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views.generic import ListView, DetailView, TemplateView
 from django.views import View
 import random
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.db.models import F, FilteredRelation, Prefetch, Q
 from .models import Event, Participant
 from .forms import EventCreateForm
-from ILIA.models import Personne, Notification, PersonneNotification
+from . import invitations
+from ILIA.binaires import differer_binaires
+from ILIA.models import Personne
+from notifications.service import notifier
 from django.contrib import messages
 from django.utils import timezone
 
@@ -16,11 +21,8 @@ class EventListView(ListView):
     context_object_name = 'events'
     
     def get_queryset(self):
-        now = timezone.localtime(timezone.now())
-        deleted_count, _ = Event.objects.filter(end__lt=now).delete()
-        if deleted_count > 0:
-            messages.info(self.request, f"{deleted_count} événement(s) passé(s) supprimé(s) automatiquement.")
-        return Event.objects.all()
+        # Les événements terminés sont purgés par la commande purger_evenements
+        return Event.objects.actifs()
 
 
 class EventDetailView(DetailView):
@@ -28,18 +30,15 @@ class EventDetailView(DetailView):
     template_name = 'events/event_detail.html'
     context_object_name = 'event'
     
+    def get_queryset(self):
+        return Event.objects.actifs()
+
     def get(self, request, *args, **kwargs):
-        # Supprimer automatiquement les événements passés
-        now = timezone.localtime(timezone.now())
-        Event.objects.filter(end__lt=now).delete()
-        
         try:
-            event = self.get_object()
-        except:
+            return super().get(request, *args, **kwargs)
+        except Http404:
             messages.error(request, "Cet événement n'existe plus (événement passé).")
             return redirect('events:dashboard')
-        
-        return super().get(request, *args, **kwargs)
 
 
 class DashboardView(LoginRequiredMixin, TemplateView):
@@ -53,25 +52,40 @@ class DashboardView(LoginRequiredMixin, TemplateView):
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         personne = self.get_personne()
-        now = timezone.localtime(timezone.now())
-        
-        # Supprimer automatiquement les événements passés
-        deleted_count, _ = Event.objects.filter(end__lt=now).delete()
-        if deleted_count > 0:
-            messages.info(self.request, f"{deleted_count} événement(s) passé(s) supprimé(s) automatiquement.")
-        
+
+        # Lecture seule : les événements terminés sont masqués, puis purgés par purger_evenements
+        created, accepted, pending = [], [], []
         if personne:
-            # Events created by me
-            created = Event.objects.filter(organiser=personne).order_by('-start')
-            # Events where I am a participant and accepted, and not created by me
-            accepted = Event.objects.filter(participants__person=personne, participants__status=Participant.Status.ACCEPTED).exclude(organiser=personne).distinct()
-            # Invitations pending
-            pending_parts = Participant.objects.filter(person=personne, status=Participant.Status.INVITED).select_related('event')
-            pending = [p.event for p in pending_parts]
-        else:
-            created = Event.objects.none()
-            accepted = Event.objects.none()
-            pending = []
+            # Une requête pour tous mes événements, annotés de ma participation ;
+            # organisateur joint, co-organisateurs et participants préchargés
+            events = differer_binaires(
+                Event.objects.actifs()
+                .annotate(moi=FilteredRelation('participants', condition=Q(participants__person=personne)))
+                .filter(Q(organiser=personne) | Q(moi__isnull=False))
+                .annotate(mon_statut=F('moi__status'))
+                .select_related('organiser')
+            ).prefetch_related(
+                'co_organisers',
+                Prefetch('participants', queryset=differer_binaires(
+                    Participant.objects.select_related('person').order_by('id')
+                )),
+            ).order_by('-start')
+
+            vus = set()
+            for ev in events:
+                # Une personne invitée deux fois donnerait deux lignes pour le même événement
+                if ev.pk in vus:
+                    continue
+                vus.add(ev.pk)
+                # Events created by me
+                if ev.organiser_id == personne.pk:
+                    created.append(ev)
+                # Events where I am a participant and accepted, and not created by me
+                elif ev.mon_statut == Participant.Status.ACCEPTED:
+                    accepted.append(ev)
+                # Invitations pending
+                if ev.mon_statut == Participant.Status.INVITED:
+                    pending.append(ev)
 
         ctx.update({
             'created_events': created,
@@ -120,65 +134,15 @@ class EventCreateView(LoginRequiredMixin, View):
             invited_names = request.POST.get('invited_names', '').strip()
             invited_roles = request.POST.getlist('invited_roles')
             
-            invited_people = set()
-            has_error = False
-            
-            # Traiter les matricules
-            if invited_matricules:
-                for mat_str in invited_matricules.split(','):
-                    mat_str = mat_str.strip()
-                    try:
-                        mat = int(mat_str)
-                        p = Personne.objects.filter(Id_Matricule=mat).first()
-                        if p:
-                            invited_people.add(p.Id_Matricule)
-                        else:
-                            messages.error(request, f"Personne avec le matricule {mat} non trouvée.")
-                            has_error = True
-                    except (ValueError, TypeError):
-                        messages.error(request, f"Matricule invalide : '{mat_str}'. Veuillez entrer des nombres séparés par des virgules.")
-                        has_error = True
-            
-            # Traiter les noms
-            if invited_names:
-                for name in invited_names.split(';'):
-                    name = name.strip()
-                    if not name:
-                        continue
-                    tokens = name.split()
-                    if len(tokens) >= 2:
-                        prenom, nom = tokens[0], ' '.join(tokens[1:])
-                        p = Personne.objects.filter(Prenom__iexact=prenom, Nom__iexact=nom).first()
-                        if p:
-                            invited_people.add(p.Id_Matricule)
-                        else:
-                            messages.error(request, f"Personne '{prenom} {nom}' non trouvée.")
-                            has_error = True
-                    else:
-                        messages.error(request, f"Format de nom invalide : '{name}'. Veuillez entrer : Prénom Nom")
-                        has_error = True
-            
-            # Traiter les rôles
-            if invited_roles:
-                for role_id in invited_roles:
-                    try:
-                        personnes_by_role = Personne.objects.filter(roles__Id_role=int(role_id))
-                        for p in personnes_by_role:
-                            invited_people.add(p.Id_Matricule)
-                    except (ValueError, TypeError):
-                        pass
-            
+            invites = invitations.resoudre(invited_matricules, invited_names, invited_roles)
+            for erreur in invites.erreurs:
+                messages.error(request, erreur)
+
             # Ajouter à la session sans doublons
+            deja = {p['id'] for p in request.session['invited_temp']}
             added_count = 0
-            for mat_id in invited_people:
-                p = Personne.objects.get(Id_Matricule=mat_id)
-                entry = {
-                    'id': p.Id_Matricule,
-                    'nom': p.Nom,
-                    'prenom': p.Prenom
-                }
-                # Vérifier qu'il n'existe pas déjà
-                if entry not in request.session['invited_temp']:
+            for mat_id, entry in invites.personnes.items():
+                if mat_id not in deja:
                     request.session['invited_temp'].append(entry)
                     added_count += 1
             
@@ -254,48 +218,22 @@ class EventCreateView(LoginRequiredMixin, View):
             # Créer l'événement avec le formulaire
             ev = form.save(commit=True, creator_personne=personne)
 
-            # S'assurer que l'organisateur est participant et accepté
-            try:
-                if ev.organiser:
-                    Participant.objects.update_or_create(
-                        event=ev,
-                        person=ev.organiser,
-                        defaults={'status': Participant.Status.ACCEPTED}
-                    )
-            except Exception as e:
-                # Ne pas bloquer la création pour une erreur de participant
-                print(f"DEBUG: impossible d'ajouter l'organisateur en tant que participant: {e}")
-            
-            # Ajouter les participants de la session
-            invited_people = []
-            for invited_data in invited_temp:
-                try:
-                    p = Personne.objects.get(Id_Matricule=invited_data['id'])
-                    Participant.objects.get_or_create(event=ev, person=p)
-                    invited_people.append(p)
-                except Personne.DoesNotExist:
-                    pass
+            # L'organisateur (accepté) et les invités de la session, en un INSERT
+            invited_people = invitations.creer_participants(ev, [p['id'] for p in invited_temp])
             
             # Créer et envoyer une notification aux participants invités
-            if invited_people:
-                # Créer la notification
-                notification = Notification.objects.create(
-                    Titre=f"Invitation à l'événement : {ev.title}",
-                    Contenu=f"Vous avez été invité(e) à l'événement '{ev.title}' "
-                            f"organisé par {personne.Prenom} {personne.Nom}.\n\n"
-                            f"Date de début : {ev.start.strftime('%d/%m/%Y à %H:%M')}\n"
-                            f"Date de fin : {ev.end.strftime('%d/%m/%Y à %H:%M')}\n"
-                            f"Description : {ev.description or 'Non spécifiée'}\n\n"
-                            f"ID de l'événement : {ev.id}",
-                    Type="ALERTE"
-                )
-                
-                # Associer la notification à chaque participant invité
-                for p in invited_people:
-                    PersonneNotification.objects.create(
-                        Id_Matricule=p,
-                        Id_notif=notification
-                    )
+            notifier(
+                invited_people,
+                titre=f"Invitation à l'événement : {ev.title}",
+                contenu=f"Vous avez été invité(e) à l'événement '{ev.title}' "
+                        f"organisé par {personne.Prenom} {personne.Nom}.\n\n"
+                        f"Date de début : {ev.start.strftime('%d/%m/%Y à %H:%M')}\n"
+                        f"Date de fin : {ev.end.strftime('%d/%m/%Y à %H:%M')}\n"
+                        f"Description : {ev.description or 'Non spécifiée'}\n\n"
+                        f"ID de l'événement : {ev.id}",
+                type="ALERTE",
+                cible=ev,
+            )
             
             # Nettoyer la session
             if 'invited_temp' in request.session:
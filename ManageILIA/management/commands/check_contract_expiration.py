@@ -1,6 +1,7 @@
 from django.utils import timezone
 from datetime import timedelta
-from ILIA.models import Personne, Role, Notification, PersonneNotification
+from ILIA.models import Personne, Role, Notification
+from notifications.service import notifier
 
 def check_contract_expiration():
     """Vérifie les contrats expirant et envoie des notifications"""
@@ -35,14 +36,4 @@ def check_contract_expiration():
                 f"Jours restants : {jours_restants}\n"
             )
 
-            notification = Notification.objects.create(
-                Titre=titre,
-                Contenu=contenu,
-                Type="CONTRAT_EXPIRE"
-            )
-
-            for admin in administrateurs:
-                PersonneNotification.objects.get_or_create(
-                    Id_Matricule=admin,
-                    Id_notif=notification
-                )
\ No newline at end of file
+            notifier(administrateurs, titre, contenu, type="CONTRAT_EXPIRE")
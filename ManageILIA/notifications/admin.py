@@ -1,11 +1,12 @@
 from django.contrib import admin
+from ILIA.admin import SansBinairesAdminMixin
 from ILIA.models import PersonneNotification
 
 
 
 
 @admin.register(PersonneNotification)
-class PersonneNotificationAdmin(admin.ModelAdmin):
+class PersonneNotificationAdmin(SansBinairesAdminMixin, admin.ModelAdmin):
     """Administration de la table associative Personne-Notification"""
     list_display = ['Id_Matricule', 'Id_notif', 'Date_notif']
     list_filter = ['Date_notif']
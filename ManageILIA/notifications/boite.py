@@ -0,0 +1,68 @@
+"""
+Boîte de réception : pagination par curseur et opérations groupées.
+
+Les notifications d'une personne sont parcourues par ordre décroissant de
+(Date_notif, id). Le curseur désigne la dernière ligne de la page précédente :
+chaque page est une lecture d'index bornée, quelle que soit sa profondeur,
+contrairement à un OFFSET. Les opérations groupées sont des UPDATE / DELETE
+uniques, suivis d'une invalidation du compteur de non lues.
+"""
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+from ILIA.models import PersonneNotification
+from . import compteur
+
+PAR_PAGE = 30
+
+
+class CurseurInvalide(ValueError):
+    pass
+
+
+def encoder_curseur(date, pk):
+    return base64.urlsafe_b64encode(f"{date.isoformat()}|{pk}".encode()).decode().rstrip('=')
+
+
+def decoder_curseur(curseur):
+    """(date, id) désignés par le curseur ; CurseurInvalide s'il est illisible"""
+    try:
+        texte = base64.urlsafe_b64decode(curseur + '=' * (-len(curseur) % 4)).decode()
+        date, pk = texte.split('|')
+        return datetime.fromisoformat(date), int(pk)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise CurseurInvalide(curseur) from e
+
+
+def page(qs, curseur=None, taille=PAR_PAGE):
+    """
+    Page de `qs` (PersonneNotification) située après `curseur`.
+    Retourne (lignes, curseur de la page suivante ou None).
+    """
+    qs = qs.order_by('-Date_notif', '-id')
+    if curseur:
+        date, pk = decoder_curseur(curseur)
+        qs = qs.filter(Q(Date_notif__lt=date) | Q(Date_notif=date, id__lt=pk))
+    lignes = list(qs[:taille + 1])
+    if len(lignes) <= taille:
+        return lignes, None
+    derniere = lignes[taille - 1]
+    return lignes[:taille], encoder_curseur(derniere.Date_notif, derniere.pk)
+
+
+def marquer_tout_lu(personne):
+    """Marque toutes les notifications de la personne comme lues ; retourne leur nombre"""
+    nombre = PersonneNotification.objects.filter(Id_Matricule=personne, Lu=False).update(Lu=True)
+    if nombre:
+        compteur.invalider([personne.pk])
+    return nombre
+
+
+def supprimer_avant(personne, date):
+    """Retire de la boîte les notifications reçues avant `date` ; retourne leur nombre"""
+    nombre, _ = PersonneNotification.objects.filter(Id_Matricule=personne, Date_notif__lt=date).delete()
+    if nombre:
+        compteur.invalider([personne.pk])
+    return nombre
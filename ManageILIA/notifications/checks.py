@@ -0,0 +1,21 @@
+"""
+Vérification de déploiement : le compteur de notifications non lues est
+invalidé dans le cache, qui doit donc être partagé entre les processus.
+"""
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+CACHES_PAR_PROCESSUS = ('django.core.cache.backends.locmem.LocMemCache',)
+
+
+@register(Tags.caches, deploy=True)
+def cache_partage(app_configs, **kwargs):
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if backend in CACHES_PAR_PROCESSUS:
+        return [Error(
+            "Le cache par défaut est propre à chaque processus : l'invalidation du "
+            "compteur de notifications non lues n'atteint pas les autres.",
+            hint="Définir CACHE_BACKEND et CACHE_LOCATION (Redis, Memcached ou DatabaseCache).",
+            id='notifications.E001',
+        )]
+    return []
@@ -0,0 +1,53 @@
+"""
+Lien typé entre une notification et l'objet qu'elle concerne.
+
+Une notification porte (Cible_type, Cible_id). Pour une liste de notifications,
+les cibles sont chargées en une requête par type ; chaque notification reçoit
+l'objet dans son attribut `cible` (None si l'objet a disparu).
+"""
+from collections import defaultdict
+
+from django.apps import apps
+
+from ILIA.models import Notification
+
+MODELES = {
+    Notification.TypeCible.EVENEMENT: 'events.Event',
+    Notification.TypeCible.PROJET: 'projects.Projet',
+    Notification.TypeCible.FICHIER: 'projects.Fichier',
+}
+TYPES = {label: type_cible for type_cible, label in MODELES.items()}
+
+
+def reference(objet):
+    """(Cible_type, Cible_id) désignant `objet` ; ('', None) sans objet"""
+    if objet is None:
+        return '', None
+    return TYPES[objet._meta.label], objet.pk
+
+
+def resoudre(notifications):
+    """Attache `cible` à chaque notification, en une requête par type de cible"""
+    ids = defaultdict(set)
+    for notification in notifications:
+        if notification.Cible_type and notification.Cible_id is not None:
+            ids[notification.Cible_type].add(notification.Cible_id)
+    objets = {
+        type_cible: apps.get_model(MODELES[type_cible]).objects.in_bulk(cibles)
+        for type_cible, cibles in ids.items()
+    }
+    for notification in notifications:
+        notification.cible = objets.get(notification.Cible_type, {}).get(notification.Cible_id)
+    return notifications
+
+
+def cible(notification):
+    """Objet visé par une seule notification (None si aucun)"""
+    return resoudre([notification])[0].cible
+
+
+def evenement(notification):
+    """L'événement visé, pour les invitations"""
+    if notification.Cible_type != Notification.TypeCible.EVENEMENT:
+        return None
+    return cible(notification)
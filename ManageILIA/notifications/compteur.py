@@ -0,0 +1,54 @@
+"""
+Compteur de notifications non lues, gardé en cache par utilisateur.
+
+Le badge du menu est affiché sur chaque page : le compte n'est recalculé en
+base qu'après une invalidation (réception, lecture ou suppression d'une
+notification) ou l'expiration du cache.
+
+L'invalidation doit atteindre tous les processus : le cache doit être partagé
+(réglages CACHE_BACKEND / CACHE_LOCATION, voir settings). Le LocMemCache par
+défaut, propre à chaque processus, ne convient qu'à un serveur mono-processus
+(développement) ; `check --deploy` le signale (notifications.E001).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from ILIA.models import Personne, PersonneNotification
+
+CLE = 'notifications:non_lues:{}'
+
+
+def duree_cache():
+    return getattr(settings, 'NOTIFICATIONS_COMPTEUR_DUREE', 60)
+
+
+def non_lues(user):
+    """Nombre de notifications non lues de l'utilisateur"""
+    cle = CLE.format(user.pk)
+    compte = cache.get(cle)
+    if compte is None:
+        compte = PersonneNotification.objects.filter(Id_Matricule__user=user, Lu=False).count()
+        cache.set(cle, compte, duree_cache())
+    return compte
+
+
+def invalider(matricules):
+    """
+    Oublie le compteur des personnes `matricules`, une fois la transaction
+    validée : un recalcul avant la validation remettrait l'ancien compte en cache.
+    """
+    matricules = list(matricules)
+    if not matricules:
+        return
+
+    def effacer():
+        users = Personne.objects.filter(pk__in=matricules, user__isnull=False).values_list('user_id', flat=True)
+        invalider_utilisateurs(users)
+
+    transaction.on_commit(effacer)
+
+
+def invalider_utilisateurs(user_ids):
+    """Oublie immédiatement le compteur des utilisateurs `user_ids`"""
+    cache.delete_many([CLE.format(user_id) for user_id in user_ids])
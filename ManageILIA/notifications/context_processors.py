@@ -1,24 +1,14 @@
-from ILIA.models import PersonneNotification, Personne
-from django.core.exceptions import ObjectDoesNotExist
+from django.utils.functional import SimpleLazyObject
+
+from . import compteur
 
 
 def unread_notifications_count(request):
     """
-    Context processor pour ajouter le nombre de notifications non lues
+    Context processor pour ajouter le nombre de notifications non lues.
+    Évalué seulement si le gabarit l'affiche (compteur en cache, voir compteur.py).
     """
-    count = 0
-
-    if hasattr(request, 'user') and request.user.is_authenticated:
-        try:
-            personne = Personne.objects.get(user=request.user)
-
-            count = PersonneNotification.objects.filter(
-                Id_Matricule=personne,
-                Lu=False
-            ).count()
-
-        except ObjectDoesNotExist:
-            count = 0
-
-
-    return {'unread_notifications_count': count}
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {'unread_notifications_count': 0}
+    return {'unread_notifications_count': SimpleLazyObject(lambda: compteur.non_lues(user))}
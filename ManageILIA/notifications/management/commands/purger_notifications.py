@@ -0,0 +1,34 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from notifications import retention
+
+
+class Command(BaseCommand):
+    help = ("Supprime (ou archive) les notifications lues anciennes, puis les notifications "
+            "qui n'ont plus de destinataire (à lancer chaque nuit)")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--jours', type=int, default=None,
+            help="Âge au-delà duquel une notification lue est retirée (défaut : NOTIFICATIONS_RETENTION_JOURS, 90)",
+        )
+        parser.add_argument('--archiver', action='store_true',
+                            help="Copie les notifications retirées dans NotificationArchivee")
+        parser.add_argument('--lot', type=int, default=retention.TAILLE_LOT,
+                            help=f"Lignes supprimées par requête (défaut : {retention.TAILLE_LOT})")
+
+    def handle(self, *args, **options):
+        jours = options['jours'] if options['jours'] is not None else retention.retention_jours()
+        avant = timezone.now() - datetime.timedelta(days=jours)
+
+        lues = retention.purger_lues(avant, archiver=options['archiver'], taille=options['lot'])
+        orphelines = retention.supprimer_orphelines(taille=options['lot'])
+
+        action = "archivée(s)" if options['archiver'] else "supprimée(s)"
+        self.stdout.write(self.style.SUCCESS(
+            f"{lues} notification(s) lue(s) de plus de {jours} jour(s) {action}, "
+            f"{orphelines} notification(s) orpheline(s) supprimée(s)."
+        ))
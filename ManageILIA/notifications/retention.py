@@ -0,0 +1,75 @@
+"""
+Purge des notifications : liens lus anciens et notifications orphelines.
+
+Tout se fait par lots ensemblistes : les identifiants d'un lot sont lus (par
+index), puis supprimés dans une transaction courte. La table peut donc être
+purgée pendant que l'application tourne, sans verrou long ni plus d'un lot en
+mémoire (les suppressions passent par les signaux du compteur de non lues).
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from ILIA.models import Notification, NotificationArchivee, PersonneNotification
+
+TAILLE_LOT = 1000
+# Une notification sans destinataire depuis moins longtemps est peut-être en cours d'envoi
+DELAI_ORPHELINES = timedelta(hours=1)
+
+
+def retention_jours():
+    return getattr(settings, 'NOTIFICATIONS_RETENTION_JOURS', 90)
+
+
+def _par_lots(qs, traiter, taille):
+    """Applique `traiter(ids)` aux lignes de `qs`, lot par lot ; retourne le total traité"""
+    total = 0
+    while True:
+        ids = list(qs.values_list('pk', flat=True)[:taille])
+        if not ids:
+            return total
+        with transaction.atomic():
+            total += traiter(ids)
+
+
+def purger_lues(avant, archiver=False, taille=TAILLE_LOT):
+    """Supprime (ou archive puis supprime) les notifications lues reçues avant `avant`"""
+    qs = PersonneNotification.objects.filter(Lu=True, Date_notif__lt=avant)
+
+    def traiter(ids):
+        if archiver:
+            lignes = PersonneNotification.objects.filter(pk__in=ids).values_list(
+                'Id_Matricule_id', 'Id_notif_id', 'Id_notif__Titre', 'Id_notif__Contenu',
+                'Id_notif__Type', 'Id_notif__Cible_type', 'Id_notif__Cible_id', 'Date_notif',
+            )
+            NotificationArchivee.objects.bulk_create([
+                NotificationArchivee(
+                    Id_Matricule=matricule, Id_notif=notif, Titre=titre, Contenu=contenu,
+                    Type=type_notif, Cible_type=cible_type, Cible_id=cible_id, Date_notif=date,
+                )
+                for matricule, notif, titre, contenu, type_notif, cible_type, cible_id, date in lignes
+            ])
+        return PersonneNotification.objects.filter(pk__in=ids).delete()[0]
+
+    return _par_lots(qs, traiter, taille)
+
+
+def orphelines(ids=None, delai=DELAI_ORPHELINES):
+    """Notifications sans destinataire (parmi `ids` si donné)"""
+    qs = Notification.objects.filter(~Exists(PersonneNotification.objects.filter(Id_notif=OuterRef('pk'))))
+    if ids is not None:
+        return qs.filter(pk__in=ids)
+    return qs.filter(Q(Date__lt=timezone.now() - delai) | Q(Date__isnull=True))
+
+
+def supprimer_orphelines(ids=None, taille=TAILLE_LOT):
+    """
+    Supprime les notifications qui n'ont plus de destinataire. Avec `ids`,
+    seules celles-ci sont examinées (après une suppression dans une boîte).
+    """
+    return _par_lots(
+        orphelines(ids), lambda lot: Notification.objects.filter(pk__in=lot).delete()[0], taille,
+    )
@@ -0,0 +1,65 @@
+"""
+Envoi d'une notification à un ensemble de personnes.
+
+Les destinataires sont résolus en une requête et dédoublonnés. Les liens
+PersonneNotification sont ensuite insérés en un seul INSERT, dans la même
+transaction que la Notification. Notifier tout un rôle ne coûte donc plus un
+aller-retour par personne.
+"""
+import logging
+import time
+from typing import NamedTuple, Optional
+
+from django.db import models, transaction
+
+from ILIA.models import Notification, Personne, PersonneNotification
+from . import cibles, compteur
+
+logger = logging.getLogger(__name__)
+
+
+class Envoi(NamedTuple):
+    notification: Optional[Notification]
+    destinataires: int
+    duree_ms: float
+
+
+def resoudre_destinataires(destinataires, exclure=()):
+    """
+    Matricules existants et distincts des destinataires, en une requête.
+    `destinataires` : QuerySet de Personne, ou itérable de Personne / matricules.
+    """
+    if isinstance(destinataires, models.QuerySet):
+        qs = destinataires
+    else:
+        qs = Personne.objects.filter(pk__in={getattr(d, 'pk', d) for d in destinataires})
+    exclure = {getattr(d, 'pk', d) for d in exclure}
+    if exclure:
+        qs = qs.exclude(pk__in=exclure)
+    return sorted(set(qs.values_list('pk', flat=True)))
+
+
+def notifier(destinataires, titre, contenu, type, exclure=(), cible=None):
+    """
+    Crée la notification et la distribue aux destinataires (sauf `exclure`).
+    `cible` est l'objet concerné (Event, Projet ou Fichier).
+    Sans destinataire, aucune notification n'est créée.
+    """
+    debut = time.perf_counter()
+    matricules = resoudre_destinataires(destinataires, exclure)
+    notification = None
+    if matricules:
+        with transaction.atomic():
+            cible_type, cible_id = cibles.reference(cible)
+            notification = Notification.objects.create(
+                Titre=titre, Contenu=contenu, Type=type, Cible_type=cible_type, Cible_id=cible_id,
+            )
+            PersonneNotification.objects.bulk_create(
+                [PersonneNotification(Id_Matricule_id=m, Id_notif=notification) for m in matricules],
+                ignore_conflicts=True,
+            )
+            compteur.invalider(matricules)
+    envoi = Envoi(notification, len(matricules), (time.perf_counter() - debut) * 1000)
+    logger.info("Notification « %s » (%s) envoyée à %d personne(s) en %.1f ms",
+                titre, type, envoi.destinataires, envoi.duree_ms)
+    return envoi
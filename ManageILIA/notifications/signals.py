@@ -0,0 +1,34 @@
+"""
+Invalidation du compteur de notifications non lues lors des enregistrements et
+des suppressions de PersonneNotification, y compris par cascade (suppression
+d'une Notification ou d'une Personne). Les opérations en masse sans signal
+(bulk_create, update) appellent compteur.invalider() elles-mêmes.
+"""
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from ILIA.models import Personne, PersonneNotification
+from . import compteur
+
+
+@receiver(post_save, sender=PersonneNotification)
+def notification_personne_modifiee(sender, instance, raw=False, **kwargs):
+    if not raw:
+        compteur.invalider([instance.Id_Matricule_id])
+
+
+@receiver(post_delete, sender=PersonneNotification)
+def notification_personne_supprimee(sender, instance, **kwargs):
+    # Une notification lue ne compte pas : la purge des lues (retention) n'invalide rien
+    if not instance.Lu:
+        compteur.invalider([instance.Id_Matricule_id])
+
+
+@receiver(pre_delete, sender=Personne)
+def personne_supprimee(sender, instance, **kwargs):
+    # Après la suppression, le lien personne → utilisateur n'existe plus : il est lu maintenant
+    if instance.user_id:
+        transaction.on_commit(partial(compteur.invalider_utilisateurs, [instance.user_id]))
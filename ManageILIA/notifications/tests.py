@@ -1,3 +1,292 @@
-from django.test import TestCase
+import io
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from events.models import Event, Participant
+
+from ILIA.models import Notification, NotificationArchivee, Personne, PersonneNotification
+from . import checks, compteur, retention
+from .context_processors import unread_notifications_count
+from .service import notifier
+
+
+class CompteurNonLuesTest(TestCase):
+    """Le badge des notifications non lues est servi depuis le cache."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('lecteur', password='secret')
+        self.personne = Personne.objects.create(
+            Id_Matricule=200000, Nom="Lecteur", Prenom="Luc", Email="luc@ilia.be", user=self.user,
+        )
+        self.notifs = [
+            Notification.objects.create(Titre=f"Message {i}", Contenu="…", Type="message") for i in range(3)
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            for notif in self.notifs:
+                PersonneNotification.objects.create(Id_Matricule=self.personne, Id_notif=notif)
+        self.client.login(username='lecteur', password='secret')
+
+    def requetes_compteur(self, ctx):
+        return [q for q in ctx.captured_queries if 'COUNT' in q['sql'] and 'ILIA_personnenotification' in q['sql']]
+
+    def test_paresseux(self):
+        request = RequestFactory().get('/')
+        request.user = self.user
+        with CaptureQueriesContext(connection) as ctx:
+            contexte = unread_notifications_count(request)
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.assertEqual(contexte['unread_notifications_count'], 3)
+
+    def test_cache_et_invalidation(self):
+        self.assertEqual(compteur.non_lues(self.user), 3)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('accounts:profil'))
+        self.assertContains(response, '<span class="badge bg-danger rounded-pill ms-2">3</span>', html=True)
+        self.assertEqual(self.requetes_compteur(ctx), [])
+
+        # Lecture : le compteur est recalculé
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(reverse('notification_detail', args=[self.notifs[0].Id_notif]))
+        self.assertEqual(compteur.non_lues(self.user), 2)
+
+        # Suppression
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('notification_delete', args=[self.notifs[1].Id_notif]))
+        self.assertEqual(compteur.non_lues(self.user), 1)
+
+        # Réception
+        notif = Notification.objects.create(Titre="Nouveau", Contenu="…", Type="message")
+        with self.captureOnCommitCallbacks(execute=True):
+            PersonneNotification.objects.create(Id_Matricule=self.personne, Id_notif=notif)
+        self.assertEqual(compteur.non_lues(self.user), 2)
+
+
+    def test_suppressions_par_cascade(self):
+        self.assertEqual(compteur.non_lues(self.user), 3)
+
+        # Notification supprimée (administration) : ses liens partent par cascade
+        with self.captureOnCommitCallbacks(execute=True):
+            self.notifs[0].delete()
+        self.assertEqual(compteur.non_lues(self.user), 2)
+
+        # Personne supprimée : l'utilisateur n'a plus de notification
+        with self.captureOnCommitCallbacks(execute=True):
+            self.personne.delete()
+        self.assertEqual(compteur.non_lues(self.user), 0)
+
+    def test_cache_partage_exige_au_deploiement(self):
+        locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        with override_settings(CACHES=locmem):
+            self.assertEqual([e.id for e in checks.cache_partage(None)], ['notifications.E001'])
+        partage = {'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'cache'}}
+        with override_settings(CACHES=partage):
+            self.assertEqual(checks.cache_partage(None), [])
+
+
+class NotifierTest(TestCase):
+    """Une notification est distribuée en un nombre constant de requêtes."""
+
+    def setUp(self):
+        cache.clear()
+        self.personnes = [
+            Personne.objects.create(Id_Matricule=300000 + i, Nom=f"Dest{i}", Prenom="D", Email=f"d{i}@ilia.be")
+            for i in range(20)
+        ]
+
+    def test_envoi_groupe(self):
+        destinataires = self.personnes + self.personnes[:5] + [p.pk for p in self.personnes[:5]] + [999999]
+        with CaptureQueriesContext(connection) as ctx:
+            envoi = notifier(destinataires, "Réunion", "Salle 2", "ALERTE", exclure=[self.personnes[0]])
+        # Résolution, notification, liens (plus savepoints éventuels) : indépendant du nombre de personnes
+        self.assertLessEqual(len([q for q in ctx.captured_queries if 'SAVEPOINT' not in q['sql']]), 3)
+        self.assertEqual(envoi.destinataires, 19)
+        self.assertGreaterEqual(envoi.duree_ms, 0)
+        self.assertEqual(PersonneNotification.objects.filter(Id_notif=envoi.notification).count(), 19)
+        self.assertFalse(PersonneNotification.objects.filter(Id_Matricule=self.personnes[0]).exists())
+
+        envoi = notifier(Personne.objects.filter(Nom__startswith="Dest1"), "Bis", "…", "ALERTE")
+        self.assertEqual(envoi.destinataires, 11)
+
+    def test_sans_destinataire(self):
+        envoi = notifier([999999], "Personne", "…", "ALERTE")
+        self.assertIsNone(envoi.notification)
+        self.assertFalse(Notification.objects.filter(Titre="Personne").exists())
+
+    def test_compteur_invalide(self):
+        user = User.objects.create_user('dest', password='secret')
+        Personne.objects.filter(pk=self.personnes[1].pk).update(user=user)
+        self.assertEqual(compteur.non_lues(user), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            notifier(self.personnes, "Réunion", "Salle 2", "ALERTE")
+        self.assertEqual(compteur.non_lues(user), 1)
+
+
+class CiblesTest(TestCase):
+    """Les invitations désignent leur événement, résolu sans requête par notification."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('invite', password='secret')
+        self.personne = Personne.objects.create(
+            Id_Matricule=400000, Nom="Invité", Prenom="Ines", Email="ines@ilia.be", user=self.user,
+        )
+        self.client.login(username='invite', password='secret')
+
+    def inviter(self, titre="Réunion"):
+        maintenant = timezone.now()
+        event = Event.objects.create(title=titre, start=maintenant, end=maintenant)
+        Participant.objects.create(event=event, person=self.personne)
+        envoi = notifier([self.personne], f"Invitation à l'événement : {titre}", "…", "ALERTE", cible=event)
+        return event, envoi.notification
+
+    def test_boite_de_reception(self):
+        # Titres identiques : chaque notification garde son propre événement
+        invitations = [self.inviter() for _ in range(2)]
+        self.client.get(reverse('mes_notifications'))
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('mes_notifications'))
+        requetes = len(ctx.captured_queries)
+        items = {item['notif_personne'].Id_notif_id: item for item in response.context['notifications_with_events']}
+        for event, notification in invitations:
+            self.assertEqual(items[notification.pk]['event'], event)
+            self.assertEqual(items[notification.pk]['participant'].event_id, event.id)
+
+        for _ in range(4):
+            self.inviter()
+        cache.clear()
+        self.client.get(reverse('mes_notifications'))
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse('mes_notifications'))
+        self.assertEqual(len(ctx.captured_queries), requetes)
+
+    def test_reponse_invitation(self):
+        self.inviter()
+        event, notification = self.inviter()
+        self.client.post(reverse('respond_event_invitation', args=[notification.pk]), {'action': 'accept'})
+        self.assertEqual(Participant.objects.get(event=event).status, Participant.Status.ACCEPTED)
+        self.assertEqual(Participant.objects.filter(status=Participant.Status.INVITED).count(), 1)
+
+
+class BoiteTest(TestCase):
+    """La boîte de réception est paginée par curseur ; les opérations groupées tiennent en une requête."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('boite', password='secret')
+        self.personne = Personne.objects.create(
+            Id_Matricule=500000, Nom="Boîte", Prenom="Bea", Email="bea@ilia.be", user=self.user,
+        )
+        notifs = Notification.objects.bulk_create([
+            Notification(Titre=f"N{i}", Contenu="…", Type="message") for i in range(70)
+        ])
+        PersonneNotification.objects.bulk_create([
+            PersonneNotification(Id_Matricule=self.personne, Id_notif=n) for n in notifs
+        ])
+        # Dates identiques par paquets de dix : le curseur départage par id
+        for i, pn in enumerate(PersonneNotification.objects.order_by('id')):
+            PersonneNotification.objects.filter(pk=pn.pk).update(
+                Date_notif=timezone.now() - timedelta(days=7 - i // 10),
+            )
+        self.client.login(username='boite', password='secret')
+
+    def test_pagination(self):
+        response = self.client.get(reverse('mes_notifications'))
+        vus = [item['notif_personne'].pk for item in response.context['notifications_with_events']]
+        self.assertEqual(len(vus), 30)
+        suivant = response.context['curseur_suivant']
+        while suivant:
+            data = self.client.get(reverse('mes_notifications_json'), {'apres': suivant}).json()
+            vus += [PersonneNotification.objects.get(Id_notif_id=n['id']).pk for n in data['notifications']]
+            suivant = data['suivant']
+        attendus = list(PersonneNotification.objects.order_by('-Date_notif', '-id').values_list('pk', flat=True))
+        self.assertEqual(vus, attendus)
+
+        response = self.client.get(reverse('mes_notifications_json'), {'apres': 'n/importe'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_liste_generale(self):
+        vus, url = [], '/notifications/'
+        while url:
+            response = self.client.get(url)
+            self.assertTemplateUsed(response, 'notifications/notification_list.html')
+            page = response.context['notifications']
+            for notification in page:
+                self.assertContains(response, reverse('notification_detail', args=[notification.Id_notif]))
+            vus += [n.Id_notif for n in page]
+            suivant = response.context['curseur_suivant']
+            url = None
+            if suivant:
+                self.assertContains(response, f'href="?apres={suivant}"')
+                url = f'/notifications/?apres={suivant}'
+        self.assertEqual(vus, list(Notification.objects.order_by('-Id_notif').values_list('pk', flat=True)))
+
+    def test_tout_marquer_lu(self):
+        self.assertEqual(compteur.non_lues(self.user), 70)
+        with CaptureQueriesContext(connection) as ctx, self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('tout_marquer_lu'))
+        self.assertEqual(len([q for q in ctx.captured_queries if q['sql'].startswith('UPDATE "ILIA_personnenotification"')]), 1)
+        self.assertEqual(compteur.non_lues(self.user), 0)
+
+    def test_supprimer_avant(self):
+        avant = (timezone.now() - timedelta(days=4)).date()
+        with CaptureQueriesContext(connection) as ctx, self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('supprimer_avant'), {'avant': avant.isoformat()})
+        suppressions = [q for q in ctx.captured_queries if q['sql'].startswith('DELETE')]
+        self.assertEqual(len(suppressions), 1)
+        self.assertEqual(PersonneNotification.objects.count(), 40)
+        self.assertEqual(compteur.non_lues(self.user), 40)
+
+
+class RetentionTest(TestCase):
+    """La purge retire les notifications lues anciennes et les orphelines, par lots."""
+
+    def setUp(self):
+        self.personne = Personne.objects.create(Id_Matricule=600000, Nom="Ancien", Prenom="A", Email="a@ilia.be")
+        vieux = timezone.now() - timedelta(days=200)
+        self.lues = []
+        for i in range(5):
+            notif = Notification.objects.create(Titre=f"Vieille {i}", Contenu="…", Type="message")
+            self.lues.append(PersonneNotification.objects.create(Id_Matricule=self.personne, Id_notif=notif, Lu=True))
+        PersonneNotification.objects.update(Date_notif=vieux)
+        Notification.objects.update(Date=vieux)
+        # Non lue ancienne, lue récente : conservées
+        notif = Notification.objects.create(Titre="Non lue", Contenu="…", Type="message")
+        PersonneNotification.objects.create(Id_Matricule=self.personne, Id_notif=notif)
+        PersonneNotification.objects.filter(Id_notif=notif).update(Date_notif=vieux)
+        notif = Notification.objects.create(Titre="Récente", Contenu="…", Type="message")
+        PersonneNotification.objects.create(Id_Matricule=self.personne, Id_notif=notif, Lu=True)
+        # Orpheline en cours d'envoi (récente) : conservée
+        Notification.objects.create(Titre="En cours", Contenu="…", Type="message")
+
+    def test_purge_archivee(self):
+        with CaptureQueriesContext(connection) as ctx:
+            retention.purger_lues(timezone.now() - timedelta(days=90), archiver=True, taille=2)
+        suppressions = [q for q in ctx.captured_queries if q['sql'].startswith('DELETE')]
+        self.assertEqual(len(suppressions), 3)  # Lots de 2, 2 et 1
+        sortie = io.StringIO()
+        call_command('purger_notifications', stdout=sortie)
+        self.assertIn("5 notification(s) orpheline(s)", sortie.getvalue())
+
+        self.assertEqual(
+            sorted(PersonneNotification.objects.values_list('Id_notif__Titre', flat=True)), ["Non lue", "Récente"],
+        )
+        self.assertEqual(
+            sorted(Notification.objects.values_list('Titre', flat=True)), ["En cours", "Non lue", "Récente"],
+        )
+        archive = NotificationArchivee.objects.get(Titre="Vieille 0")
+        self.assertEqual(archive.Id_Matricule, self.personne.pk)
+        self.assertEqual(NotificationArchivee.objects.count(), 5)
+
+    def test_purge_simple(self):
+        call_command('purger_notifications', '--jours', '0', stdout=io.StringIO())
+        self.assertEqual(list(PersonneNotification.objects.values_list('Id_notif__Titre', flat=True)), ["Non lue"])
+        self.assertFalse(NotificationArchivee.objects.exists())
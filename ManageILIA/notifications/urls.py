@@ -4,6 +4,9 @@ from . import views
 urlpatterns = [
     path('', views.notification_list, name='mes_notifications'),
     path('mes-notifications/', views.mes_notifications, name='mes_notifications'),
+    path('mes-notifications/json/', views.mes_notifications_json, name='mes_notifications_json'),
+    path('mes-notifications/tout-lu/', views.tout_marquer_lu, name='tout_marquer_lu'),
+    path('mes-notifications/supprimer-avant/', views.supprimer_avant, name='supprimer_avant'),
     path('<int:notif_id>/', views.notification_detail, name='notification_detail'),
     path('creer/', views.notification_create, name='notification_create'),
     path('<int:notif_id>/repondre/', views.respond_event_invitation, name='respond_event_invitation'),
@@ -1,21 +1,66 @@
+from datetime import datetime, time
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.http import JsonResponse
+from django.urls import reverse
 from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import require_POST
+from ILIA.binaires import differer_binaires
 from ILIA.models import Notification, PersonneNotification, Personne
 from .forms import NotificationForm, AjouterPersonneForm
+from . import boite, cibles, compteur, retention
+from .service import notifier
 from events.models import Event, Participant
-import re
 
 
 @login_required
 def notification_list(request):
-    """Affiche la liste de toutes les notifications"""
-    notifications = Notification.objects.all().order_by('-Date')
+    """Affiche la liste de toutes les notifications, par pages (curseur : dernier Id_notif affiché)"""
+    notifications = Notification.objects.order_by('-Id_notif')
+    apres = request.GET.get('apres', '')
+    if apres.isdigit():
+        notifications = notifications.filter(Id_notif__lt=int(apres))
+    notifications = list(notifications[:boite.PAR_PAGE + 1])
+    suivant = None
+    if len(notifications) > boite.PAR_PAGE:
+        notifications = notifications[:boite.PAR_PAGE]
+        suivant = notifications[-1].Id_notif
     context = {
-        'notifications': notifications
+        'notifications': notifications,
+        'curseur_suivant': suivant,
+    }
+    return render(request, 'notifications/notification_list.html', context)
+
+
+def _boite(personne):
+    return PersonneNotification.objects.filter(Id_Matricule=personne).select_related('Id_notif')
+
+
+def _avec_evenements(personne, notifications_personne):
+    """Associe à chaque notification son événement et la participation de la personne"""
+    # Cibles chargées en une requête par type, puis les participations aux événements
+    cibles.resoudre([np.Id_notif for np in notifications_personne])
+    evenements = {
+        np.Id_notif.Cible_id for np in notifications_personne
+        if np.Id_notif.Cible_type == Notification.TypeCible.EVENEMENT and np.Id_notif.cible
     }
-    return render(request, 'notifications/mes_notifications.html', context)
+    participations = {
+        p.event_id: p for p in Participant.objects.filter(person=personne, event_id__in=evenements)
+    } if evenements else {}
+
+    notifications_with_events = []
+    for notif_pers in notifications_personne:
+        notification = notif_pers.Id_notif
+        event = notification.cible if notification.Cible_type == Notification.TypeCible.EVENEMENT else None
+        notifications_with_events.append({
+            'notif_personne': notif_pers,
+            'event': event,
+            'participant': participations.get(event.id) if event else None,
+        })
+    return notifications_with_events
 
 
 @login_required
@@ -32,40 +77,19 @@ def mes_notifications(request):
                     Id_Matricule=personne,
                     Id_notif__Id_notif__in=notif_ids
                 ).delete()
-                for n_id in notif_ids:
-                    # On vérifie s'il reste des liens pour cette ID de notif
-                    if not PersonneNotification.objects.filter(Id_notif_id=n_id).exists():
-                        # Si vide, on essaie de supprimer la notification parente
-                        try:
-                            Notification.objects.filter(Id_notif=n_id).delete()
-                        except Notification.DoesNotExist:
-                            pass  # Déjà supprimée
+                compteur.invalider([personne.pk])
+                # Notifications parentes qui n'ont plus aucun destinataire
+                retention.supprimer_orphelines(notif_ids)
                 return redirect('mes_notifications')
         
-        notifications_personne = PersonneNotification.objects.filter(
-            Id_Matricule=personne
-        ).select_related('Id_notif').order_by('-Date_notif')
-        
-        # Pour chaque notification, vérifier si c'est un événement et récupérer le participant
-        notifications_with_events = []
-        for notif_pers in notifications_personne:
-            event = None
-            participant = None
-            
-            if "Invitation à l'événement" in notif_pers.Id_notif.Titre:
-                event_title = notif_pers.Id_notif.Titre.replace("Invitation à l'événement : ", "")
-                event = Event.objects.filter(title=event_title).first()
-                if event:
-                    participant = Participant.objects.filter(event=event, person=personne).first()
-            
-            notifications_with_events.append({
-                'notif_personne': notif_pers,
-                'event': event,
-                'participant': participant
-            })
-        
+        try:
+            notifications_personne, suivant = boite.page(_boite(personne), request.GET.get('apres'))
+        except boite.CurseurInvalide:
+            return redirect('mes_notifications')
+
         context = {
-            'notifications_with_events': notifications_with_events
+            'notifications_with_events': _avec_evenements(personne, notifications_personne),
+            'curseur_suivant': suivant,
         }
         return render(request, 'notifications/mes_notifications.html', context)
     except Personne.DoesNotExist:
@@ -73,6 +97,56 @@ def mes_notifications(request):
         return redirect('home')
 
 
+@login_required
+def mes_notifications_json(request):
+    """Page suivante de la boîte de réception (défilement infini)"""
+    personne = get_object_or_404(Personne, user=request.user)
+    try:
+        notifications_personne, suivant = boite.page(_boite(personne), request.GET.get('apres'))
+    except boite.CurseurInvalide:
+        return JsonResponse({'error': 'Curseur invalide'}, status=400)
+
+    elements = []
+    for item in _avec_evenements(personne, notifications_personne):
+        notif_pers, notification = item['notif_personne'], item['notif_personne'].Id_notif
+        elements.append({
+            'id': notification.Id_notif,
+            'titre': notification.Titre,
+            'type': notification.Type,
+            'date': timezone.localtime(notif_pers.Date_notif).strftime('%d/%m/%Y %H:%M'),
+            'lu': notif_pers.Lu,
+            'url': reverse('notification_detail', args=[notification.Id_notif]),
+            'evenement': item['event'].id if item['event'] else None,
+            'statut': item['participant'].status if item['participant'] else None,
+        })
+    return JsonResponse({'notifications': elements, 'suivant': suivant})
+
+
+@login_required
+@require_POST
+def tout_marquer_lu(request):
+    """Marque toute la boîte comme lue, en une requête"""
+    personne = get_object_or_404(Personne, user=request.user)
+    nombre = boite.marquer_tout_lu(personne)
+    messages.success(request, f"{nombre} notification(s) marquée(s) comme lue(s).")
+    return redirect('mes_notifications')
+
+
+@login_required
+@require_POST
+def supprimer_avant(request):
+    """Retire de la boîte toutes les notifications reçues avant la date choisie, en une requête"""
+    personne = get_object_or_404(Personne, user=request.user)
+    date = parse_date(request.POST.get('avant', ''))
+    if date is None:
+        messages.error(request, "Date invalide.")
+        return redirect('mes_notifications')
+    limite = timezone.make_aware(datetime.combine(date, time.min))
+    nombre = boite.supprimer_avant(personne, limite)
+    messages.success(request, f"{nombre} notification(s) supprimée(s).")
+    return redirect('mes_notifications')
+
+
 @login_required
 def notification_detail(request, notif_id):
     """Affiche les détails d'une notification"""
@@ -94,30 +168,16 @@ def notification_detail(request, notif_id):
     except Personne.DoesNotExist:
         pass
     # Récupérer tous les destinataires de cette notification
-    destinataires = PersonneNotification.objects.filter(
+    destinataires = differer_binaires(PersonneNotification.objects.filter(
         Id_notif=notification
-    ).select_related('Id_Matricule')
+    ).select_related('Id_Matricule'))
     
-    # Vérifier si c'est une notification d'événement et extraire l'ID de l'événement
-    event = None
+    # Invitation : l'événement visé et la participation de l'utilisateur
+    event = cibles.evenement(notification)
     participant = None
-    
-    try:
-        personne = Personne.objects.get(user=request.user)
-        
-        import re
-        match = re.search(r"ID de l'événement\s*:\s*(\d+)", notification.Contenu)
-        if match:
-            event_id = int(match.group(1))
-            event = Event.objects.filter(id=event_id).first()
-            if event:
-                participant = Participant.objects.filter(event=event, person=personne).first()
-                print(f"DEBUG notification_detail: Event trouvé {event.title}, Participant status: {participant.status if participant else 'None'}")
-    except Personne.DoesNotExist:
-        pass
-    except Exception as e:
-        print(f"DEBUG notification_detail: Erreur {e}")
-    
+    if event:
+        participant = Participant.objects.filter(event=event, person__user=request.user).first()
+
     context = {
         'notification': notification,
         'destinataires': destinataires,
@@ -218,27 +278,23 @@ def notification_create(request):
                 if not recipients_temp:
                     messages.error(request, "Vous devez ajouter au moins un destinataire.")
                 else:
-                    notification = form.save()
-
-                    # Création des liens PersonneNotification
-                    count_total = 0
-                    for recipient_data in recipients_temp:
-                        try:
-                            p = Personne.objects.get(Id_Matricule=recipient_data['id'])
-                            PersonneNotification.objects.create(
-                                Id_Matricule=p,
-                                Id_notif=notification
-                            )
-                            count_total += 1
-                        except Personne.DoesNotExist:
-                            pass
-
-                    messages.success(request, f"Notification envoyée à {count_total} personne(s).")
+                    envoi = notifier(
+                        [r['id'] for r in recipients_temp],
+                        titre=form.cleaned_data['Titre'],
+                        contenu=form.cleaned_data['Contenu'],
+                        type=form.cleaned_data['Type'],
+                    )
+                    notification = envoi.notification
 
                     # Nettoyage de la session
                     if 'recipients_temp' in request.session:
                         del request.session['recipients_temp']
 
+                    if notification is None:
+                        messages.error(request, "Aucun des destinataires n'existe plus.")
+                        return redirect('notification_create')
+
+                    messages.success(request, f"Notification envoyée à {envoi.destinataires} personne(s).")
                     return redirect('notification_detail', notif_id=notification.Id_notif)
             else:
                 messages.error(request, "Veuillez corriger les erreurs dans le formulaire.")
@@ -267,15 +323,7 @@ def respond_event_invitation(request, notif_id):
     try:
         personne = Personne.objects.get(user=request.user)
         
-        # Chercher l'ID de l'événement dans le contenu
-        match = re.search(r"ID de l'événement\s*:\s*(\d+)", notification.Contenu)
-        if not match:
-            messages.error(request, "ID de l'événement introuvable dans la notification.")
-            return redirect('mes_notifications')
-        
-        event_id = int(match.group(1))
-        event = Event.objects.filter(id=event_id).first()
-        
+        event = cibles.evenement(notification)
         if not event:
             messages.error(request, "Événement introuvable.")
             return redirect('mes_notifications')
@@ -290,7 +338,7 @@ def respond_event_invitation(request, notif_id):
         
         if action == 'accept':
             participant.status = Participant.Status.ACCEPTED
-            participant.save(update_fields=['status'])
+            participant.save(update_fields=['status', 'updated_at'])
             participant.refresh_from_db()
             print(f"DEBUG respond: Participant status après save et refresh: {participant.status}")
 
@@ -301,11 +349,13 @@ def respond_event_invitation(request, notif_id):
             
         elif action == 'decline':
             participant.status = Participant.Status.DECLINED
-            participant.save(update_fields=['status'])
+            participant.save(update_fields=['status', 'updated_at'])
             participant.refresh_from_db()
             
             # Supprimer également la notification après refus
             PersonneNotification.objects.filter(Id_notif=notification, Id_Matricule=personne).delete()
+
+        compteur.invalider([personne.pk])
         
     except Personne.DoesNotExist:
         messages.error(request, "Profil utilisateur non trouvé.")
@@ -335,11 +385,10 @@ def notification_delete(request, notif_id):
             ).delete()
 
             if deleted_count > 0:
-
+                compteur.invalider([personne.pk])
 
                 # Nettoyage des orphelins (si plus personne n'a la notif)
-                if not PersonneNotification.objects.filter(Id_notif=notification).exists():
-                    notification.delete()
+                retention.supprimer_orphelines([notification.pk])
             else:
                 messages.warning(request, "Cette notification n'était déjà plus dans votre liste.")
 
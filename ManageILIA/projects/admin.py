@@ -1,4 +1,5 @@
 from django.contrib import admin
+from ILIA.admin import SansBinairesAdminMixin
 from .models import Projet, Fichier
 
 
@@ -13,7 +14,7 @@ class ProjetAdmin(admin.ModelAdmin):
 
 # ========== FICHIER ==========
 @admin.register(Fichier)
-class FichierAdmin(admin.ModelAdmin):
+class FichierAdmin(SansBinairesAdminMixin, admin.ModelAdmin):
     list_display = (
         'Id_fichier', 'Nom', 'Description', 'Date_publication',
         'Id_Matricule', 'Id_projet'
@@ -0,0 +1,182 @@
+"""
+Envoi des fichiers de projet par blocs, avec reprise.
+
+Protocole :
+  1. init      : le client annonce nom, taille et (optionnel) SHA-256 ;
+  2. PUT bloc N: corps brut du bloc, écrit à sa place dans un fichier temporaire ;
+  3. finaliser : taille et empreinte vérifiées, le contenu rejoint le stockage.
+
+Les blocs sont acceptés dans l'ordre : après une coupure, le client demande
+l'état du dépôt et reprend à `prochain_bloc`. Un bloc déjà reçu peut être
+renvoyé sans effet. Aucun bloc n'est jamais entièrement chargé en mémoire, et
+aucun verrou n'est tenu pendant sa lecture sur le réseau.
+"""
+import datetime
+import hashlib
+import os
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import DepotFichier, Fichier
+from .stockage import TAILLE_BLOC, get_stockage
+
+
+class DepotInvalide(Exception):
+    """Bloc, taille ou empreinte refusés ; le message est destiné au client"""
+
+
+def taille_bloc_depot():
+    return getattr(settings, 'PROJETS_DEPOT_TAILLE_BLOC', 8 * 1024 * 1024)
+
+
+def racine_depots():
+    return Path(getattr(
+        settings, 'PROJETS_DEPOTS_RACINE', Path(settings.MEDIA_ROOT) / 'projets' / '.depots'
+    ))
+
+
+def chemin_temporaire(depot):
+    return racine_depots() / str(depot.Id_depot)
+
+
+def delai_bloc():
+    """Durée au-delà de laquelle la réservation d'un bloc dont l'envoi n'a pas abouti est reprise"""
+    return datetime.timedelta(seconds=getattr(settings, 'PROJETS_DEPOT_DELAI_BLOC', 15 * 60))
+
+
+def _reserve(depot):
+    return depot.Jeton_bloc is not None and depot.Date_jeton >= timezone.now() - delai_bloc()
+
+
+def etat(depot):
+    return {
+        'id': str(depot.Id_depot),
+        'taille': depot.Taille,
+        'taille_bloc': depot.Taille_bloc,
+        'nombre_blocs': depot.nombre_blocs,
+        'prochain_bloc': depot.Blocs_recus,
+        'complet': depot.complet,
+    }
+
+
+def ecrire_bloc(depot_id, numero, flux, longueur, empreinte_bloc=''):
+    """
+    Écrit le bloc `numero` lu depuis `flux` ; retourne le dépôt à jour.
+
+    Le bloc est d'abord réservé sous un verrou bref (jeton), puis lu du réseau
+    hors transaction ; le compteur n'avance que si le dépôt attend toujours ce
+    bloc avec ce jeton. Deux envois du même bloc ne s'entrelacent donc pas, et
+    une réservation abandonnée (processus tué) est reprise après delai_bloc().
+    """
+    jeton = uuid.uuid4()
+    with transaction.atomic():
+        depot = DepotFichier.objects.select_for_update().get(pk=depot_id)
+        if depot.En_finalisation:
+            raise DepotInvalide("Le dépôt est en cours de finalisation.")
+        if numero < depot.Blocs_recus:
+            return depot  # Bloc déjà reçu (renvoi après coupure)
+        if numero > depot.Blocs_recus:
+            raise DepotInvalide(f"Bloc {numero} reçu, bloc {depot.Blocs_recus} attendu.")
+        if numero >= depot.nombre_blocs:
+            raise DepotInvalide("Tous les blocs ont déjà été reçus.")
+
+        debut = numero * depot.Taille_bloc
+        attendu = min(depot.Taille_bloc, depot.Taille - debut)
+        if longueur != attendu:
+            raise DepotInvalide(f"Le bloc {numero} doit faire {attendu} octets ({longueur} reçus).")
+        if _reserve(depot):
+            raise DepotInvalide(f"Le bloc {numero} est déjà en cours d'envoi.")
+
+        depot.Jeton_bloc, depot.Date_jeton = jeton, timezone.now()
+        depot.save(update_fields=['Jeton_bloc', 'Date_jeton'])
+
+    reservation = DepotFichier.objects.filter(pk=depot.pk, Jeton_bloc=jeton)
+    try:
+        chemin = chemin_temporaire(depot)
+        chemin.parent.mkdir(parents=True, exist_ok=True)
+        sha = hashlib.sha256()
+        # Seule la plage du bloc est écrite : les autres blocs déjà reçus restent intacts
+        with open(chemin, 'r+b' if chemin.exists() else 'wb') as sortie:
+            sortie.seek(debut)
+            restant = longueur
+            while restant > 0:
+                morceau = flux.read(min(TAILLE_BLOC, restant))
+                if not morceau:
+                    break
+                sha.update(morceau)
+                sortie.write(morceau)
+                restant -= len(morceau)
+        if restant:
+            raise DepotInvalide(f"Bloc {numero} incomplet.")
+        if empreinte_bloc and sha.hexdigest() != empreinte_bloc.lower():
+            raise DepotInvalide(f"Empreinte du bloc {numero} invalide.")
+    except BaseException:
+        reservation.update(Jeton_bloc=None, Date_jeton=None)
+        raise
+
+    if not reservation.filter(Blocs_recus=numero).update(Blocs_recus=numero + 1, Jeton_bloc=None, Date_jeton=None):
+        raise DepotInvalide(f"Le bloc {numero} a été repris par un autre envoi.")
+    depot.Blocs_recus, depot.Jeton_bloc, depot.Date_jeton = numero + 1, None, None
+    return depot
+
+
+def finaliser(depot, empreinte=''):
+    """
+    Vérifie le dépôt complet, le verse au stockage et crée le Fichier.
+    Le dépôt est d'abord marqué en finalisation : un second appel simultané,
+    ou un bloc encore en cours d'envoi, est refusé.
+    """
+    libre = Q(Jeton_bloc__isnull=True) | Q(Date_jeton__lt=timezone.now() - delai_bloc())
+    if not DepotFichier.objects.filter(libre, pk=depot.pk, En_finalisation=False).update(En_finalisation=True):
+        raise DepotInvalide("Le dépôt est déjà en cours de finalisation, ou un bloc est en cours d'envoi.")
+    depot.refresh_from_db()
+    try:
+        return _verser(depot, empreinte)
+    except BaseException:
+        # Dépôt toujours là (incomplet, erreur d'E/S…) : il peut être repris
+        DepotFichier.objects.filter(pk=depot.pk).update(En_finalisation=False)
+        raise
+
+
+def _verser(depot, empreinte):
+    if not depot.complet:
+        raise DepotInvalide(f"Dépôt incomplet : bloc {depot.Blocs_recus} attendu.")
+    empreinte = (empreinte or depot.Empreinte_attendue).lower()
+
+    chemin = chemin_temporaire(depot)
+    if not chemin.exists() or os.path.getsize(chemin) != depot.Taille:
+        abandonner(depot)
+        raise DepotInvalide("La taille du fichier reçu ne correspond pas à la taille annoncée.")
+
+    obtenue, taille = get_stockage().importer(chemin)
+    if empreinte and obtenue != empreinte:
+        # Le contenu reçu n'est pas effacé ici : purger_contenus s'en charge
+        depot.delete()
+        raise DepotInvalide("L'empreinte SHA-256 du fichier reçu ne correspond pas.")
+
+    with transaction.atomic():
+        fichier = Fichier.objects.create(
+            Nom=depot.Nom,
+            Description=depot.Description,
+            Empreinte=obtenue,
+            Taille=taille,
+            fichier_type=depot.fichier_type,
+            Id_Matricule_id=depot.Id_Matricule_id,
+            Id_projet_id=depot.Id_projet_id,
+        )
+        depot.delete()
+    return fichier
+
+
+def abandonner(depot):
+    """Supprime le dépôt et ses blocs déjà reçus"""
+    try:
+        os.unlink(chemin_temporaire(depot))
+    except FileNotFoundError:
+        pass
+    depot.delete()
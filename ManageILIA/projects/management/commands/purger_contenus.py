@@ -0,0 +1,31 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from projects.models import Fichier
+from projects.stockage import get_stockage
+
+
+class Command(BaseCommand):
+    help = "Supprime du stockage les contenus qu'aucun fichier de projet ne référence plus (à lancer chaque nuit)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--heures', type=int, default=24,
+            help="Délai de grâce depuis le dernier enregistrement d'un contenu (défaut : 24)",
+        )
+
+    def handle(self, *args, **options):
+        limite = timezone.now() - datetime.timedelta(hours=options['heures'])
+        stockage = get_stockage()
+
+        # Un contenu réutilisé après cette lecture a une date récente : purger() le garde
+        references = set(Fichier.objects.values_list('Empreinte', flat=True).distinct())
+        supprimes = sum(
+            stockage.purger(empreinte, limite)
+            for empreinte in stockage.contenus()
+            if empreinte not in references
+        )
+
+        self.stdout.write(self.style.SUCCESS(f"{supprimes} contenu(s) non référencé(s) supprimé(s)."))
@@ -0,0 +1,44 @@
+import datetime
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from projects import depots
+from projects.models import DepotFichier
+
+
+class Command(BaseCommand):
+    help = "Supprime les envois par blocs abandonnés et leurs fichiers temporaires (à lancer chaque nuit)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--heures', type=int, default=48,
+            help="Âge au-delà duquel un envoi non finalisé est abandonné (défaut : 48)",
+        )
+
+    def handle(self, *args, **options):
+        limite = timezone.now() - datetime.timedelta(hours=options['heures'])
+
+        abandonnes = 0
+        for depot in DepotFichier.objects.filter(Date_creation__lt=limite):
+            depots.abandonner(depot)
+            abandonnes += 1
+
+        # Fichiers temporaires dont le dépôt a disparu (projet supprimé, etc.)
+        orphelins = 0
+        racine = depots.racine_depots()
+        if racine.is_dir():
+            connus = {str(pk) for pk in DepotFichier.objects.values_list('pk', flat=True)}
+            for chemin in racine.iterdir():
+                try:
+                    uuid.UUID(chemin.name)
+                except ValueError:
+                    continue
+                if chemin.name not in connus and chemin.stat().st_mtime < limite.timestamp():
+                    chemin.unlink()
+                    orphelins += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{abandonnes} envoi(s) abandonné(s) et {orphelins} fichier(s) temporaire(s) orphelin(s) supprimé(s)."
+        ))
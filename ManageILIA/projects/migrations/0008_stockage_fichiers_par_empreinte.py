@@ -0,0 +1,56 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:38
+
+import io
+
+from django.db import migrations, models
+
+
+def sortir_blobs(apps, schema_editor):
+    """Déplace chaque BLOB vers le stockage par empreinte, un fichier à la fois"""
+    from projects.stockage import get_stockage
+
+    Fichier = apps.get_model('projects', 'Fichier')
+    stockage = get_stockage()
+    ids = list(Fichier.objects.filter(fichier_contenu__isnull=False).values_list('pk', flat=True))
+    for pk in ids:
+        contenu = Fichier.objects.filter(pk=pk).values_list('fichier_contenu', flat=True).first()
+        if not contenu:
+            continue
+        empreinte, taille = stockage.enregistrer(io.BytesIO(bytes(contenu)))
+        Fichier.objects.filter(pk=pk).update(Empreinte=empreinte, Taille=taille, fichier_contenu=None)
+
+
+def rentrer_blobs(apps, schema_editor):
+    from projects.stockage import get_stockage
+
+    Fichier = apps.get_model('projects', 'Fichier')
+    stockage = get_stockage()
+    for pk, empreinte in Fichier.objects.exclude(Empreinte='').values_list('pk', 'Empreinte'):
+        if stockage.existe(empreinte):
+            with stockage.ouvrir(empreinte) as f:
+                Fichier.objects.filter(pk=pk).update(fichier_contenu=f.read())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0007_projet_image_projet'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fichier',
+            name='Empreinte',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='fichier',
+            name='Taille',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.RunPython(sortir_blobs, rentrer_blobs),
+        migrations.RemoveField(
+            model_name='fichier',
+            name='fichier_contenu',
+        ),
+    ]
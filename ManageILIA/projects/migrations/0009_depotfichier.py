@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:41
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ILIA', '0007_indexes_plages_horaires'),
+        ('projects', '0008_stockage_fichiers_par_empreinte'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DepotFichier',
+            fields=[
+                ('Id_depot', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('Nom', models.CharField(max_length=255)),
+                ('Description', models.CharField(blank=True, max_length=500)),
+                ('fichier_type', models.CharField(default='application/octet-stream', max_length=100)),
+                ('Taille', models.PositiveBigIntegerField()),
+                ('Taille_bloc', models.PositiveIntegerField()),
+                ('Empreinte_attendue', models.CharField(blank=True, max_length=64)),
+                ('Blocs_recus', models.PositiveIntegerField(default=0)),
+                ('Date_creation', models.DateTimeField(auto_now_add=True)),
+                ('Id_Matricule', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='ILIA.personne')),
+                ('Id_projet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='projects.projet')),
+            ],
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:47
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def calculer_empreintes(apps, schema_editor):
+    """Empreinte des images existantes, une ligne à la fois"""
+    Projet = apps.get_model('projects', 'Projet')
+    ids = list(Projet.objects.filter(Image_projet__isnull=False).values_list('pk', flat=True))
+    for pk in ids:
+        data = Projet.objects.filter(pk=pk).values_list('Image_projet', flat=True).first()
+        if data:
+            Projet.objects.filter(pk=pk).update(Image_empreinte=hashlib.sha256(bytes(data)).hexdigest())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0009_depotfichier'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='projet',
+            options={'base_manager_name': 'objects'},
+        ),
+        migrations.AddField(
+            model_name='projet',
+            name='Image_empreinte',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.RunPython(calculer_empreintes, migrations.RunPython.noop),
+    ]
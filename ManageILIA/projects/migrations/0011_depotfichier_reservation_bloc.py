@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0010_projet_image_empreinte'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='depotfichier',
+            name='Date_jeton',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='depotfichier',
+            name='En_finalisation',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='depotfichier',
+            name='Jeton_bloc',
+            field=models.UUIDField(blank=True, null=True),
+        ),
+    ]
@@ -1,4 +1,10 @@
+import uuid
+
 from django.db import models
+from django.urls import reverse
+
+from ILIA.binaires import SansBinairesManager
+from ILIA.models import ImageRendition, TacheImage
 
 
 class Projet(models.Model):
@@ -12,14 +18,42 @@ class Projet(models.Model):
     Description = models.TextField(blank=True, null=True)
     Type = models.IntegerField(choices=TypeProjet.choices, default= TypeProjet.ENSEIGNEMENT)
     Image_projet = models.BinaryField(null=True, blank=True)
+    Image_empreinte = models.CharField(max_length=64, blank=True, editable=False)  # SHA-256 de Image_projet, utilisé dans l'URL
     createur = models.ForeignKey('ILIA.Personne', on_delete=models.SET_NULL, null=True, blank=True, related_name='projets_crees')
 
+    # L'image n'est lue qu'à la demande : Projet.objects.avec_binaires()
+    objects = SansBinairesManager()
+
+    class Meta:
+        base_manager_name = 'objects'
+
+    @property
+    def image_url(self):
+        """URL de l'image de couverture, stable tant que l'image ne change pas ('' sans image)"""
+        if not self.Image_empreinte:
+            return ''
+        return reverse('projects:image', args=[self.Id_projet, self.Image_empreinte])
+
+    def image_url_taille(self, taille):
+        """URL de la déclinaison de l'image adaptée à un affichage de `taille` pixels"""
+        if not self.Image_empreinte:
+            return ''
+        return reverse('projects:image_taille', args=[self.Id_projet, self.Image_empreinte, taille])
+
+    @property
+    def image_en_traitement(self):
+        """L'image attend sa normalisation et ses déclinaisons"""
+        return TacheImage.objects.filter(
+            Source=ImageRendition.TypeSource.PROJET, Id_source=self.pk,
+        ).exclude(Etat=TacheImage.TypeEtat.ECHEC).exists()
+
     @property
     def couleur_defaut(self):
         """Retourne la classe CSS de la couleur par défaut basée sur l'ID"""
         index = self.Id_projet % 4
         return f"bg-defaut-{index}"
 
+
 class PersonneProjet(models.Model):
     Id_Matricule = models.ForeignKey('ILIA.Personne', on_delete=models.CASCADE)
     Id_projet = models.ForeignKey(Projet, on_delete=models.CASCADE)
@@ -33,11 +67,44 @@ class Fichier(models.Model):
     Nom = models.CharField(max_length=255)
     Description = models.CharField(max_length=500, blank=True)
     Date_publication = models.DateTimeField(auto_now_add=True)
-    fichier_contenu = models.BinaryField(null=True, blank=True)  # Stockage BLOB en base de données
+    Empreinte = models.CharField(max_length=64, blank=True, db_index=True)  # SHA-256 du contenu (voir projects.stockage)
+    Taille = models.PositiveBigIntegerField(default=0)  # En octets
     fichier_type = models.CharField(max_length=100, default='application/octet-stream')  # MIME type
     Id_Matricule = models.ForeignKey('ILIA.Personne', on_delete=models.CASCADE)
     Id_projet = models.ForeignKey('projects.Projet', on_delete=models.CASCADE)
 
+    def ouvrir(self):
+        """Contenu du fichier, ouvert en lecture depuis le stockage"""
+        from .stockage import get_stockage
+        return get_stockage().ouvrir(self.Empreinte)
+
+
+class DepotFichier(models.Model):
+    """Envoi d'un fichier par blocs en cours (voir projects.depots)"""
+    Id_depot = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    Nom = models.CharField(max_length=255)
+    Description = models.CharField(max_length=500, blank=True)
+    fichier_type = models.CharField(max_length=100, default='application/octet-stream')
+    Taille = models.PositiveBigIntegerField()  # Taille annoncée, en octets
+    Taille_bloc = models.PositiveIntegerField()
+    Empreinte_attendue = models.CharField(max_length=64, blank=True)  # SHA-256 annoncé par le client (optionnel)
+    Blocs_recus = models.PositiveIntegerField(default=0)  # Les blocs sont acceptés dans l'ordre
+    Jeton_bloc = models.UUIDField(null=True, blank=True)  # Envoi du bloc `Blocs_recus` en cours
+    Date_jeton = models.DateTimeField(null=True, blank=True)
+    En_finalisation = models.BooleanField(default=False)
+    Date_creation = models.DateTimeField(auto_now_add=True)
+    Id_Matricule = models.ForeignKey('ILIA.Personne', on_delete=models.CASCADE)
+    Id_projet = models.ForeignKey('projects.Projet', on_delete=models.CASCADE)
+
+    @property
+    def nombre_blocs(self):
+        return max(1, -(-self.Taille // self.Taille_bloc))
+
+    @property
+    def complet(self):
+        return self.Blocs_recus >= self.nombre_blocs
+
+
 class PersonneFichier(models.Model):
     Id_Matricule = models.ForeignKey('ILIA.Personne', on_delete=models.CASCADE)
     Id_fichier = models.ForeignKey(Fichier, on_delete=models.CASCADE)
@@ -0,0 +1,34 @@
+"""
+Maintien de l'empreinte de l'image de couverture des projets (adresse de
+l'image en cache) et mise en file de son traitement (ILIA.taches).
+
+Le contenu d'un fichier supprimé reste dans le stockage : la commande
+purger_contenus l'efface une fois qu'aucun Fichier ne le référence plus.
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from ILIA.binaires import rafraichir_empreinte
+from ILIA.models import ImageRendition
+from ILIA.taches import annuler, mettre_en_file
+from .models import Projet
+
+
+@receiver(pre_save, sender=Projet)
+def image_enregistree(sender, instance, raw=False, **kwargs):
+    instance._image_modifiee = rafraichir_empreinte(instance, 'Image_projet', 'Image_empreinte') and not raw
+
+
+@receiver(post_save, sender=Projet)
+def image_declinee(sender, instance, **kwargs):
+    if getattr(instance, '_image_modifiee', False):
+        if instance.Image_empreinte:
+            mettre_en_file(ImageRendition.TypeSource.PROJET, instance.pk, instance.Image_empreinte)
+        else:
+            annuler(ImageRendition.TypeSource.PROJET, instance.pk)
+        instance._image_modifiee = False
+
+
+@receiver(post_delete, sender=Projet)
+def projet_supprime(sender, instance, **kwargs):
+    annuler(ImageRendition.TypeSource.PROJET, instance.pk)
@@ -0,0 +1,164 @@
+"""
+Stockage des fichiers de projet hors de la base de données.
+
+Le contenu est adressé par son empreinte SHA-256 : le modèle Fichier ne garde
+que les métadonnées et l'empreinte, deux dépôts identiques partagent le même
+contenu. Un contenu n'est jamais effacé à la suppression d'un fichier : la
+commande purger_contenus retire ceux qu'aucun Fichier ne référence plus depuis
+un délai de grâce. Le backend est choisi par le réglage PROJETS_STOCKAGE_FICHIERS
+(chemin pointé vers une sous-classe de StockageFichiers).
+"""
+import hashlib
+import os
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+TAILLE_BLOC = 64 * 1024
+
+
+class StockageFichiers:
+    """Interface d'un magasin de contenus adressés par empreinte SHA-256"""
+
+    def enregistrer(self, flux):
+        """Lit `flux` par blocs, l'enregistre et retourne (empreinte, taille)"""
+        raise NotImplementedError
+
+    def importer(self, chemin):
+        """Enregistre le fichier local `chemin` puis le supprime ; retourne (empreinte, taille)"""
+        try:
+            with open(chemin, 'rb') as flux:
+                return self.enregistrer(flux)
+        finally:
+            os.unlink(chemin)
+
+    def ouvrir(self, empreinte):
+        """Retourne un fichier binaire ouvert en lecture"""
+        raise NotImplementedError
+
+    def existe(self, empreinte):
+        raise NotImplementedError
+
+    def taille(self, empreinte):
+        raise NotImplementedError
+
+    def supprimer(self, empreinte):
+        raise NotImplementedError
+
+    def contenus(self):
+        """Empreintes de tous les contenus enregistrés"""
+        raise NotImplementedError
+
+    def purger(self, empreinte, limite):
+        """
+        Supprime le contenu s'il n'a été ni enregistré ni réutilisé depuis
+        `limite` (datetime) ; retourne True s'il a été supprimé.
+        """
+        raise NotImplementedError
+
+
+class StockageLocal(StockageFichiers):
+    """
+    Contenus rangés sur disque sous racine/ab/cd/abcd…, écrits d'abord dans un
+    fichier temporaire puis renommés : un fichier présent est toujours complet.
+    """
+
+    def __init__(self, racine=None):
+        self.racine = Path(racine or getattr(
+            settings, 'PROJETS_STOCKAGE_RACINE', Path(settings.MEDIA_ROOT) / 'projets'
+        ))
+
+    def chemin(self, empreinte):
+        return self.racine / empreinte[:2] / empreinte[2:4] / empreinte
+
+    def enregistrer(self, flux):
+        self.racine.mkdir(parents=True, exist_ok=True)
+        sha = hashlib.sha256()
+        taille = 0
+        descripteur, temporaire = tempfile.mkstemp(dir=self.racine, prefix='.depot-')
+        try:
+            with os.fdopen(descripteur, 'wb') as sortie:
+                blocs = flux.chunks(TAILLE_BLOC) if hasattr(flux, 'chunks') else iter(lambda: flux.read(TAILLE_BLOC), b'')
+                for bloc in blocs:
+                    sha.update(bloc)
+                    taille += len(bloc)
+                    sortie.write(bloc)
+            empreinte = sha.hexdigest()
+            self._ranger(temporaire, empreinte)
+        except BaseException:
+            if os.path.exists(temporaire):
+                os.unlink(temporaire)
+            raise
+        return empreinte, taille
+
+    def importer(self, chemin):
+        # Le fichier est seulement haché puis déplacé : pas de seconde copie sur disque
+        sha = hashlib.sha256()
+        with open(chemin, 'rb') as flux:
+            for bloc in iter(lambda: flux.read(TAILLE_BLOC), b''):
+                sha.update(bloc)
+        empreinte = sha.hexdigest()
+        taille = os.path.getsize(chemin)
+        self._ranger(chemin, empreinte)
+        return empreinte, taille
+
+    def _ranger(self, source, empreinte):
+        """
+        Déplace `source` à sa place. Un contenu déjà connu n'est pas réécrit,
+        mais sa date est rafraîchie : purger() ne l'effacera pas pendant que le
+        Fichier qui le réutilise est créé.
+        """
+        destination = self.chemin(empreinte)
+        try:
+            os.utime(destination)
+        except FileNotFoundError:
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(source, destination)
+        else:
+            os.unlink(source)
+
+    def ouvrir(self, empreinte):
+        return open(self.chemin(empreinte), 'rb')
+
+    def existe(self, empreinte):
+        return self.chemin(empreinte).is_file()
+
+    def taille(self, empreinte):
+        return self.chemin(empreinte).stat().st_size
+
+    def supprimer(self, empreinte):
+        try:
+            self.chemin(empreinte).unlink()
+        except FileNotFoundError:
+            pass
+
+    def contenus(self):
+        for chemin in self.racine.glob('??/??/*'):
+            if len(chemin.name) == 64 and chemin.name.startswith(chemin.parent.parent.name + chemin.parent.name):
+                yield chemin.name
+
+    def purger(self, empreinte, limite):
+        chemin = self.chemin(empreinte)
+        # Mis de côté avant la vérification de date : un dépôt qui le réutilise
+        # ensuite ne le trouve plus et le réécrit ; s'il l'a réutilisé juste
+        # avant, la date est récente et le contenu est remis en place.
+        ecarte = chemin.with_name(f'.purge-{empreinte}')
+        try:
+            os.replace(chemin, ecarte)
+        except FileNotFoundError:
+            return False
+        if ecarte.stat().st_mtime >= limite.timestamp():
+            os.replace(ecarte, chemin)  # Contenu identique s'il a été réécrit entre-temps
+            return False
+        os.unlink(ecarte)
+        return True
+
+
+@lru_cache(maxsize=None)
+def get_stockage():
+    """Backend configuré (StockageLocal par défaut)"""
+    chemin = getattr(settings, 'PROJETS_STOCKAGE_FICHIERS', 'projects.stockage.StockageLocal')
+    return import_string(chemin)()
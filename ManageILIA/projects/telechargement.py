@@ -0,0 +1,105 @@
+"""
+Réponses HTTP pour le téléchargement des fichiers de projet.
+
+Le contenu est lu par blocs depuis le stockage. L'empreinte SHA-256 sert
+d'ETag fort (If-None-Match → 304) et les requêtes Range à une plage sont
+servies en 206, ce qui permet de reprendre un téléchargement interrompu.
+"""
+import re
+
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_etags, quote_etag
+
+from .stockage import TAILLE_BLOC
+
+_PLAGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def lire_plage(entete, taille):
+    """
+    Interprète un en-tête Range à une seule plage.
+    Retourne (debut, fin) inclus, None si l'en-tête est absent ou ignoré
+    (plusieurs plages, syntaxe inconnue), ou False si la plage est insatisfiable.
+    """
+    if not entete:
+        return None
+    m = _PLAGE.match(entete.replace(' ', ''))
+    if not m or m.group(1) == m.group(2) == '':
+        return None
+    debut, fin = m.groups()
+    if debut == '':
+        # Suffixe : les N derniers octets
+        n = int(fin)
+        if n == 0:
+            return False
+        return max(taille - n, 0), taille - 1
+    debut = int(debut)
+    fin = taille - 1 if fin == '' else min(int(fin), taille - 1)
+    if debut >= taille or debut > fin:
+        return False
+    return debut, fin
+
+
+def _blocs(fichier, debut, longueur):
+    try:
+        fichier.seek(debut)
+        while longueur > 0:
+            bloc = fichier.read(min(TAILLE_BLOC, longueur))
+            if not bloc:
+                break
+            longueur -= len(bloc)
+            yield bloc
+    finally:
+        fichier.close()
+
+
+def reponse_fichier(request, fichier):
+    """Réponse 200, 206, 304 ou 416 pour un Fichier dont le contenu existe dans le stockage"""
+    etag = quote_etag(fichier.Empreinte)
+    derniere_modification = fichier.Date_publication.timestamp() if fichier.Date_publication else None
+
+    reponse = get_conditional_response(request, etag=etag, last_modified=derniere_modification)
+    if reponse is not None:
+        # 304 (ou 412) : mêmes validateurs que le contenu, pour les caches et les reprises
+        return _validateurs(reponse, etag, derniere_modification)
+
+    taille = fichier.Taille
+    plage = lire_plage(request.headers.get('Range'), taille)
+    si_plage = request.headers.get('If-Range')
+    if plage and si_plage and etag not in parse_etags(si_plage):
+        # Le contenu a changé depuis le début du téléchargement : on renvoie tout
+        plage = None
+
+    if plage is False:
+        reponse = HttpResponse(status=416)
+        reponse['Content-Range'] = f'bytes */{taille}'
+    elif plage:
+        debut, fin = plage
+        reponse = StreamingHttpResponse(
+            _blocs(fichier.ouvrir(), debut, fin - debut + 1),
+            status=206,
+            content_type=fichier.fichier_type,
+        )
+        reponse['Content-Length'] = str(fin - debut + 1)
+        reponse['Content-Range'] = f'bytes {debut}-{fin}/{taille}'
+        reponse['Content-Disposition'] = content_disposition_header(True, fichier.Nom)
+    else:
+        reponse = FileResponse(
+            fichier.ouvrir(),
+            as_attachment=True,
+            filename=fichier.Nom,
+            content_type=fichier.fichier_type,
+        )
+        reponse.block_size = TAILLE_BLOC
+        reponse['Content-Length'] = str(taille)
+
+    return _validateurs(reponse, etag, derniere_modification)
+
+
+def _validateurs(reponse, etag, derniere_modification):
+    reponse['Accept-Ranges'] = 'bytes'
+    reponse['ETag'] = etag
+    if derniere_modification is not None:
+        reponse['Last-Modified'] = http_date(derniere_modification)
+    return reponse
@@ -0,0 +1,229 @@
+import datetime
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ILIA.models import Personne
+from . import depots
+from .models import Projet, PersonneProjet, Fichier, DepotFichier
+from .stockage import get_stockage
+
+
+class StockageFichiersTest(TestCase):
+    """Les fichiers de projet vivent dans le stockage par empreinte, pas en base."""
+
+    def setUp(self):
+        self.racine = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.racine, ignore_errors=True)
+        reglages = override_settings(
+            PROJETS_STOCKAGE_RACINE=self.racine,
+            PROJETS_DEPOTS_RACINE=f"{self.racine}/depots",
+            PROJETS_DEPOT_TAILLE_BLOC=4,
+        )
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+        get_stockage.cache_clear()
+        self.addCleanup(get_stockage.cache_clear)
+
+        self.user = User.objects.create_user('membre', password='secret')
+        self.personne = Personne.objects.create(Id_Matricule=100001, Nom="Membre", Prenom="Bob", Email="bob@ilia.be", user=self.user)
+        self.projet = Projet.objects.create(Nom_projet="Projet")
+        PersonneProjet.objects.create(Id_Matricule=self.personne, Id_projet=self.projet)
+        self.client.login(username='membre', password='secret')
+
+    def deposer(self, nom, contenu):
+        self.client.post(reverse('projects:upload_file', args=[self.projet.Id_projet]), {
+            'Nom': nom,
+            'fichier': SimpleUploadedFile(f"{nom}.bin", contenu, content_type='application/pdf'),
+        })
+        return Fichier.objects.get(Nom=f"{nom}.bin")
+
+    def test_depot_et_telechargement(self):
+        contenu = b"x" * 200_000
+        fichier = self.deposer("rapport", contenu)
+
+        self.assertEqual(fichier.Empreinte, hashlib.sha256(contenu).hexdigest())
+        self.assertEqual(fichier.Taille, len(contenu))
+        self.assertTrue(get_stockage().existe(fichier.Empreinte))
+
+        response = self.client.get(reverse('projects:download_file', args=[fichier.Id_fichier]))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(b"".join(response.streaming_content), contenu)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertIn('rapport.bin', response['Content-Disposition'])
+
+    def test_contenu_purge_apres_le_dernier_fichier(self):
+        premier = self.deposer("a", b"identique")
+        second = self.deposer("b", b"identique")
+        self.assertEqual(premier.Empreinte, second.Empreinte)
+        orphelin = self.deposer("c", b"orphelin")
+        stockage = get_stockage()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            premier.delete()
+            orphelin.delete()
+        # Rien n'est effacé à la suppression, ni pendant le délai de grâce
+        self.assertTrue(stockage.existe(orphelin.Empreinte))
+        call_command('purger_contenus', stdout=io.StringIO())
+        self.assertTrue(stockage.existe(orphelin.Empreinte))
+
+        call_command('purger_contenus', heures=0, stdout=io.StringIO())
+        self.assertFalse(stockage.existe(orphelin.Empreinte))
+        self.assertTrue(stockage.existe(second.Empreinte))
+
+        # Contenu réutilisé par un nouveau dépôt pendant la purge : sa date le protège
+        second.delete()
+        ancien = (timezone.now() - datetime.timedelta(days=2)).timestamp()
+        os.utime(stockage.chemin(second.Empreinte), (ancien, ancien))
+        limite = timezone.now() - datetime.timedelta(days=1)
+        self.deposer("d", b"identique")
+        self.assertFalse(stockage.purger(second.Empreinte, limite))
+        self.assertTrue(stockage.existe(second.Empreinte))
+
+    def test_telechargement_conditionnel_et_par_plages(self):
+        contenu = bytes(range(256)) * 40
+        fichier = self.deposer("donnees", contenu)
+        url = reverse('projects:download_file', args=[fichier.Id_fichier])
+
+        response = self.client.get(url)
+        self.assertEqual(response['Content-Length'], str(len(contenu)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        etag = response['ETag']
+        self.assertEqual(etag, f'"{fichier.Empreinte}"')
+        self.assertIn('Last-Modified', response)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('Last-Modified', response)
+
+        response = self.client.get(url, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(contenu)}')
+        self.assertEqual(b"".join(response.streaming_content), contenu[100:200])
+
+        response = self.client.get(url, HTTP_RANGE='bytes=-10')
+        self.assertEqual(b"".join(response.streaming_content), contenu[-10:])
+
+        # Reprise après interruption : du dernier octet reçu jusqu'à la fin
+        response = self.client.get(url, HTTP_RANGE='bytes=10000-', HTTP_IF_RANGE=etag)
+        self.assertEqual(b"".join(response.streaming_content), contenu[10000:])
+
+        # Contenu changé entre-temps : tout est renvoyé
+        self.assertEqual(self.client.get(url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"autre"').status_code, 200)
+
+        response = self.client.get(url, HTTP_RANGE=f'bytes={len(contenu)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(contenu)}')
+
+    def ouvrir_depot(self, contenu, **extra):
+        response = self.client.post(
+            reverse('projects:upload_init', args=[self.projet.Id_projet]),
+            json.dumps({'nom': 'archive', 'nom_fichier': 'archive.tar', 'taille': len(contenu), **extra}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.json()
+
+    def envoyer_bloc(self, depot, numero, donnees, **headers):
+        return self.client.put(
+            reverse('projects:upload_chunk', args=[depot['id'], numero]),
+            donnees, content_type='application/octet-stream', headers=headers,
+        )
+
+    def test_envoi_par_blocs_avec_reprise(self):
+        contenu = b"0123456789"
+        depot = self.ouvrir_depot(contenu, sha256=hashlib.sha256(contenu).hexdigest())
+        self.assertEqual(depot['nombre_blocs'], 3)
+
+        self.assertEqual(self.envoyer_bloc(depot, 0, contenu[:4]).status_code, 200)
+        # Bloc hors d'ordre refusé, le serveur indique où reprendre
+        response = self.envoyer_bloc(depot, 2, contenu[8:])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['prochain_bloc'], 1)
+        # Bloc corrompu en transit
+        bloc = contenu[4:8]
+        response = self.envoyer_bloc(depot, 1, bloc, **{"X-Content-SHA256": hashlib.sha256(b"autre").hexdigest()})
+        self.assertEqual(response.status_code, 409)
+
+        # Reprise après coupure : l'état indique le prochain bloc
+        etat = self.client.get(reverse('projects:upload_state', args=[depot['id']])).json()
+        self.assertEqual(etat['prochain_bloc'], 1)
+        self.envoyer_bloc(depot, 1, bloc, **{"X-Content-SHA256": hashlib.sha256(bloc).hexdigest()})
+        self.envoyer_bloc(depot, 1, bloc)  # renvoi sans effet
+        self.envoyer_bloc(depot, 2, contenu[8:])
+
+        response = self.client.post(reverse('projects:upload_finalize', args=[depot['id']]))
+        self.assertEqual(response.status_code, 201)
+        fichier = Fichier.objects.get(pk=response.json()['id'])
+        self.assertEqual(fichier.Nom, "archive.tar")
+        self.assertEqual(fichier.Taille, len(contenu))
+        with fichier.ouvrir() as f:
+            self.assertEqual(f.read(), contenu)
+        self.assertFalse(DepotFichier.objects.exists())
+
+    def test_envoi_par_blocs_empreinte_invalide(self):
+        depot = self.ouvrir_depot(b"abcd", sha256="0" * 64)
+        self.envoyer_bloc(depot, 0, b"abcd")
+        response = self.client.post(reverse('projects:upload_finalize', args=[depot['id']]))
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Fichier.objects.exists())
+        call_command('purger_contenus', heures=0, stdout=io.StringIO())
+        self.assertFalse(get_stockage().existe(hashlib.sha256(b"abcd").hexdigest()))
+
+    def test_envoi_par_blocs_concurrents(self):
+        contenu = b"0123456789"
+        depot = self.ouvrir_depot(contenu)
+        modele = DepotFichier.objects.filter(pk=depot['id'])
+
+        # Bloc réservé par un envoi en cours : refusé, la finalisation aussi
+        modele.update(Jeton_bloc=uuid.uuid4(), Date_jeton=timezone.now())
+        self.assertEqual(self.envoyer_bloc(depot, 0, contenu[:4]).status_code, 409)
+        # Réservation abandonnée (processus tué) : reprise après le délai
+        modele.update(Date_jeton=timezone.now() - depots.delai_bloc() - datetime.timedelta(seconds=1))
+        self.assertEqual(self.envoyer_bloc(depot, 0, contenu[:4]).json()['prochain_bloc'], 1)
+
+        # Bloc repris par un autre envoi pendant la lecture : le compteur ne bouge pas
+        class Flux(io.BytesIO):
+            def read(self, n=-1):
+                modele.update(Jeton_bloc=uuid.uuid4(), Date_jeton=timezone.now())
+                return super().read(n)
+        with self.assertRaises(depots.DepotInvalide):
+            depots.ecrire_bloc(depot['id'], 1, Flux(contenu[4:8]), 4)
+        self.assertEqual(modele.get().Blocs_recus, 1)
+        modele.update(Jeton_bloc=None, Date_jeton=None)
+
+        self.envoyer_bloc(depot, 1, contenu[4:8])
+        self.envoyer_bloc(depot, 2, contenu[8:])
+        # Finalisation déjà commencée par un autre appel
+        modele.update(En_finalisation=True)
+        self.assertEqual(self.client.post(reverse('projects:upload_finalize', args=[depot['id']])).status_code, 400)
+        self.assertFalse(Fichier.objects.exists())
+        modele.update(En_finalisation=False)
+
+        # Retiré du projet entre-temps : le dépôt n'est plus accessible
+        PersonneProjet.objects.filter(Id_Matricule=self.personne).delete()
+        self.assertEqual(self.client.post(reverse('projects:upload_finalize', args=[depot['id']])).status_code, 404)
+        self.assertFalse(Fichier.objects.exists())
+
+    def test_envoi_par_blocs_reserve_aux_participants(self):
+        User.objects.create_user('externe', password='secret')
+        self.client.login(username='externe', password='secret')
+        response = self.client.post(
+            reverse('projects:upload_init', args=[self.projet.Id_projet]),
+            json.dumps({'nom': 'x', 'taille': 1}), content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 403)
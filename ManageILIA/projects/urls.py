@@ -9,7 +9,13 @@ urlpatterns = [
     path('<int:projet_id>/', views.detail_projet, name='project_detail'),
     path('<int:projet_id>/edit/', views.edit_projet, name='edit_projet'),
     path('<int:projet_id>/delete/', views.supprimer_projet, name='delete_projet'),
+    path('<int:projet_id>/image/<str:empreinte>/', views.image_projet, name='image'),
+    path('<int:projet_id>/image/<str:empreinte>/<int:taille>/', views.image_projet_taille, name='image_taille'),
     path('<int:projet_id>/upload-file/', views.upload_fichier_projet, name='upload_file'),
+    path('<int:projet_id>/upload-file/init/', views.depot_init, name='upload_init'),
+    path('upload/<uuid:depot_id>/', views.depot_etat, name='upload_state'),
+    path('upload/<uuid:depot_id>/chunk/<int:numero>/', views.depot_bloc, name='upload_chunk'),
+    path('upload/<uuid:depot_id>/finalize/', views.depot_finaliser, name='upload_finalize'),
     path('file/<int:fichier_id>/download/', views.telecharger_fichier, name='download_file'),
     path('file/<int:fichier_id>/delete/', views.supprimer_fichier, name='delete_file'),
 ]
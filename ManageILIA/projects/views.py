@@ -1,22 +1,52 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import JsonResponse
+from django.urls import reverse
+from django.views.decorators.http import require_http_methods
 from django.views import View
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils import timezone
-from ILIA.models import Personne, Notification, PersonneNotification
-from projects.models import Projet, PersonneProjet, Fichier
+from django.db.models import Exists, OuterRef
+from ILIA.binaires import differer_binaires
+from ILIA.models import Personne, ImageRendition
+from projects.models import Projet, PersonneProjet, Fichier, DepotFichier
 from .forms import ProjetForm, AjouterPersonneForm, UploadFichierForm
-from PIL import Image
-import os, io
+from . import depots
+from .stockage import get_stockage
+from .telechargement import reponse_fichier
+from ILIA.images import reponse_image, reponse_rendition
+from ILIA.renditions import lire_image
+from notifications.service import notifier
+import os, json
 import base64
 
+
+def _projet_affiche():
+    """Projet avec son créateur (sans photo)"""
+    return differer_binaires(Projet.objects.select_related('createur'))
+
+
+def _membres(projet):
+    """Participants du projet avec leur personne (sans photo)"""
+    return differer_binaires(PersonneProjet.objects.filter(Id_projet=projet).select_related('Id_Matricule'))
+
+
+def _fichiers(projet):
+    """Fichiers du projet avec leur auteur (sans photo), du plus récent au plus ancien"""
+    return differer_binaires(
+        Fichier.objects.filter(Id_projet=projet).select_related('Id_Matricule').order_by('-Date_publication')
+    )
+
+
 @login_required
 def mes_projets(request):
     """Vue pour afficher tous les projets de l'utilisateur connecté"""
     
     try:
         utilisateur = request.user.personne
-        projets = PersonneProjet.objects.filter(Id_Matricule=utilisateur).select_related('Id_projet')
+        projets = differer_binaires(
+            PersonneProjet.objects.filter(Id_Matricule=utilisateur).select_related('Id_projet')
+        )
         projets_list = [pp.Id_projet for pp in projets]
     except Personne.DoesNotExist:
         projets_list = []
@@ -104,29 +134,13 @@ def creer_projet(request):
                 if 'image_file' in request.FILES:
                     image_file = request.FILES['image_file']
                     try:
-                        img = Image.open(image_file)
-                        if img.mode != 'RGB':
-                            img = img.convert('RGB')
-                        img.thumbnail((800, 800))
-                        buffer = io.BytesIO()
-                        img.save(buffer, format="JPEG", quality=80)
-                        projet.Image_projet = buffer.getvalue()
+                        projet.Image_projet = lire_image(image_file)
                     except Exception as e:
                         print(f"Erreur image: {e}")
 
                 elif image_cache:
                     try:
-                        img_data = base64.b64decode(image_cache)
-                        img_buffer = io.BytesIO(img_data)
-
-                        img = Image.open(img_buffer)
-                        if img.mode != 'RGB':
-                            img = img.convert('RGB')
-                        img.thumbnail((800, 800))
-
-                        buffer = io.BytesIO()
-                        img.save(buffer, format="JPEG", quality=80)
-                        projet.Image_projet = buffer.getvalue()
+                        projet.Image_projet = lire_image(base64.b64decode(image_cache))
                     except Exception as e:
                         print(f"Erreur image cache: {e}")
 
@@ -197,18 +211,7 @@ def creer_projet(request):
                         f"Date de création : {timezone.localtime(timezone.now()).strftime('%d/%m/%Y à %H:%M')}\n"
                     )
 
-                    notif = Notification.objects.create(
-                        Titre=titre,
-                        Contenu=contenu,
-                        Type="PROJET"
-                    )
-
-                    # Lier la notification à chaque invité
-                    for personne in invites:
-                        PersonneNotification.objects.get_or_create(
-                            Id_Matricule=personne,
-                            Id_notif=notif
-                        )
+                    notifier(invites, titre, contenu, type="PROJET", cible=projet)
 
                 # Nettoyer la session
                 if 'personnes_temp' in request.session:
@@ -234,9 +237,9 @@ def creer_projet(request):
 def detail_projet(request, projet_id):
     """Vue pour afficher les détails d'un projet"""
 
-    projet = get_object_or_404(Projet, Id_projet=projet_id)
-    membres = PersonneProjet.objects.filter(Id_projet=projet)
-    fichiers = Fichier.objects.filter(Id_projet=projet).order_by('-Date_publication')
+    projet = get_object_or_404(_projet_affiche(), Id_projet=projet_id)
+    membres = _membres(projet)
+    fichiers = _fichiers(projet)
     
     # Vérifier si l'utilisateur est participant au projet
     try:
@@ -256,7 +259,7 @@ def detail_projet(request, projet_id):
 @login_required
 def edit_projet(request, projet_id):
     """Vue pour modifier la description et gérer les participants du projet"""
-    projet = get_object_or_404(Projet, Id_projet=projet_id)
+    projet = get_object_or_404(_projet_affiche(), Id_projet=projet_id)
 
     # Vérifier que l'utilisateur connecté est bien le créateur
     try:
@@ -267,7 +270,7 @@ def edit_projet(request, projet_id):
     if projet.createur is None or utilisateur is None or projet.createur != utilisateur:
         return render(request, 'projects/details_projet.html', {
             'projet': projet,
-            'membres': PersonneProjet.objects.filter(Id_projet=projet),
+            'membres': _membres(projet),
             'error': "Vous n'êtes pas autorisé(e) à modifier ce projet. Seul le créateur peut apporter des modifications."
         }, status=403)
 
@@ -287,15 +290,7 @@ def edit_projet(request, projet_id):
                 if 'image_file' in request.FILES:
                     image_file = request.FILES['image_file']
                     try:
-                        img = Image.open(image_file)
-                        if img.mode != 'RGB':
-                            img = img.convert('RGB')
-
-                        img.thumbnail((800, 800))
-
-                        buffer = io.BytesIO()
-                        img.save(buffer, format="JPEG", quality=80)
-                        projet_obj.Image_projet = buffer.getvalue()
+                        projet_obj.Image_projet = lire_image(image_file)
                     except Exception as e:
                         print(f"Erreur image: {e}")
                 projet_obj.save()
@@ -337,7 +332,7 @@ def edit_projet(request, projet_id):
                 
                 # Recharger la page avec les erreurs visibles
                 form = ProjetForm(instance=projet)
-                membres = PersonneProjet.objects.filter(Id_projet=projet)
+                membres = _membres(projet)
                 return render(request, 'projects/edit_projet.html', {
                     'projet': projet,
                     'form': form,
@@ -358,7 +353,7 @@ def edit_projet(request, projet_id):
 
     form = ProjetForm(instance=projet)
     add_form = AjouterPersonneForm()
-    membres = PersonneProjet.objects.filter(Id_projet=projet)
+    membres = _membres(projet)
     return render(request, 'projects/edit_projet.html', {
         'projet': projet,
         'form': form,
@@ -382,7 +377,7 @@ def supprimer_projet(request, projet_id):
         # Interdire la suppression si l'utilisateur n'est pas le créateur
         return render(request, 'projects/details_projet.html', {
             'projet': projet,
-            'membres': PersonneProjet.objects.filter(Id_projet=projet),
+            'membres': _membres(projet),
             'error': "Vous n'êtes pas autorisé(e) à supprimer ce projet."
         }, status=403)
 
@@ -395,6 +390,38 @@ def supprimer_projet(request, projet_id):
 
 
 
+def _notifier_nouveau_fichier(projet, fichier, utilisateur):
+    """Prévient les autres participants du projet qu'un fichier a été ajouté"""
+    titre = f"Nouveau fichier dans le projet : {projet.Nom_projet}"
+    contenu = (
+        f"Un nouveau fichier a été ajouté dans le projet « {getattr(projet, 'Nom', projet.Nom_projet)} ».\n\n"
+        f"Nom du fichier : {fichier.Nom}\n"
+        f"Description : {fichier.Description or 'Non spécifiée'}\n"
+        f"Auteur : {utilisateur.Prenom} {utilisateur.Nom}\n"
+        f"Date d'ajout : {timezone.localtime(timezone.now()).strftime('%d/%m/%Y à %H:%M')}\n"
+    )
+
+    notifier(
+        Personne.objects.filter(personneprojet__Id_projet=projet),
+        titre, contenu, type="PROJET_FICHIER", exclure=[utilisateur], cible=fichier,
+    )
+
+
+@login_required
+def image_projet(request, projet_id, empreinte):
+    """Image de couverture servie avec un cache long (l'URL change avec l'image)"""
+    return reponse_image(request, Projet.objects.filter(pk=projet_id), 'Image_projet', 'Image_empreinte', empreinte)
+
+
+@login_required
+def image_projet_taille(request, projet_id, empreinte, taille):
+    """Déclinaison de l'image de couverture pour un affichage de `taille` pixels"""
+    return reponse_rendition(
+        request, ImageRendition.TypeSource.PROJET, projet_id, empreinte, taille,
+        Projet.objects.filter(pk=projet_id), 'Image_projet', 'Image_empreinte',
+    )
+
+
 @login_required
 def upload_fichier_projet(request, projet_id):
     """Vue pour permettre aux participants d'uploader des fichiers dans le projet"""
@@ -409,7 +436,7 @@ def upload_fichier_projet(request, projet_id):
     if utilisateur is None or not PersonneProjet.objects.filter(Id_Matricule=utilisateur, Id_projet=projet).exists():
         return render(request, 'projects/details_projet.html', {
             'projet': projet,
-            'membres': PersonneProjet.objects.filter(Id_projet=projet),
+            'membres': _membres(projet),
             'error': "Vous n'êtes pas participant à ce projet et ne pouvez donc pas ajouter de fichiers."
         }, status=403)
     
@@ -418,7 +445,8 @@ def upload_fichier_projet(request, projet_id):
         if form.is_valid():
             fichier_uploaded = request.FILES.get('fichier')
             if fichier_uploaded:
-                fichier_contenu = fichier_uploaded.read()
+                # Le contenu est copié par blocs dans le stockage, seule l'empreinte va en base
+                empreinte, taille = get_stockage().enregistrer(fichier_uploaded)
                 fichier_type = fichier_uploaded.content_type or 'application/octet-stream'
                 
                 # Créer l'enregistrement Fichier
@@ -426,40 +454,15 @@ def upload_fichier_projet(request, projet_id):
                     Nom=form.cleaned_data['Nom'] + os.path.splitext(fichier_uploaded.name)[1],
                     Description=form.cleaned_data.get('Description', ''),
                     Date_publication=timezone.now().date(),
-                    fichier_contenu=fichier_contenu,
+                    Empreinte=empreinte,
+                    Taille=taille,
                     fichier_type=fichier_type,
                     Id_Matricule=utilisateur,
                     Id_projet=projet
                 )
                 fichier.save()
 
-                participants_qs = PersonneProjet.objects.filter(Id_projet=projet)
-                destinataires = [
-                    pp.Id_Matricule for pp in participants_qs
-                    if pp.Id_Matricule != utilisateur
-                ]
-
-                if destinataires:
-                    titre = f"Nouveau fichier dans le projet : {projet.Nom_projet}"
-                    contenu = (
-                        f"Un nouveau fichier a été ajouté dans le projet « {getattr(projet, 'Nom', projet.Nom_projet)} ».\n\n"
-                        f"Nom du fichier : {fichier.Nom}\n"
-                        f"Description : {fichier.Description or 'Non spécifiée'}\n"
-                        f"Auteur : {utilisateur.Prenom} {utilisateur.Nom}\n"
-                        f"Date d'ajout : {timezone.localtime(timezone.now()).strftime('%d/%m/%Y à %H:%M')}\n"
-                    )
-
-                    notif = Notification.objects.create(
-                        Titre=titre,
-                        Contenu=contenu,
-                        Type="PROJET_FICHIER"
-                    )
-
-                    for personne in destinataires:
-                        PersonneNotification.objects.get_or_create(
-                            Id_Matricule=personne,
-                            Id_notif=notif
-                        )
+                _notifier_nouveau_fichier(projet, fichier, utilisateur)
 
                 return redirect('projects:project_detail', projet_id=projet.Id_projet)
     else:
@@ -471,12 +474,119 @@ def upload_fichier_projet(request, projet_id):
     })
 
 
+def _participant(request, projet):
+    """Personne connectée si elle participe au projet, sinon None"""
+    try:
+        utilisateur = request.user.personne
+    except Exception:
+        return None
+    if not PersonneProjet.objects.filter(Id_Matricule=utilisateur, Id_projet=projet).exists():
+        return None
+    return utilisateur
+
+
+def _depot_de(request, depot_id):
+    """Dépôt en cours de l'utilisateur connecté, toujours participant au projet (404 sinon)"""
+    participe = PersonneProjet.objects.filter(Id_Matricule=OuterRef('Id_Matricule'), Id_projet=OuterRef('Id_projet'))
+    return get_object_or_404(
+        DepotFichier.objects.filter(Exists(participe)), Id_depot=depot_id, Id_Matricule__user=request.user,
+    )
+
+
+@login_required
+@require_http_methods(['POST'])
+def depot_init(request, projet_id):
+    """Ouvre un envoi par blocs : {nom, nom_fichier, taille, type?, description?, sha256?}"""
+    projet = get_object_or_404(Projet, Id_projet=projet_id)
+    utilisateur = _participant(request, projet)
+    if utilisateur is None:
+        return JsonResponse({'error': "Vous n'êtes pas participant à ce projet."}, status=403)
+
+    try:
+        data = json.loads(request.body)
+        taille = int(data['taille'])
+        nom = str(data['nom']).strip()
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': 'Requête invalide : nom et taille sont requis.'}, status=400)
+    empreinte = str(data.get('sha256') or '').lower()
+    if taille < 0 or not nom or len(empreinte) not in (0, 64):
+        return JsonResponse({'error': 'Nom, taille ou empreinte invalides.'}, status=400)
+
+    form = UploadFichierForm({'Nom': nom, 'Description': data.get('description', '')})
+    form.fields.pop('fichier')
+    if not form.is_valid():
+        return JsonResponse({'error': form.errors}, status=400)
+
+    depot = DepotFichier.objects.create(
+        Nom=form.cleaned_data['Nom'] + os.path.splitext(str(data.get('nom_fichier', '')))[1],
+        Description=form.cleaned_data.get('Description', ''),
+        fichier_type=str(data.get('type') or 'application/octet-stream')[:100],
+        Taille=taille,
+        Taille_bloc=depots.taille_bloc_depot(),
+        Empreinte_attendue=empreinte,
+        Id_Matricule=utilisateur,
+        Id_projet=projet,
+    )
+    return JsonResponse(depots.etat(depot), status=201)
+
+
+@login_required
+@require_http_methods(['GET', 'DELETE'])
+def depot_etat(request, depot_id):
+    """État d'un envoi (pour reprendre après une coupure) ou abandon (DELETE)"""
+    depot = _depot_de(request, depot_id)
+    if request.method == 'DELETE':
+        depots.abandonner(depot)
+        return JsonResponse({'message': 'Envoi annulé'})
+    return JsonResponse(depots.etat(depot))
+
+
+@login_required
+@require_http_methods(['PUT'])
+def depot_bloc(request, depot_id, numero):
+    """Reçoit le bloc `numero` en corps brut (en-tête X-Content-SHA256 optionnel)"""
+    depot = _depot_de(request, depot_id)
+    try:
+        longueur = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        longueur = 0
+    try:
+        depot = depots.ecrire_bloc(
+            depot.pk, numero, request, longueur, request.headers.get('X-Content-SHA256', ''),
+        )
+    except depots.DepotInvalide as e:
+        return JsonResponse({'error': str(e), **depots.etat(get_object_or_404(DepotFichier, pk=depot.pk))}, status=409)
+    return JsonResponse(depots.etat(depot))
+
+
+@login_required
+@require_http_methods(['POST'])
+def depot_finaliser(request, depot_id):
+    """Vérifie taille et empreinte, puis crée le Fichier du projet"""
+    depot = _depot_de(request, depot_id)
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        data = {}
+    try:
+        fichier = depots.finaliser(depot, str(data.get('sha256') or ''))
+    except depots.DepotInvalide as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    _notifier_nouveau_fichier(fichier.Id_projet, fichier, fichier.Id_Matricule)
+    return JsonResponse({
+        'id': fichier.Id_fichier,
+        'sha256': fichier.Empreinte,
+        'redirect': reverse('projects:project_detail', args=[fichier.Id_projet_id]),
+    }, status=201)
+
+
 @login_required
 def telecharger_fichier(request, fichier_id):
-    """Vue sécurisée pour télécharger un fichier du projet depuis la base de données"""
-    from django.http import HttpResponse, HttpResponseForbidden
+    """Vue sécurisée pour télécharger un fichier du projet depuis le stockage"""
+    from django.http import HttpResponseForbidden
 
-    fichier = get_object_or_404(Fichier, Id_fichier=fichier_id)
+    fichier = get_object_or_404(Fichier.objects.select_related('Id_projet'), Id_fichier=fichier_id)
     projet = fichier.Id_projet
     
     # Vérifier que l'utilisateur est participant du projet
@@ -488,16 +598,11 @@ def telecharger_fichier(request, fichier_id):
     if utilisateur is None or not PersonneProjet.objects.filter(Id_Matricule=utilisateur, Id_projet=projet).exists():
         return HttpResponseForbidden("Vous n'avez pas accès à ce fichier. Vous devez être participant du projet.")
     
-    if not fichier.fichier_contenu:
+    if not fichier.Empreinte or not get_stockage().existe(fichier.Empreinte):
         return HttpResponseForbidden("Le fichier n'existe pas ou a été supprimé.")
     
-    try:
-        # Retourner le contenu du BLOB depuis la base de données
-        response = HttpResponse(fichier.fichier_contenu, content_type=fichier.fichier_type)
-        response['Content-Disposition'] = f'attachment; filename="{fichier.Nom}"'
-        return response
-    except Exception as e:
-        return HttpResponseForbidden(f"Erreur lors du téléchargement : {str(e)}")
+    # Contenu envoyé par blocs, avec ETag / 304 et reprise par plages (206)
+    return reponse_fichier(request, fichier)
 
 
 @login_required
@@ -515,8 +620,8 @@ def supprimer_fichier(request, fichier_id):
     if utilisateur is None or fichier.Id_Matricule != utilisateur:
         return render(request, 'projects/details_projet.html', {
             'projet': projet,
-            'membres': PersonneProjet.objects.filter(Id_projet=projet),
-            'fichiers': Fichier.objects.filter(Id_projet=projet).order_by('-Date_publication'),
+            'membres': _membres(projet),
+            'fichiers': _fichiers(projet),
             'is_participant': PersonneProjet.objects.filter(Id_Matricule=utilisateur, Id_projet=projet).exists() if utilisateur else False,
             'error': "Vous n'êtes pas autorisé(e) à supprimer ce fichier. Seul le propriétaire peut le faire."
         }, status=403)
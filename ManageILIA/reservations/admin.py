@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Piece, Bureau, Reservation, PersonneReservation, LiberationBureau
+from ILIA.admin import SansBinairesAdminMixin
+from .models import Piece, Bureau, Reservation, PersonneReservation, LiberationBureau, PresenceJournaliere
 
 
 @admin.register(Piece)
@@ -33,8 +34,9 @@ class PersonneReservationInline(admin.TabularInline):
 
 
 @admin.register(Reservation)
-class ReservationAdmin(admin.ModelAdmin):
+class ReservationAdmin(SansBinairesAdminMixin, admin.ModelAdmin):
     list_display = ('Id_reservation', 'Nom', 'Type', 'Debut', 'Fin', 'Id_Matricule', 'get_lieu')
+    list_select_related = ('Id_Matricule', 'Id_bureau', 'Id_piece')
     list_filter = ('Type', 'Debut')
     search_fields = ('Nom', 'Id_Matricule__Nom', 'Id_Matricule__Prenom')
     date_hierarchy = 'Debut'
@@ -51,16 +53,25 @@ class ReservationAdmin(admin.ModelAdmin):
 
 
 @admin.register(PersonneReservation)
-class PersonneReservationAdmin(admin.ModelAdmin):
+class PersonneReservationAdmin(SansBinairesAdminMixin, admin.ModelAdmin):
     list_display = ('Id_Matricule', 'Id_reservation', 'Valide')
     list_filter = ('Valide',)
     search_fields = ('Id_Matricule__Nom', 'Id_Matricule__Prenom')
 
 
 @admin.register(LiberationBureau)
-class LiberationBureauAdmin(admin.ModelAdmin):
+class LiberationBureauAdmin(SansBinairesAdminMixin, admin.ModelAdmin):
     list_display = ('Id_Matricule', 'Id_bureau', 'Date', 'Date_creation')
     list_filter = ('Date', 'Date_creation')
     search_fields = ('Id_Matricule__Nom', 'Id_Matricule__Prenom', 'Id_bureau__Nom')
     date_hierarchy = 'Date'
-    ordering = ('-Date_creation',)
\ No newline at end of file
+    ordering = ('-Date_creation',)
+
+
+@admin.register(PresenceJournaliere)
+class PresenceJournaliereAdmin(SansBinairesAdminMixin, admin.ModelAdmin):
+    list_display = ('Id_Matricule', 'Date', 'Statut')
+    list_filter = ('Statut', 'Date')
+    search_fields = ('Id_Matricule__Nom', 'Id_Matricule__Prenom')
+    date_hierarchy = 'Date'
+    raw_id_fields = ('Id_Matricule',)
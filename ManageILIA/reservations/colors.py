@@ -0,0 +1,26 @@
+BUREAU_COLORS = [
+    "#0D47A1", "#2962FF", "#00838F", "#00ACC1",
+    "#1B5E20", "#43A047", "#7CB342",
+    "#EF6C00", "#F4511E", "#FF7043",
+    "#B71C1C", "#E53935", "#FF5252",
+    "#4A148C", "#8E24AA", "#BA68C8",
+    "#004D40", "#00796B", "#26A69A",
+    "#9E9D24", "#FDD835", "#FBC02D",
+]
+
+PIECE_COLORS = [
+    "#0D47A1", "#1976D2", "#42A5F5", "#90CAF9",
+    "#01579B", "#0288D1", "#4FC3F7", "#81D4FA",
+    "#283593", "#3F51B5", "#5C6BC0", "#9FA8DA",
+    "#6A1B9A", "#8E24AA", "#AB47BC", "#CE93D8",
+]
+
+
+def get_bureau_color(bureau_id):
+    """Retourne une couleur unique pour chaque bureau basée sur son ID"""
+    return BUREAU_COLORS[bureau_id % len(BUREAU_COLORS)]
+
+
+def get_piece_color(piece_id):
+    """Retourne une couleur unique pour chaque pièce/salle basée sur son ID"""
+    return PIECE_COLORS[piece_id % len(PIECE_COLORS)]
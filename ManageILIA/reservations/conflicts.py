@@ -0,0 +1,134 @@
+"""
+Détection des conflits de réservation.
+
+Toutes les réservations d'un local sur l'horizon d'une récurrence sont
+chargées en une requête dans un index d'intervalles en mémoire ; chaque
+occurrence y est ensuite testée sans nouvel aller-retour en base, puis les
+occurrences acceptées sont insérées en masse dans une seule transaction.
+"""
+from bisect import bisect_left, bisect_right
+
+from django.db import transaction
+
+from .models import Bureau, Piece, Reservation, PersonneReservation
+
+
+class IndexIntervalles:
+    """
+    Intervalles semi-ouverts [debut, fin) triés par début, avec le maximum
+    cumulé des fins : un chevauchement se teste en O(log n).
+    """
+
+    def __init__(self, intervalles=()):
+        self._debuts = []
+        self._fins = []
+        self._max_fins = []
+        for debut, fin in sorted(intervalles):
+            self.ajouter(debut, fin)
+
+    def chevauche(self, debut, fin):
+        """True si [debut, fin) chevauche au moins un intervalle de l'index"""
+        # Candidats : intervalles commençant avant `fin` ; il suffit que l'un finisse après `debut`
+        k = bisect_left(self._debuts, fin)
+        return k > 0 and self._max_fins[k - 1] > debut
+
+    def ajouter(self, debut, fin):
+        k = bisect_right(self._debuts, debut)
+        self._debuts.insert(k, debut)
+        self._fins.insert(k, fin)
+        self._max_fins.insert(k, fin)
+        # Les insertions se font presque toujours en fin de liste (occurrences croissantes)
+        for i in range(k, len(self._max_fins)):
+            precedent = self._max_fins[i - 1] if i else None
+            self._max_fins[i] = self._fins[i] if precedent is None else max(precedent, self._fins[i])
+
+    def __len__(self):
+        return len(self._debuts)
+
+
+def _reservations_du_local(bureau=None, piece=None):
+    if bureau is not None:
+        return Reservation.objects.filter(Id_bureau=bureau)
+    return Reservation.objects.filter(Id_piece=piece)
+
+
+def charger_index(debut, fin, bureau=None, piece=None, exclude_pk=None):
+    """Index des réservations du local qui chevauchent [debut, fin) (une requête)"""
+    qs = _reservations_du_local(bureau, piece).filter(Debut__lt=fin, Fin__gt=debut)
+    if exclude_pk is not None:
+        qs = qs.exclude(pk=exclude_pk)
+    return IndexIntervalles(qs.values_list('Debut', 'Fin'))
+
+
+def a_conflit(debut, fin, bureau=None, piece=None, exclude_pk=None):
+    """True si le créneau chevauche une autre réservation du bureau ou de la salle"""
+    qs = _reservations_du_local(bureau, piece).filter(Debut__lt=fin, Fin__gt=debut)
+    if exclude_pk is not None:
+        qs = qs.exclude(pk=exclude_pk)
+    return qs.exists()
+
+
+def repartir_occurrences(occurrences, bureau=None, piece=None):
+    """
+    Sépare les occurrences [(debut, fin), ...] en (acceptées, en conflit).
+    Une occurrence acceptée bloque les suivantes qui la chevauchent.
+    """
+    if not occurrences:
+        return [], []
+    index = charger_index(
+        min(d for d, f in occurrences), max(f for d, f in occurrences), bureau, piece,
+    )
+    acceptees, conflits = [], []
+    for debut, fin in occurrences:
+        if index.chevauche(debut, fin):
+            conflits.append((debut, fin))
+        else:
+            index.ajouter(debut, fin)
+            acceptees.append((debut, fin))
+    return acceptees, conflits
+
+
+def creer_reservations(occurrences, nom, typ, personne, bureau=None, piece=None):
+    """
+    Vérifie les conflits et insère les occurrences acceptées avec leur
+    PersonneReservation (validée) en masse, dans une transaction.
+    Le local est verrouillé pour éviter deux réservations concurrentes.
+    Retourne (réservations créées, occurrences en conflit).
+    """
+    with transaction.atomic():
+        if bureau is not None:
+            Bureau.objects.select_for_update().filter(pk=bureau.pk).first()
+        else:
+            Piece.objects.select_for_update().filter(pk=piece.pk).first()
+
+        acceptees, conflits = repartir_occurrences(occurrences, bureau, piece)
+        if not acceptees:
+            return [], conflits
+
+        reservations = Reservation.objects.bulk_create([
+            Reservation(
+                Nom=nom,
+                Type=typ,
+                Debut=debut,
+                Fin=fin,
+                Id_Matricule=personne,
+                Id_bureau=bureau,
+                Id_piece_id=bureau.Id_piece_id if bureau is not None else piece.pk,
+            )
+            for debut, fin in acceptees
+        ])
+        if any(r.pk is None for r in reservations):
+            # MySQL ne renvoie pas les clés générées par un INSERT groupé :
+            # les créneaux étant sans conflit, (local, début) identifie chaque ligne.
+            reservations = list(
+                _reservations_du_local(bureau, piece)
+                .filter(Id_Matricule=personne, Nom=nom, Debut__in=[debut for debut, fin in acceptees])
+                .order_by('Debut')
+            )
+
+        PersonneReservation.objects.bulk_create([
+            PersonneReservation(Id_Matricule=personne, Id_reservation=r, Valide=True)
+            for r in reservations
+        ], ignore_conflicts=True)
+
+    return reservations, conflits
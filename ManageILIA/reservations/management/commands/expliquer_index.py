@@ -0,0 +1,128 @@
+import datetime
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from events.models import Event, Participant
+from ILIA.models import Personne, PersonneNotification
+from reservations.models import Piece, Bureau, Reservation, LiberationBureau
+
+# Index des plages horaires (migrations *_indexes_plages_horaires), retirés pour le plan « avant »
+INDEX_COMPARES = [
+    (Reservation, ['Id_bureau', 'Debut', 'Fin']),
+    (Reservation, ['Id_piece', 'Debut', 'Fin']),
+    (Reservation, ['Debut', 'Fin']),
+    (LiberationBureau, ['Id_bureau', 'Date']),
+    (PersonneNotification, ['Id_Matricule', 'Lu']),
+    (Event, ['start', 'end']),
+    (Participant, ['person', 'status']),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Affiche le plan EXPLAIN et la durée des requêtes de calendrier. "
+        "Avec --seed N, génère N réservations de test dans une transaction annulée à la fin. "
+        "Chaque requête est expliquée sans les index des plages horaires (supprimés "
+        "dans un point de sauvegarde aussitôt annulé), puis avec."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0,
+                            help="Nombre de réservations à générer (ex. 100000)")
+        parser.add_argument('--repetitions', type=int, default=5,
+                            help="Nombre d'exécutions pour mesurer chaque requête")
+
+    def handle(self, *args, **options):
+        if not connection.features.can_rollback_ddl:
+            # MySQL valide implicitement un DROP INDEX : il ne pourrait pas être annulé
+            raise CommandError("Cette base ne peut pas annuler une suppression d'index dans une transaction.")
+        with transaction.atomic():
+            if options['seed']:
+                self.generer(options['seed'])
+
+            avant = transaction.savepoint()
+            self.supprimer_index()
+            self.stdout.write(self.style.SUCCESS("===== AVANT (sans les index) ====="))
+            self.expliquer(options['repetitions'])
+            transaction.savepoint_rollback(avant)
+
+            self.stdout.write(self.style.SUCCESS("===== APRÈS (avec les index) ====="))
+            self.expliquer(options['repetitions'])
+            # Les données générées ne doivent jamais rester en base
+            transaction.set_rollback(True)
+
+    def supprimer_index(self):
+        modele_sql = connection.schema_editor().sql_delete_index
+        nom = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            for model, champs in INDEX_COMPARES:
+                index = next(i for i in model._meta.indexes if i.fields == champs)
+                cursor.execute(modele_sql % {'table': nom(model._meta.db_table), 'name': nom(index.name)})
+
+    def generer(self, nombre):
+        self.stdout.write(f"Génération de {nombre} réservations...")
+        rng = random.Random(42)
+        piece = Piece.objects.create(Nom="Benchmark", Etage=0)
+        Piece.objects.bulk_create([
+            Piece(Nom=f"Benchmark salle {i}", Etage=0, Type=Piece.TypePiece.SALLE_REUNION) for i in range(20)
+        ])
+        salles = list(Piece.objects.filter(Nom__startswith="Benchmark salle"))
+        Bureau.objects.bulk_create([Bureau(Nom=f"Benchmark {i}", Id_piece=piece) for i in range(200)])
+        bureaux = list(Bureau.objects.filter(Id_piece=piece))
+        base = 900000
+        Personne.objects.bulk_create([
+            Personne(Id_Matricule=base + i, Nom="Benchmark", Prenom=str(i), Email=f"benchmark{i}@ilia.invalid")
+            for i in range(100)
+        ])
+        personnes = list(Personne.objects.filter(Id_Matricule__gte=base))
+
+        debut = timezone.now() - datetime.timedelta(days=730)
+        lot = []
+        for i in range(nombre):
+            d = debut + datetime.timedelta(hours=rng.randrange(0, 730 * 2 * 24))
+            salle = rng.random() < 0.3
+            lot.append(Reservation(
+                Nom="Benchmark", Debut=d, Fin=d + datetime.timedelta(hours=rng.randint(1, 4)),
+                Id_Matricule=rng.choice(personnes),
+                Id_bureau=None if salle else rng.choice(bureaux),
+                Id_piece=rng.choice(salles) if salle else piece,
+            ))
+            if len(lot) == 5000:
+                Reservation.objects.bulk_create(lot)
+                lot = []
+        Reservation.objects.bulk_create(lot)
+
+    def expliquer(self, repetitions):
+        now = timezone.now()
+        semaine = (now - datetime.timedelta(days=3), now + datetime.timedelta(days=4))
+        bureau = Bureau.objects.order_by('-Id_bureau').first()
+        piece = Piece.objects.filter(Type=Piece.TypePiece.SALLE_REUNION).order_by('-Id_piece').first()
+        personne = Personne.objects.order_by('-Id_Matricule').first()
+
+        requetes = {
+            "events_json (toutes réservations)": Reservation.objects.filter(Debut__lt=semaine[1], Fin__gt=semaine[0]),
+            "bureau_events_json": Reservation.objects.filter(Id_bureau=bureau, Debut__lt=semaine[1], Fin__gt=semaine[0]),
+            "piece_events_json": Reservation.objects.filter(Id_piece=piece, Debut__lt=semaine[1], Fin__gt=semaine[0]),
+            "occupation_locaux": Reservation.objects.filter(
+                Q(Id_bureau__in=[bureau]) | Q(Id_piece__in=[piece]), Debut__lt=semaine[1], Fin__gt=semaine[0],
+            ),
+            "Event (start, end)": Event.objects.filter(start__lt=semaine[1], end__gt=semaine[0]),
+            "Participant (person, status)": Participant.objects.filter(person=personne, status=Participant.Status.INVITED),
+            "PersonneNotification (Id_Matricule, Lu)": PersonneNotification.objects.filter(Id_Matricule=personne, Lu=False),
+            "LiberationBureau (Id_bureau, Date)": LiberationBureau.objects.filter(Id_bureau=bureau, Date=now.date()),
+        }
+
+        for titre, qs in requetes.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(titre))
+            self.stdout.write(qs.explain())
+            durees = []
+            for _ in range(repetitions):
+                t0 = time.perf_counter()
+                list(qs.values_list('pk', flat=True))
+                durees.append((time.perf_counter() - t0) * 1000)
+            self.stdout.write(f"  médiane : {sorted(durees)[len(durees) // 2]:.2f} ms\n")
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from ILIA.models import Personne
+from reservations.models import PresenceJournaliere
+from reservations.presence import horizon_presence, materialiser_presence
+
+
+class Command(BaseCommand):
+    help = "Reconstruit la table PresenceJournaliere sur l'horizon glissant (à lancer chaque nuit)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lot', type=int, default=500,
+            help="Nombre de personnes recalculées par transaction (défaut : 500)",
+        )
+
+    def handle(self, *args, **options):
+        debut, fin = horizon_presence()
+        lot = options['lot']
+
+        # Les jours passés sortent de l'horizon
+        supprimees, _ = PresenceJournaliere.objects.filter(Date__lt=debut).delete()
+
+        personnes = Personne.objects.only('Id_Matricule', 'user_id', 'Id_bureau_id').order_by('Id_Matricule')
+        ecrites = 0
+        nb_personnes = 0
+        dernier = None
+        while True:
+            page = personnes if dernier is None else personnes.filter(Id_Matricule__gt=dernier)
+            page = list(page[:lot])
+            if not page:
+                break
+            ecrites += materialiser_presence(page, debut, fin)
+            nb_personnes += len(page)
+            dernier = page[-1].Id_Matricule
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Présence du {debut} au {fin} : {ecrites} ligne(s) écrite(s) pour {nb_personnes} personne(s), "
+            f"{supprimees} ligne(s) obsolète(s) supprimée(s)."
+        ))
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ILIA', '0006_alter_personne_photo'),
+        ('reservations', '0004_liberationbureau'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PresenceJournaliere',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('Date', models.DateField()),
+                ('Statut', models.CharField(choices=[('present', 'Sur place'), ('telework', 'Télétravail'), ('liberated', 'Bureau libéré')], default='present', max_length=10)),
+                ('Id_Matricule', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='presences', to='ILIA.personne')),
+            ],
+            options={
+                'verbose_name': 'Présence journalière',
+                'verbose_name_plural': 'Présences journalières',
+                'ordering': ['Date'],
+                'indexes': [models.Index(fields=['Date', 'Statut'], name='reservation_Date_1894a2_idx')],
+                'unique_together': {('Id_Matricule', 'Date')},
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0005_presencejournaliere'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='liberationbureau',
+            index=models.Index(fields=['Id_bureau', 'Date'], name='reservation_Id_bure_b076c5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['Id_bureau', 'Debut', 'Fin'], name='reservation_Id_bure_add6c0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['Id_piece', 'Debut', 'Fin'], name='reservation_Id_piec_abd203_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['Debut', 'Fin'], name='reservation_Debut_74b759_idx'),
+        ),
+    ]
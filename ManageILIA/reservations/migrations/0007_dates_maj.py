@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0006_indexes_plages_horaires'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bureau',
+            name='Date_maj',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='personnereservation',
+            name='Date_maj',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='piece',
+            name='Date_maj',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='reservation',
+            name='Date_maj',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
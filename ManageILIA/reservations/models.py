@@ -14,6 +14,7 @@ class Piece(models.Model):
     Etage = models.IntegerField()
     Capacite = models.IntegerField(blank=True, null=True)
     Type = models.IntegerField(choices=TypePiece.choices, default=TypePiece.BUREAU)
+    Date_maj = models.DateTimeField(auto_now=True)  # Version des flux JSON du calendrier
 
     def __str__(self):
         return f"{self.Nom} - Etage {self.Etage}"
@@ -35,6 +36,7 @@ class Bureau(models.Model):
     Nom = models.CharField(max_length=100, blank=True, null=True)
     Type = models.IntegerField(choices=TypeBureau.choices, default=TypeBureau.LIBRE)
     Id_piece = models.ForeignKey(Piece, on_delete=models.CASCADE, related_name='bureaux')
+    Date_maj = models.DateTimeField(auto_now=True)
 
     def clean(self):
         """Valider que le nombre de bureaux ne dépasse pas la capacité de la pièce"""
@@ -80,6 +82,7 @@ class Reservation(models.Model):
     Id_Matricule = models.ForeignKey('ILIA.Personne', on_delete=models.CASCADE, related_name='reservations')
     Id_bureau = models.ForeignKey(Bureau, on_delete=models.SET_NULL, null=True, blank=True, related_name='reservations')
     Id_piece = models.ForeignKey(Piece, on_delete=models.SET_NULL, null=True, blank=True, related_name='reservations')
+    Date_maj = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.Nom} - {self.get_Type_display()} ({self.Debut.strftime('%d/%m/%Y %H:%M')})"
@@ -88,6 +91,12 @@ class Reservation(models.Model):
         verbose_name = "Réservation"
         verbose_name_plural = "Réservations"
         ordering = ['-Debut']
+        # Filtres des calendriers : Debut__lt / Fin__gt, par bureau, par salle ou tous locaux
+        indexes = [
+            models.Index(fields=['Id_bureau', 'Debut', 'Fin']),
+            models.Index(fields=['Id_piece', 'Debut', 'Fin']),
+            models.Index(fields=['Debut', 'Fin']),
+        ]
 
 class LiberationBureau(models.Model):
     """Modèle pour tracker les jours où un propriétaire libère son bureau"""
@@ -99,6 +108,7 @@ class LiberationBureau(models.Model):
 
     class Meta:
         unique_together = ('Id_Matricule', 'Id_bureau', 'Date')
+        indexes = [models.Index(fields=['Id_bureau', 'Date'])]
         verbose_name = "Libération de bureau"
         verbose_name_plural = "Libérations de bureau"
         ordering = ['-Date_creation']
@@ -106,11 +116,33 @@ class LiberationBureau(models.Model):
     def __str__(self):
         return f"{self.Id_Matricule} - {self.Id_bureau} ({self.Date})"
 
+class PresenceJournaliere(models.Model):
+    """Présence matérialisée : une ligne par (personne, jour) sur un horizon glissant"""
+    class TypeStatut(models.TextChoices):
+        PRESENT = 'present', "Sur place"
+        TELETRAVAIL = 'telework', "Télétravail"
+        LIBERE = 'liberated', "Bureau libéré"
+
+    Id_Matricule = models.ForeignKey('ILIA.Personne', on_delete=models.CASCADE, related_name='presences')
+    Date = models.DateField()
+    Statut = models.CharField(max_length=10, choices=TypeStatut.choices, default=TypeStatut.PRESENT)
+
+    class Meta:
+        unique_together = ('Id_Matricule', 'Date')
+        indexes = [models.Index(fields=['Date', 'Statut'])]
+        verbose_name = "Présence journalière"
+        verbose_name_plural = "Présences journalières"
+        ordering = ['Date']
+
+    def __str__(self):
+        return f"{self.Id_Matricule} - {self.Date} ({self.get_Statut_display()})"
+
 class PersonneReservation(models.Model):
     """Table de liaison pour les participants d'une réservation"""
     Id_Matricule = models.ForeignKey('ILIA.Personne', on_delete=models.CASCADE, related_name='participations_reservations')
     Id_reservation = models.ForeignKey(Reservation, on_delete=models.CASCADE, related_name='participants')
     Valide = models.BooleanField(default=False)
+    Date_maj = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.Id_Matricule} - {self.Id_reservation}"
@@ -0,0 +1,176 @@
+"""
+Moteur d'occupation des locaux.
+
+Charge en un nombre fixe de requêtes groupées tout ce qui est nécessaire
+pour afficher l'occupation d'une journée (bureaux, salles, propriétaires,
+télétravail, libérations et réservations), puis construit les créneaux
+de chaque local en mémoire.
+"""
+import datetime
+from collections import defaultdict
+
+from django.db.models import Q
+from django.utils import timezone
+
+from ILIA.binaires import differer_binaires
+from ILIA.models import Personne
+from .colors import get_bureau_color
+from .models import Piece, Bureau, Reservation
+from .presence import resoudre_presence
+
+
+HEURE_DEBUT = datetime.time(7, 0)
+HEURE_FIN = datetime.time(18, 0)
+COULEUR_BLOCAGE = '#95a5a6'
+COULEUR_SALLE = '#6366f1'
+
+
+def _creneau_reservation(res, start_of_day, end_of_day, color):
+    """Positionne une réservation dans la journée (en % de la plage 7h-18h)"""
+    res_debut_local = timezone.localtime(res.Debut) if timezone.is_aware(res.Debut) else res.Debut
+    res_fin_local = timezone.localtime(res.Fin) if timezone.is_aware(res.Fin) else res.Fin
+    if timezone.is_aware(res_debut_local): res_debut_local = res_debut_local.replace(tzinfo=None)
+    if timezone.is_aware(res_fin_local): res_fin_local = res_fin_local.replace(tzinfo=None)
+
+    debut_hour = max(res_debut_local, start_of_day)
+    fin_hour = min(res_fin_local, end_of_day)
+    start_minutes = (debut_hour.hour - 7) * 60 + debut_hour.minute
+    end_minutes = (fin_hour.hour - 7) * 60 + fin_hour.minute
+
+    left_percent = (start_minutes / 660) * 100
+    width_percent = ((end_minutes - start_minutes) / 660) * 100
+
+    return {
+        'reservation': res, 'is_blocked': False,
+        'left': left_percent, 'width': width_percent,
+        'debut_str': debut_hour.strftime('%H:%M'), 'fin_str': fin_hour.strftime('%H:%M'),
+        'color': color,
+    }
+
+
+def _proprietaires_par_bureau(bureau_ids, selected_date):
+    """
+    Retourne {id_bureau: [propriétaires présents et n'ayant pas libéré le bureau]}.
+    Trois requêtes : propriétaires, puis télétravail et libérations du jour.
+    """
+    proprietaires = list(
+        Personne.objects.filter(Id_bureau__in=bureau_ids)
+        .only('Id_Matricule', 'Nom', 'Prenom', 'user_id', 'Id_bureau_id')
+        .order_by('Id_Matricule')
+    )
+    if not proprietaires:
+        return {}
+
+    presence = resoudre_presence(proprietaires, selected_date, selected_date)
+
+    bloquants = defaultdict(list)
+    for prop in proprietaires:
+        if presence.occupe_son_bureau(prop, selected_date):
+            bloquants[prop.Id_bureau_id].append(prop)
+    return bloquants
+
+
+def build_locaux_data(selected_date, search_query=''):
+    """
+    Construit la liste `locaux_data` (bureaux puis salles) pour la journée
+    `selected_date`, sans tri. Le nombre de requêtes ne dépend pas du nombre
+    de locaux ni du nombre de propriétaires.
+    """
+    start_of_day = datetime.datetime.combine(selected_date, HEURE_DEBUT)
+    end_of_day = datetime.datetime.combine(selected_date, HEURE_FIN)
+
+    bureaux = Bureau.objects.select_related('Id_piece')
+    pieces = Piece.objects.filter(Type=Piece.TypePiece.SALLE_REUNION)
+
+    if search_query:
+        bureaux = bureaux.filter(
+            Q(Id_bureau__icontains=search_query) |
+            Q(Nom__icontains=search_query) |
+            Q(Id_piece__Nom__icontains=search_query) |
+            Q(personne__Nom__icontains=search_query) |
+            Q(personne__Prenom__icontains=search_query)
+        ).distinct()
+
+        pieces = pieces.filter(Nom__icontains=search_query)
+
+    bureaux = list(bureaux)
+    pieces = list(pieces)
+
+    bureau_ids = [b.Id_bureau for b in bureaux]
+    piece_ids = [p.Id_piece for p in pieces]
+
+    bloquants = _proprietaires_par_bureau(
+        [b.Id_bureau for b in bureaux if b.Type != Bureau.TypeBureau.OCCUPE],
+        selected_date,
+    )
+
+    # Une seule requête pour toutes les réservations de la journée
+    reservations_bureau = defaultdict(list)
+    reservations_piece = defaultdict(list)
+    if bureau_ids or piece_ids:
+        reservations = differer_binaires(Reservation.objects.filter(
+            Q(Id_bureau__in=bureau_ids) | Q(Id_piece__in=piece_ids),
+            Debut__lt=timezone.make_aware(end_of_day), Fin__gt=timezone.make_aware(start_of_day),
+        ).select_related('Id_Matricule').order_by('Debut'))
+
+        bureau_id_set = set(bureau_ids)
+        piece_id_set = set(piece_ids)
+        for res in reservations:
+            if res.Id_bureau_id in bureau_id_set:
+                reservations_bureau[res.Id_bureau_id].append(res)
+            if res.Id_piece_id in piece_id_set:
+                reservations_piece[res.Id_piece_id].append(res)
+
+    liste_bureaux = []
+    for bureau in bureaux:
+        creneaux = []
+        texte_blocage = ""
+
+        if bureau.Type == Bureau.TypeBureau.OCCUPE:
+            texte_blocage = "Bureau Occupé"
+        elif bloquants.get(bureau.Id_bureau):
+            prop = bloquants[bureau.Id_bureau][0]
+            texte_blocage = f"{prop.Prenom} {prop.Nom}"
+
+        if texte_blocage:
+            creneaux.append({
+                'is_blocked': True,
+                'owner_name': texte_blocage,
+                'left': 0, 'width': 100, 'debut_str': '07:00', 'fin_str': '18:00',
+                'color': COULEUR_BLOCAGE,
+            })
+        else:
+            color = get_bureau_color(bureau.Id_bureau)
+            creneaux = [
+                _creneau_reservation(res, start_of_day, end_of_day, color)
+                for res in reservations_bureau[bureau.Id_bureau]
+            ]
+
+        liste_bureaux.append({
+            'type': 'bureau',
+            'sort_type_val': bureau.Type,  # 0, 1, 2
+            'local': bureau,
+            'nom': bureau.Nom if bureau.Nom else f'Bureau {bureau.Id_bureau}',
+            'id': bureau.Id_bureau,
+            'piece': bureau.Id_piece,
+            'creneaux': creneaux,
+        })
+
+    liste_salles = []
+    for piece in pieces:
+        creneaux = [
+            _creneau_reservation(res, start_of_day, end_of_day, COULEUR_SALLE)
+            for res in reservations_piece[piece.Id_piece]
+        ]
+
+        liste_salles.append({
+            'type': 'salle',
+            'sort_type_val': -1,
+            'local': piece,
+            'nom': piece.Nom,
+            'id': piece.Id_piece,
+            'piece': piece,
+            'creneaux': creneaux,
+        })
+
+    return liste_bureaux + liste_salles
@@ -0,0 +1,220 @@
+"""
+Résolution groupée de la présence des personnes.
+
+Remplace les appels répétés à `est_en_presentiel` : pour un ensemble de
+personnes et une plage de dates, le télétravail récurrent et les
+libérations de bureau sont chargés en deux requêtes, puis la présence de
+chaque (personne, jour) est déduite en mémoire.
+
+La table `PresenceJournaliere` matérialise ce calcul sur un horizon
+glissant (commande `rafraichir_presence` + signaux) : lorsqu'elle couvre
+la plage demandée, une seule lecture indexée suffit.
+"""
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from timetable.models import RecurringTelework
+from .models import LiberationBureau, PresenceJournaliere
+
+
+PRESENT = PresenceJournaliere.TypeStatut.PRESENT
+TELETRAVAIL = PresenceJournaliere.TypeStatut.TELETRAVAIL
+LIBERE = PresenceJournaliere.TypeStatut.LIBERE
+
+
+def horizon_presence():
+    """Plage (début, fin) matérialisée dans PresenceJournaliere : aujourd'hui + N jours"""
+    debut = timezone.localdate()
+    jours = getattr(settings, 'PRESENCE_HORIZON_JOURS', 90)
+    return debut, debut + datetime.timedelta(days=jours - 1)
+
+
+def jours_entre(debut, fin):
+    """Génère chaque date de `debut` à `fin` (incluses)"""
+    jour = debut
+    while jour <= fin:
+        yield jour
+        jour += datetime.timedelta(days=1)
+
+
+def jours_de_la_semaine(jour_semaine, debut, fin):
+    """Génère les dates entre `debut` et `fin` (incluses) tombant un `jour_semaine` donné"""
+    jour = debut + datetime.timedelta(days=(jour_semaine - debut.weekday()) % 7)
+    while jour <= fin:
+        yield jour
+        jour += datetime.timedelta(days=7)
+
+
+class MatricePresence:
+    """
+    Matrice personne × jour → PRESENT / TELETRAVAIL / LIBERE.
+
+    Une personne en télétravail est TELETRAVAIL même si elle a aussi libéré
+    son bureau ; une personne sur place ayant libéré son bureau est LIBERE.
+    """
+
+    def __init__(self, debut, fin, teletravail, liberations):
+        self.debut = debut
+        self.fin = fin
+        # {Id_Matricule: set(dates)}
+        self.teletravail = teletravail
+        self.liberations = liberations
+
+    def statut(self, personne, jour):
+        matricule = personne.Id_Matricule
+        if jour in self.teletravail.get(matricule, ()):
+            return TELETRAVAIL
+        if jour in self.liberations.get(matricule, ()):
+            return LIBERE
+        return PRESENT
+
+    def est_present(self, personne, jour):
+        """True si la personne est sur place (qu'elle ait libéré son bureau ou non)"""
+        return self.statut(personne, jour) != TELETRAVAIL
+
+    def occupe_son_bureau(self, personne, jour):
+        """True si la personne est sur place et n'a pas libéré son bureau"""
+        return self.statut(personne, jour) == PRESENT
+
+    def jours_occupes(self, personne):
+        """Ensemble des jours de la plage où la personne occupe son bureau"""
+        matricule = personne.Id_Matricule
+        return (
+            set(jours_entre(self.debut, self.fin))
+            - self.teletravail.get(matricule, set())
+            - self.liberations.get(matricule, set())
+        )
+
+
+def calculer_presence(personnes, debut, fin):
+    """
+    Calcule la présence de `personnes` pour chaque jour de `debut` à `fin`
+    (dates incluses) à partir des règles de télétravail et des libérations,
+    en deux requêtes au plus, quel que soit le nombre de personnes ou de jours.
+
+    Seules les libérations du bureau actuellement attribué (`Id_bureau`)
+    sont prises en compte.
+    """
+    personnes = list(personnes)
+    teletravail = {}
+    liberations = {}
+
+    matricules_par_user = {p.user_id: p.Id_Matricule for p in personnes if p.user_id}
+    if matricules_par_user:
+        regles = RecurringTelework.objects.filter(
+            schedule__user_id__in=matricules_par_user,
+            day_of_week__isnull=False,
+            start_date__lte=fin,
+            end_date__gte=debut,
+        ).values_list('schedule__user_id', 'day_of_week', 'start_date', 'end_date')
+
+        for user_id, jour_semaine, start_date, end_date in regles:
+            jours = teletravail.setdefault(matricules_par_user[user_id], set())
+            jours.update(jours_de_la_semaine(jour_semaine, max(start_date, debut), min(end_date, fin)))
+
+    bureau_par_matricule = {p.Id_Matricule: p.Id_bureau_id for p in personnes if p.Id_bureau_id}
+    if bureau_par_matricule:
+        lignes = LiberationBureau.objects.filter(
+            Id_Matricule__in=bureau_par_matricule,
+            Date__gte=debut,
+            Date__lte=fin,
+        ).values_list('Id_Matricule_id', 'Id_bureau_id', 'Date')
+
+        for matricule, bureau_id, jour in lignes:
+            if bureau_par_matricule[matricule] == bureau_id:
+                liberations.setdefault(matricule, set()).add(jour)
+
+    return MatricePresence(debut, fin, teletravail, liberations)
+
+
+def lire_presence(matricules, debut, fin):
+    """
+    Lit la présence matérialisée (une requête indexée). Retourne None si la
+    table ne contient pas une ligne pour chaque (personne, jour) demandé.
+    """
+    nb_jours = (fin - debut).days + 1
+    lignes = list(
+        PresenceJournaliere.objects.filter(
+            Id_Matricule__in=matricules,
+            Date__gte=debut,
+            Date__lte=fin,
+        ).values_list('Id_Matricule_id', 'Date', 'Statut')
+    )
+    if len(lignes) != len(matricules) * nb_jours:
+        return None
+
+    teletravail = {}
+    liberations = {}
+    for matricule, jour, statut in lignes:
+        if statut == TELETRAVAIL:
+            teletravail.setdefault(matricule, set()).add(jour)
+        elif statut == LIBERE:
+            liberations.setdefault(matricule, set()).add(jour)
+    return MatricePresence(debut, fin, teletravail, liberations)
+
+
+def resoudre_presence(personnes, debut, fin):
+    """
+    Présence de `personnes` de `debut` à `fin` : lue dans PresenceJournaliere
+    si la plage est dans l'horizon matérialisé, sinon recalculée.
+    """
+    personnes = list(personnes)
+    matricules = {p.Id_Matricule for p in personnes}
+    if not matricules:
+        return MatricePresence(debut, fin, {}, {})
+
+    horizon_debut, horizon_fin = horizon_presence()
+    if horizon_debut <= debut and fin <= horizon_fin:
+        matrice = lire_presence(matricules, debut, fin)
+        if matrice is not None:
+            return matrice
+    return calculer_presence(personnes, debut, fin)
+
+
+def materialiser_presence(personnes, debut=None, fin=None):
+    """
+    Recalcule et réécrit les lignes PresenceJournaliere de `personnes` entre
+    `debut` et `fin` (par défaut tout l'horizon). Retourne le nombre de lignes écrites.
+    """
+    horizon_debut, horizon_fin = horizon_presence()
+    debut = max(debut or horizon_debut, horizon_debut)
+    fin = min(fin or horizon_fin, horizon_fin)
+    personnes = list(personnes)
+    if not personnes or debut > fin:
+        return 0
+
+    matrice = calculer_presence(personnes, debut, fin)
+    lignes = [
+        PresenceJournaliere(Id_Matricule_id=p.Id_Matricule, Date=jour, Statut=matrice.statut(p, jour))
+        for p in personnes
+        for jour in jours_entre(debut, fin)
+    ]
+    with transaction.atomic():
+        PresenceJournaliere.objects.filter(
+            Id_Matricule__in=[p.Id_Matricule for p in personnes],
+            Date__gte=debut,
+            Date__lte=fin,
+        ).delete()
+        PresenceJournaliere.objects.bulk_create(lignes, batch_size=1000)
+    return len(lignes)
+
+
+def annoter_teletravail(personnes, jour):
+    """
+    Annote un queryset de Personne avec `en_teletravail` (booléen) pour `jour`,
+    calculé par une sous-requête EXISTS : aucune requête supplémentaire par personne.
+    """
+    return personnes.annotate(
+        en_teletravail=Exists(
+            RecurringTelework.objects.filter(
+                schedule__user=OuterRef('user'),
+                day_of_week=jour.weekday(),
+                start_date__lte=jour,
+                end_date__gte=jour,
+            )
+        )
+    )
@@ -0,0 +1,76 @@
+"""
+Mise à jour incrémentale de PresenceJournaliere lorsque les données
+dont dépend la présence changent.
+"""
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from ILIA.models import Personne
+from timetable.models import RecurringTelework
+from .models import LiberationBureau
+from .presence import materialiser_presence
+
+
+@receiver(post_save, sender=RecurringTelework)
+@receiver(post_delete, sender=RecurringTelework)
+def teletravail_modifie(sender, instance, raw=False, **kwargs):
+    """Une règle peut avoir changé de jour ou de plage : tout l'horizon est recalculé"""
+    if raw:
+        return
+    personnes = Personne.objects.filter(user__personalschedule__id=instance.schedule_id)
+    materialiser_presence(personnes)
+
+
+@receiver(pre_save, sender=LiberationBureau)
+def memoriser_ancienne_liberation(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        return
+    instance._ancienne_liberation = (
+        LiberationBureau.objects.filter(pk=instance.pk)
+        .values_list('Id_Matricule_id', 'Id_bureau_id', 'Date').first()
+    )
+
+
+@receiver(post_save, sender=LiberationBureau)
+@receiver(post_delete, sender=LiberationBureau)
+def liberation_modifiee(sender, instance, raw=False, **kwargs):
+    """Le jour libéré est recalculé, ainsi que l'ancien si la date, la personne ou le bureau ont changé"""
+    if raw:
+        return
+    jours = {(instance.Id_Matricule_id, instance.Date)}
+    ancienne = getattr(instance, '_ancienne_liberation', None)
+    if ancienne:
+        matricule, _, date = ancienne
+        jours.add((matricule, date))
+        instance._ancienne_liberation = None
+    personnes = {p.pk: p for p in Personne.objects.filter(pk__in={m for m, _ in jours})}
+    for matricule, date in jours:
+        if matricule in personnes:
+            materialiser_presence([personnes[matricule]], date, date)
+
+
+CHAMPS_PRESENCE = ('Id_bureau_id', 'user_id')
+
+
+@receiver(pre_save, sender=Personne)
+def memoriser_ancienne_presence(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Bureau et utilisateur (règles de télétravail) avant enregistrement, si l'enregistrement peut les changer"""
+    instance._ancienne_presence = None
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and not {'Id_bureau', 'Id_bureau_id', 'user', 'user_id'} & set(update_fields):
+        return
+    instance._ancienne_presence = (
+        Personne.objects.filter(pk=instance.pk).values(*CHAMPS_PRESENCE).first()
+    )
+
+
+@receiver(post_save, sender=Personne)
+def personne_modifiee(sender, instance, created=False, raw=False, **kwargs):
+    """Nouvelle personne, changement de bureau ou d'utilisateur : libérations et télétravail applicables changent"""
+    if raw:
+        return
+    ancienne = getattr(instance, '_ancienne_presence', None)
+    instance._ancienne_presence = None
+    if created or (ancienne and any(ancienne[c] != getattr(instance, c) for c in CHAMPS_PRESENCE)):
+        materialiser_presence([instance])
@@ -1,3 +1,327 @@
+import datetime
+import os
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ILIA.models import Personne
+from timetable.models import PersonalSchedule, RecurringTelework
+from .models import Piece, Bureau, Reservation, LiberationBureau, PresenceJournaliere
+from .occupancy import build_locaux_data
+from .conflicts import IndexIntervalles, creer_reservations
+from .presence import resoudre_presence, PRESENT, TELETRAVAIL, LIBERE
+
+
+class OccupationLocauxTest(TestCase):
+    """Le moteur d'occupation doit garder un nombre de requêtes constant."""
+
+    def setUp(self):
+        self.jour = datetime.date(2025, 3, 3)  # un lundi
+        self.matricule = 100000
+
+    def creer_etage(self, nb_bureaux):
+        piece = Piece.objects.create(Nom=f"Open space {nb_bureaux}", Etage=1)
+        salle = Piece.objects.create(Nom=f"Salle {nb_bureaux}", Etage=1, Type=Piece.TypePiece.SALLE_REUNION)
+        for i in range(nb_bureaux):
+            bureau = Bureau.objects.create(Nom=f"B{nb_bureaux}-{i}", Id_piece=piece, Type=Bureau.TypeBureau.PARTAGEABLE)
+            self.matricule += 1
+            user = User.objects.create(username=f"user{self.matricule}")
+            proprietaire = Personne.objects.create(
+                Id_Matricule=self.matricule, Nom="Nom", Prenom=f"P{self.matricule}",
+                Email=f"{self.matricule}@ilia.be", Id_bureau=bureau, user=user,
+            )
+            schedule = PersonalSchedule.objects.create(user=user)
+            if i % 2:
+                RecurringTelework.objects.create(
+                    schedule=schedule, day_of_week=self.jour.weekday(),
+                    start_date=self.jour, end_date=self.jour,
+                )
+            debut = timezone.make_aware(datetime.datetime.combine(self.jour, datetime.time(9, 0)))
+            Reservation.objects.create(
+                Nom="Réunion", Type=Reservation.TypeReservation.REUNION,
+                Debut=debut, Fin=debut + datetime.timedelta(hours=1),
+                Id_Matricule=proprietaire, Id_piece=salle,
+            )
+        return piece
+
+    def test_nombre_de_requetes_constant(self):
+        self.creer_etage(2)
+        with self.assertNumQueries(6):
+            petit = build_locaux_data(self.jour)
+
+        self.creer_etage(20)
+        with self.assertNumQueries(6):
+            grand = build_locaux_data(self.jour)
+
+        self.assertEqual(len(petit), 3)
+        self.assertEqual(len(grand), 24)
+
+    def test_blocage_proprietaire(self):
+        self.creer_etage(2)
+        present, teletravail = Personne.objects.order_by('Id_Matricule')[:2]
+
+        data = {item['id']: item for item in build_locaux_data(self.jour) if item['type'] == 'bureau'}
+        self.assertTrue(data[present.Id_bureau_id]['creneaux'][0]['is_blocked'])
+        self.assertEqual(data[teletravail.Id_bureau_id]['creneaux'], [])
+
+        LiberationBureau.objects.create(Id_Matricule=present, Id_bureau=present.Id_bureau, Date=self.jour)
+        data = {item['id']: item for item in build_locaux_data(self.jour) if item['type'] == 'bureau'}
+        self.assertEqual(data[present.Id_bureau_id]['creneaux'], [])
+
+
+class PresenceTest(TestCase):
+    """La matrice de présence est calculée en deux requêtes."""
+
+    def test_matrice_presence(self):
+        lundi = datetime.date(2025, 3, 3)
+        piece = Piece.objects.create(Nom="Open space", Etage=1)
+        bureau = Bureau.objects.create(Id_piece=piece, Type=Bureau.TypeBureau.PARTAGEABLE)
+        personnes = []
+        for i in range(5):
+            user = User.objects.create(username=f"presence{i}")
+            personnes.append(Personne.objects.create(
+                Id_Matricule=200000 + i, Nom="Nom", Prenom=f"P{i}",
+                Email=f"presence{i}@ilia.be", Id_bureau=bureau, user=user,
+            ))
+            schedule = PersonalSchedule.objects.create(user=user)
+            RecurringTelework.objects.create(
+                schedule=schedule, day_of_week=i,
+                start_date=lundi, end_date=lundi + datetime.timedelta(days=30),
+            )
+        LiberationBureau.objects.create(Id_Matricule=personnes[0], Id_bureau=bureau, Date=lundi + datetime.timedelta(days=1))
+
+        with self.assertNumQueries(2):
+            presence = resoudre_presence(personnes, lundi, lundi + datetime.timedelta(days=13))
+
+        self.assertEqual(presence.statut(personnes[0], lundi), TELETRAVAIL)
+        self.assertEqual(presence.statut(personnes[0], lundi + datetime.timedelta(days=7)), TELETRAVAIL)
+        self.assertEqual(presence.statut(personnes[0], lundi + datetime.timedelta(days=1)), LIBERE)
+        self.assertEqual(presence.statut(personnes[1], lundi), PRESENT)
+        self.assertEqual(presence.statut(personnes[1], lundi + datetime.timedelta(days=1)), TELETRAVAIL)
+
+
+class PresenceJournaliereTest(TestCase):
+    """La table matérialisée suit les modifications et sert les lectures en une requête."""
+
+    def setUp(self):
+        self.jour = timezone.localdate()
+        piece = Piece.objects.create(Nom="Open space", Etage=1)
+        self.bureau = Bureau.objects.create(Id_piece=piece, Type=Bureau.TypeBureau.PARTAGEABLE)
+        self.user = User.objects.create(username="materialise")
+        self.personne = Personne.objects.create(
+            Id_Matricule=300000, Nom="Nom", Prenom="Prenom",
+            Email="materialise@ilia.be", Id_bureau=self.bureau, user=self.user,
+        )
+        self.schedule = PersonalSchedule.objects.create(user=self.user)
+
+    def statut(self):
+        return PresenceJournaliere.objects.get(Id_Matricule=self.personne, Date=self.jour).Statut
+
+    def test_signaux(self):
+        self.assertEqual(self.statut(), PRESENT)
+
+        regle = RecurringTelework.objects.create(
+            schedule=self.schedule, day_of_week=self.jour.weekday(),
+            start_date=self.jour, end_date=self.jour + datetime.timedelta(days=14),
+        )
+        self.assertEqual(self.statut(), TELETRAVAIL)
+
+        regle.delete()
+        LiberationBureau.objects.create(Id_Matricule=self.personne, Id_bureau=self.bureau, Date=self.jour)
+        self.assertEqual(self.statut(), LIBERE)
+
+        self.personne.Id_bureau = None
+        self.personne.save()
+        self.assertEqual(self.statut(), PRESENT)
+
+    def test_changement_d_utilisateur(self):
+        autre = User.objects.create(username="teletravailleur")
+        RecurringTelework.objects.create(
+            schedule=PersonalSchedule.objects.create(user=autre), day_of_week=self.jour.weekday(),
+            start_date=self.jour, end_date=self.jour + datetime.timedelta(days=14),
+        )
+        self.assertEqual(self.statut(), PRESENT)
+
+        self.personne.user = autre
+        self.personne.save()
+        self.assertEqual(self.statut(), TELETRAVAIL)
+
+        # Enregistrement sans rapport avec la présence : pas de relecture de la personne
+        self.personne.Nom = "Renommé"
+        with self.assertNumQueries(1):
+            self.personne.save(update_fields=['Nom'])
+
+    def test_liberation_deplacee(self):
+        demain = self.jour + datetime.timedelta(days=1)
+        liberation = LiberationBureau.objects.create(Id_Matricule=self.personne, Id_bureau=self.bureau, Date=self.jour)
+        self.assertEqual(self.statut(), LIBERE)
+
+        liberation.Date = demain
+        liberation.save()
+        self.assertEqual(self.statut(), PRESENT)
+        self.assertEqual(
+            PresenceJournaliere.objects.get(Id_Matricule=self.personne, Date=demain).Statut, LIBERE,
+        )
+
+    def test_lecture_materialisee(self):
+        LiberationBureau.objects.create(Id_Matricule=self.personne, Id_bureau=self.bureau, Date=self.jour)
+        with self.assertNumQueries(1):
+            presence = resoudre_presence([self.personne], self.jour, self.jour + datetime.timedelta(days=6))
+        self.assertEqual(presence.statut(self.personne, self.jour), LIBERE)
+
+    def test_commande(self):
+        PresenceJournaliere.objects.all().delete()
+        PresenceJournaliere.objects.create(Id_Matricule=self.personne, Date=self.jour - datetime.timedelta(days=1))
+        call_command('rafraichir_presence', stdout=open(os.devnull, 'w'))
+        self.assertFalse(PresenceJournaliere.objects.filter(Date__lt=self.jour).exists())
+        self.assertEqual(PresenceJournaliere.objects.filter(Id_Matricule=self.personne).count(), 90)
+
+
+class BureauEventsJsonTest(TestCase):
+    """Les blocages d'un bureau coûtent le même nombre de requêtes sur un jour ou sur un an."""
+
+    def setUp(self):
+        piece = Piece.objects.create(Nom="Open space", Etage=1)
+        self.bureau = Bureau.objects.create(Id_piece=piece, Type=Bureau.TypeBureau.PARTAGEABLE)
+        user = User.objects.create_user("calendrier", password="secret")
+        self.proprietaire = Personne.objects.create(
+            Id_Matricule=400000, Nom="Nom", Prenom="Prenom",
+            Email="calendrier@ilia.be", Id_bureau=self.bureau, user=user,
+        )
+        RecurringTelework.objects.create(
+            schedule=PersonalSchedule.objects.create(user=user), day_of_week=0,
+            start_date=datetime.date(2025, 1, 1), end_date=datetime.date(2025, 12, 31),
+        )
+        LiberationBureau.objects.create(Id_Matricule=self.proprietaire, Id_bureau=self.bureau, Date=datetime.date(2025, 3, 4))
+        self.client.login(username="calendrier", password="secret")
+
+    def blocages(self, start, end):
+        url = reverse('reservations:bureau_events_json', args=[self.bureau.pk])
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, {'start': start, 'end': end})
+        jours = [e['start'][:10] for e in response.json() if e.get('display') == 'background']
+        return len(ctx.captured_queries), jours
+
+    def test_fenetre(self):
+        requetes_semaine, jours = self.blocages('2025-03-03T00:00:00', '2025-03-09T00:00:00')
+        # lundi en télétravail, mardi libéré
+        self.assertEqual(jours, ['2025-03-05', '2025-03-06', '2025-03-07', '2025-03-08', '2025-03-09'])
+
+        requetes_annee, jours = self.blocages('2025-01-01T00:00:00', '2025-12-31T00:00:00')
+        self.assertEqual(requetes_semaine, requetes_annee)
+        self.assertEqual(len(jours), 365 - 52 - 1)
+
+
+class FluxConditionnelsTest(TestCase):
+    """Un flux inchangé répond 304 après une seule requête de version."""
+
+    def setUp(self):
+        piece = Piece.objects.create(Nom="Open space", Etage=1)
+        self.bureau = Bureau.objects.create(Id_piece=piece, Type=Bureau.TypeBureau.PARTAGEABLE)
+        user = User.objects.create_user("sondage", password="secret")
+        self.personne = Personne.objects.create(
+            Id_Matricule=410000, Nom="Nom", Prenom="Prenom", Email="sondage@ilia.be", Id_bureau=self.bureau, user=user,
+        )
+        self.reservation = Reservation.objects.create(
+            Nom="Réunion", Id_Matricule=self.personne, Id_bureau=self.bureau, Id_piece=piece,
+            Debut=timezone.make_aware(datetime.datetime(2025, 3, 4, 9)),
+            Fin=timezone.make_aware(datetime.datetime(2025, 3, 4, 10)),
+        )
+        self.client.login(username="sondage", password="secret")
+        self.fenetre = {'start': '2025-03-03T00:00:00', 'end': '2025-03-10T00:00:00'}
+
+    def interroger(self, url, etag=None):
+        entetes = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, self.fenetre, **entetes)
+        return response, len(ctx.captured_queries)
+
+    def verifier(self, url, modifier):
+        response, _ = self.interroger(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('no-cache', response['Cache-Control'])
+
+        response, requetes = self.interroger(url, etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(requetes, 3)  # session, utilisateur, version
+
+        modifier()
+        response, _ = self.interroger(url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_reservations(self):
+        def deplacer():
+            self.reservation.Nom = "Réunion d'équipe"
+            self.reservation.save()
+        self.verifier(reverse('reservations:events_json'), deplacer)
+
+    def test_bureau(self):
+        def liberer():
+            LiberationBureau.objects.create(Id_Matricule=self.personne, Id_bureau=self.bureau,
+                                            Date=datetime.date(2025, 3, 5))
+        self.verifier(reverse('reservations:bureau_events_json', args=[self.bureau.pk]), liberer)
+
+    def test_personne_renommee(self):
+        urls = [
+            reverse('reservations:events_json'),
+            reverse('reservations:bureau_events_json', args=[self.bureau.pk]),
+            reverse('reservations:piece_events_json', args=[self.reservation.Id_piece_id]),
+        ]
+        for i, url in enumerate(urls):
+            def renommer():
+                self.personne.Nom = f"Renomme {i}"
+                self.personne.save()
+            with self.subTest(url=url):
+                self.verifier(url, renommer)
+                self.assertContains(self.client.get(url, self.fenetre), f"Renomme {i}")
+
+    def test_suppression(self):
+        url = reverse('reservations:piece_events_json', args=[self.reservation.Id_piece_id])
+        self.verifier(url, self.reservation.delete)
+
+
+class ConflitsReservationTest(TestCase):
+    """Une récurrence est vérifiée et insérée en un nombre fixe de requêtes."""
+
+    def setUp(self):
+        self.salle = Piece.objects.create(Nom="Salle", Etage=1, Type=Piece.TypePiece.SALLE_REUNION)
+        self.personne = Personne.objects.create(Id_Matricule=500000, Nom="Nom", Prenom="Prenom", Email="conflit@ilia.be")
+        self.debut = timezone.make_aware(datetime.datetime(2025, 3, 3, 9, 0))
+
+    def occurrences(self, nombre, decalage=0):
+        semaine = datetime.timedelta(weeks=1)
+        debut = self.debut + datetime.timedelta(days=decalage)
+        return [(debut + semaine * i, debut + semaine * i + datetime.timedelta(hours=1)) for i in range(nombre)]
+
+    def test_index_intervalles(self):
+        h = lambda heure: self.debut.replace(hour=heure)
+        index = IndexIntervalles([(h(9), h(10)), (h(8), h(12)), (h(14), h(15))])
+        self.assertTrue(index.chevauche(h(11), h(13)))
+        self.assertFalse(index.chevauche(h(12), h(14)))
+        index.ajouter(h(12), h(14))
+        self.assertTrue(index.chevauche(h(13), h(14)))
+
+    def test_recurrence(self):
+        Reservation.objects.create(
+            Nom="Existante", Debut=self.debut + datetime.timedelta(weeks=2, minutes=30),
+            Fin=self.debut + datetime.timedelta(weeks=2, hours=2),
+            Id_Matricule=self.personne, Id_piece=self.salle,
+        )
+        with CaptureQueriesContext(connection) as petit:
+            creer_reservations(self.occurrences(3, decalage=1), "Petite", 0, self.personne, piece=self.salle)
+        with CaptureQueriesContext(connection) as grand:
+            creees, conflits = creer_reservations(self.occurrences(52), "Grande", 0, self.personne, piece=self.salle)
 
-# Create your tests here.
+        self.assertEqual(len(petit.captured_queries), len(grand.captured_queries))
+        self.assertEqual(len(creees), 51)
+        self.assertEqual(conflits, [self.occurrences(52)[2]])
+        self.assertEqual(self.personne.participations_reservations.filter(Valide=True).count(), 54)
@@ -7,40 +7,18 @@ from django.core.serializers.json import DjangoJSONEncoder
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_POST
 from .models import Piece, Bureau, Reservation, PersonneReservation, LiberationBureau
+from timetable.models import RecurringTelework
 import datetime
+from ILIA.binaires import differer_binaires
+from ILIA.conditionnel import derniere_maj, flux_versionne, nombre, somme, version_agregats, version_ligne
 from ILIA.models import Personne
 from django.utils.dateparse import parse_datetime
-from django.db.models import Q
-from timetable.models import PersonalSchedule, RecurringTelework
+from django.db.models import Count, F, Max, Q
 from .forms import ReservationBureauRapideForm
-
-
-BUREAU_COLORS = [
-    "#0D47A1", "#2962FF", "#00838F", "#00ACC1",
-    "#1B5E20", "#43A047", "#7CB342",
-    "#EF6C00", "#F4511E", "#FF7043",
-    "#B71C1C", "#E53935", "#FF5252",
-    "#4A148C", "#8E24AA", "#BA68C8",
-    "#004D40", "#00796B", "#26A69A",
-    "#9E9D24", "#FDD835", "#FBC02D",
-]
-
-PIECE_COLORS = [
-    "#0D47A1", "#1976D2", "#42A5F5", "#90CAF9",
-    "#01579B", "#0288D1", "#4FC3F7", "#81D4FA",
-    "#283593", "#3F51B5", "#5C6BC0", "#9FA8DA",
-    "#6A1B9A", "#8E24AA", "#AB47BC", "#CE93D8",
-]
-
-
-def get_bureau_color(bureau_id):
-    """Retourne une couleur unique pour chaque bureau basée sur son ID"""
-    return BUREAU_COLORS[bureau_id % len(BUREAU_COLORS)]
-
-
-def get_piece_color(piece_id):
-    """Retourne une couleur unique pour chaque pièce/salle basée sur son ID"""
-    return PIECE_COLORS[piece_id % len(PIECE_COLORS)]
+from .colors import get_bureau_color, get_piece_color
+from .occupancy import build_locaux_data
+from .presence import resoudre_presence, jours_entre
+from .conflicts import a_conflit, creer_reservations
 
 
 def _parse_iso(dt_str):
@@ -69,44 +47,30 @@ def _parse_iso(dt_str):
         return None
 
 
-def est_en_presentiel(personne, date_verif):
-    """
-    Retourne True si personne est au bureau.
-    Retourne False si en télétravail.
-    """
-    if not personne or not hasattr(personne, 'user'):
-        return True
-    try:
-        schedule = PersonalSchedule.objects.get(user=personne.user)
-        jour_semaine = date_verif.weekday()
-
-        teletravail = RecurringTelework.objects.filter(
-            schedule=schedule,
-            day_of_week=jour_semaine,
-            start_date__lte=date_verif,
-            end_date__gte=date_verif,
-        ).exists()
+def _reservations_fenetre(request, qs):
+    """`qs` restreint à la fenêtre start / end de FullCalendar, si elle est donnée"""
+    start_dt = _parse_iso(request.GET.get('start'))
+    end_dt = _parse_iso(request.GET.get('end'))
+    if start_dt and end_dt:
+        qs = qs.filter(Debut__lt=end_dt, Fin__gt=start_dt)
+    return qs
 
-        if teletravail:
-            return False
-    except PersonalSchedule.DoesNotExist:
-        return True
 
-    return True
+def _version_reservations(request):
+    return version_agregats(
+        _reservations_fenetre(request, Reservation.objects.all()),
+        n=Count('pk'), maj=Max('Date_maj'), bureau=Max('Id_bureau__Date_maj'), piece=Max('Id_piece__Date_maj'),
+        personne=Max('Id_Matricule__Date_maj'),  # Nom et email de l'organisateur
+    )
 
 
 @login_required
+@flux_versionne(_version_reservations)
 def events_json(request):
     """Retourne les réservations sous forme d'événements JSON pour FullCalendar."""
-    start = request.GET.get('start')
-    end = request.GET.get('end')
-
-    start_dt = _parse_iso(start) if start else None
-    end_dt = _parse_iso(end) if end else None
-
-    qs = Reservation.objects.select_related('Id_bureau', 'Id_piece', 'Id_Matricule')
-    if start_dt and end_dt:
-        qs = qs.filter(Debut__lt=end_dt, Fin__gt=start_dt)
+    qs = _reservations_fenetre(
+        request, differer_binaires(Reservation.objects.select_related('Id_bureau', 'Id_piece', 'Id_Matricule'))
+    )
 
     events = []
     for r in qs:
@@ -157,7 +121,16 @@ def events_json(request):
     return JsonResponse(events, safe=False)
 
 
+def _version_locaux(request):
+    return version_agregats(
+        Piece.objects.all(),
+        n=Count('pk', distinct=True), maj=Max('Date_maj'),
+        n_bureaux=Count('bureaux', distinct=True), maj_bureaux=Max('bureaux__Date_maj'),
+    )
+
+
 @login_required
+@flux_versionne(_version_locaux)
 def locations_json(request):
     """Retourne les locations disponibles (bureaux et salles)."""
     bureaux = Bureau.objects.filter(Type__in=[Bureau.TypeBureau.LIBRE, Bureau.TypeBureau.PARTAGEABLE]).select_related(
@@ -243,28 +216,19 @@ def create_reservation_api(request):
         except Bureau.DoesNotExist:
             return JsonResponse({'error': 'Bureau introuvable'}, status=400)
 
-        proprietaires = loc_bureau.personne_set.all()
+        proprietaires = [p for p in loc_bureau.personne_set.all() if p.Id_Matricule != personne.Id_Matricule]
+        presence = resoudre_presence(proprietaires, debut_dt.date(), fin_dt.date())
 
         for proprietaire in proprietaires:
-            if proprietaire.Id_Matricule == personne.Id_Matricule:
-                continue
-
             current_check = debut_dt.date()
             end_check = fin_dt.date()
 
             while current_check <= end_check:
-                if is_presentiel:
-                    has_liberation = LiberationBureau.objects.filter(
-                        Id_Matricule=proprietaire,
-                        Id_bureau=loc_bureau,
-                        Date=current_check
-                    ).exists()
-
-                    # Si le propriétaire est présent ET n'a PAS libéré le bureau
-                    if not has_liberation:
-                        return JsonResponse({
-                            'error': f"Ce bureau est assigné à {proprietaire} qui est présent(e) le {current_check.strftime('%d/%m')} et n'a pas libéré son bureau."
-                        }, status=400)
+                # Si le propriétaire est présent ET n'a PAS libéré le bureau
+                if presence.occupe_son_bureau(proprietaire, current_check):
+                    return JsonResponse({
+                        'error': f"Ce bureau est assigné à {proprietaire} qui est présent(e) le {current_check.strftime('%d/%m')} et n'a pas libéré son bureau."
+                    }, status=400)
                 current_check += datetime.timedelta(days=1)
 
         if loc_bureau.Type == Bureau.TypeBureau.OCCUPE:
@@ -293,39 +257,14 @@ def create_reservation_api(request):
         except:
             nb_repetitions = 1
 
-        created_count = 0
-        conflict_dates = []
-
-        for i in range(nb_repetitions):
-            current_debut = debut_dt + (increment * i)
-            current_fin = current_debut + duree
-
-            if str(typ) == '1':
-                conflicts = Reservation.objects.filter(Id_bureau=loc_bureau, Debut__lt=current_fin,
-                                                       Fin__gt=current_debut)
-            else:
-                conflicts = Reservation.objects.filter(Id_piece=loc_piece, Debut__lt=current_fin, Fin__gt=current_debut)
-
-            if not conflicts.exists():
-                r = Reservation(
-                    Nom=nom,
-                    Type=int(typ),
-                    Debut=current_debut,
-                    Fin=current_fin,
-                    Id_Matricule=personne,
-                    Id_bureau=loc_bureau if str(typ) == '1' else None,
-                    Id_piece=loc_bureau.Id_piece if (str(typ) == '1' and loc_bureau) else (
-                        loc_piece if str(typ) != '1' else None),
-                )
-                r.save()
-                PersonneReservation.objects.get_or_create(
-                    Id_Matricule=personne,
-                    Id_reservation=r,
-                    defaults={'Valide': True}
-                )
-                created_count += 1
-            else:
-                conflict_dates.append(current_debut.strftime('%Y-%m-%d %H:%M'))
+        occurrences = [
+            (debut_dt + (increment * i), debut_dt + (increment * i) + duree)
+            for i in range(nb_repetitions)
+        ]
+        # Une requête pour tous les conflits, une insertion groupée pour les créneaux libres
+        creees, conflits = creer_reservations(occurrences, nom, int(typ), personne, loc_bureau, loc_piece)
+        created_count = len(creees)
+        conflict_dates = [current_debut.strftime('%Y-%m-%d %H:%M') for current_debut, _ in conflits]
 
         message = f'{created_count} réservation(s) créée(s)'
         if conflict_dates:
@@ -335,31 +274,13 @@ def create_reservation_api(request):
 
     else:
         # Réservation simple
-        if str(typ) == '1':
-            conflicts = Reservation.objects.filter(Id_bureau=loc_bureau, Debut__lt=fin_dt, Fin__gt=debut_dt)
-            if conflicts.exists():
+        creees, conflits = creer_reservations([(debut_dt, fin_dt)], nom, int(typ), personne, loc_bureau, loc_piece)
+        if conflits:
+            if str(typ) == '1':
                 return JsonResponse({'error': 'Plage horaire occupée pour ce bureau.'}, status=400)
-        else:
-            conflicts = Reservation.objects.filter(Id_piece=loc_piece, Debut__lt=fin_dt, Fin__gt=debut_dt)
-            if conflicts.exists():
-                return JsonResponse({'error': 'Plage horaire occupée pour cette salle.'}, status=400)
+            return JsonResponse({'error': 'Plage horaire occupée pour cette salle.'}, status=400)
 
-        r = Reservation(
-            Nom=nom,
-            Type=int(typ),
-            Debut=debut_dt,
-            Fin=fin_dt,
-            Id_Matricule=personne,
-            Id_bureau=loc_bureau if str(typ) == '1' else None,
-            Id_piece=loc_bureau.Id_piece if (str(typ) == '1' and loc_bureau) else (
-                loc_piece if str(typ) != '1' else None),
-        )
-        r.save()
-        PersonneReservation.objects.get_or_create(
-            Id_Matricule=personne,
-            Id_reservation=r,
-            defaults={'Valide': True}
-        )
+        r = creees[0]
         return JsonResponse({'id': r.Id_reservation, 'message': 'Réservation créée'})
 
 
@@ -463,8 +384,7 @@ def reservation_detail_api(request, pk):
             if b.Type == Bureau.TypeBureau.OCCUPE:
                 return JsonResponse({'error': 'Ce bureau est marqué comme occupé.'}, status=400)
 
-            conflicts = Reservation.objects.filter(Id_bureau=b, Debut__lt=new_fin, Fin__gt=new_debut).exclude(pk=r.pk)
-            if conflicts.exists():
+            if a_conflit(new_debut, new_fin, bureau=b, exclude_pk=r.pk):
                 return JsonResponse({'error': 'Plage horaire occupée pour ce bureau.'}, status=400)
             r.Id_bureau = b
             r.Id_piece = None
@@ -474,24 +394,19 @@ def reservation_detail_api(request, pk):
             except Piece.DoesNotExist:
                 return JsonResponse({'error': 'Salle introuvable'}, status=400)
 
-            conflicts = Reservation.objects.filter(Id_piece=p, Debut__lt=new_fin, Fin__gt=new_debut).exclude(pk=r.pk)
-            if conflicts.exists():
+            if a_conflit(new_debut, new_fin, piece=p, exclude_pk=r.pk):
                 return JsonResponse({'error': 'Plage horaire occupée pour cette salle.'}, status=400)
             r.Id_piece = p
             r.Id_bureau = None
     else:
+        if not (r.Id_bureau or r.Id_piece):
+            return JsonResponse({'error': 'Aucun local sélectionné'}, status=400)
         if r.Id_bureau:
-            conflicts = Reservation.objects.filter(Id_bureau=r.Id_bureau, Debut__lt=new_fin, Fin__gt=new_debut).exclude(
-                pk=r.pk)
-            if conflicts.exists():
-                return JsonResponse({'error': 'Plage horaire occupée.'}, status=400)
-        elif r.Id_piece:
-            conflicts = Reservation.objects.filter(Id_piece=r.Id_piece, Debut__lt=new_fin, Fin__gt=new_debut).exclude(
-                pk=r.pk)
-            if conflicts.exists():
-                return JsonResponse({'error': 'Plage horaire occupée.'}, status=400)
+            conflit = a_conflit(new_debut, new_fin, bureau=r.Id_bureau, exclude_pk=r.pk)
         else:
-            return JsonResponse({'error': 'Aucun local sélectionné'}, status=400)
+            conflit = a_conflit(new_debut, new_fin, piece=r.Id_piece, exclude_pk=r.pk)
+        if conflit:
+            return JsonResponse({'error': 'Plage horaire occupée.'}, status=400)
 
     if r.Debut >= r.Fin:
         return JsonResponse({'error': 'Dates invalides'}, status=400)
@@ -518,133 +433,10 @@ def occupation_locaux(request):
     search_query = request.GET.get('q', '')
     sort_option = request.GET.get('tri', 'type')  # 'type' par défaut
 
-    start_of_day = datetime.datetime.combine(selected_date, datetime.time(7, 0))
-    end_of_day = datetime.datetime.combine(selected_date, datetime.time(18, 0))
-
-    bureaux = Bureau.objects.select_related('Id_piece')
-    pieces = Piece.objects.filter(Type=1)
-
-    if search_query:
-        bureaux = bureaux.filter(
-            Q(Id_bureau__icontains=search_query) |
-            Q(Nom__icontains=search_query) |
-            Q(Id_piece__Nom__icontains=search_query) |
-            Q(personne__Nom__icontains=search_query) |
-            Q(personne__Prenom__icontains=search_query)
-        ).distinct()
-
-        pieces = pieces.filter(Nom__icontains=search_query)
-
-    liste_bureaux = []
-    liste_salles = []
-
-    for bureau in bureaux:
-        creneaux = []
-        est_bloque = False
-        texte_blocage = ""
-
-        if bureau.Type == Bureau.TypeBureau.OCCUPE:
-            est_bloque = True
-            texte_blocage = "Bureau Occupé"
-        else:
-            proprietaires = bureau.personne_set.all()
-            for prop in proprietaires:
-                if est_en_presentiel(prop, selected_date):
-                    has_liberation = LiberationBureau.objects.filter(
-                        Id_Matricule=prop,
-                        Id_bureau=bureau,
-                        Date=selected_date
-                    ).exists()
-
-                    if not has_liberation:
-                        est_bloque = True
-                        texte_blocage = f"{prop.Prenom} {prop.Nom}"
-                        break
-
-        if est_bloque:
-            creneaux.append({
-                'is_blocked': True,
-                'owner_name': texte_blocage,
-                'left': 0, 'width': 100, 'debut_str': '07:00', 'fin_str': '18:00',
-                'color': '#95a5a6',
-            })
-        else:
-            reservations = Reservation.objects.filter(
-                Id_bureau=bureau, Debut__lt=end_of_day, Fin__gt=start_of_day
-            ).select_related('Id_Matricule').order_by('Debut')
-
-            for res in reservations:
-                res_debut_local = timezone.localtime(res.Debut) if timezone.is_aware(res.Debut) else res.Debut
-                res_fin_local = timezone.localtime(res.Fin) if timezone.is_aware(res.Fin) else res.Fin
-                if timezone.is_aware(res_debut_local): res_debut_local = res_debut_local.replace(tzinfo=None)
-                if timezone.is_aware(res_fin_local): res_fin_local = res_fin_local.replace(tzinfo=None)
-
-                debut_hour = max(res_debut_local, start_of_day)
-                fin_hour = min(res_fin_local, end_of_day)
-                start_minutes = (debut_hour.hour - 7) * 60 + debut_hour.minute
-                end_minutes = (fin_hour.hour - 7) * 60 + fin_hour.minute
-
-                left_percent = (start_minutes / 660) * 100
-                width_percent = ((end_minutes - start_minutes) / 660) * 100
-
-                creneaux.append({
-                    'reservation': res, 'is_blocked': False,
-                    'left': left_percent, 'width': width_percent,
-                    'debut_str': debut_hour.strftime('%H:%M'), 'fin_str': fin_hour.strftime('%H:%M'),
-                    'color': get_bureau_color(bureau.Id_bureau),
-                })
-
-        liste_bureaux.append({
-            'type': 'bureau',
-            'sort_type_val': bureau.Type,  # 0, 1, 2
-            'local': bureau,
-            'nom': bureau.Nom if bureau.Nom else f'Bureau {bureau.Id_bureau}',
-            'id': bureau.Id_bureau,
-            'piece': bureau.Id_piece,
-            'creneaux': creneaux,
-        })
-
-    # --- 2. TRAITEMENT DES SALLES ---
-    for piece in pieces:
-        reservations = Reservation.objects.filter(
-            Id_piece=piece, Debut__lt=end_of_day, Fin__gt=start_of_day
-        ).select_related('Id_Matricule').order_by('Debut')
-
-        creneaux = []
-        for res in reservations:
-            res_debut_local = timezone.localtime(res.Debut) if timezone.is_aware(res.Debut) else res.Debut
-            res_fin_local = timezone.localtime(res.Fin) if timezone.is_aware(res.Fin) else res.Fin
-            if timezone.is_aware(res_debut_local): res_debut_local = res_debut_local.replace(tzinfo=None)
-            if timezone.is_aware(res_fin_local): res_fin_local = res_fin_local.replace(tzinfo=None)
-
-            debut_hour = max(res_debut_local, start_of_day)
-            fin_hour = min(res_fin_local, end_of_day)
-            start_minutes = (debut_hour.hour - 7) * 60 + debut_hour.minute
-            end_minutes = (fin_hour.hour - 7) * 60 + fin_hour.minute
-
-            left_percent = (start_minutes / 660) * 100
-            width_percent = ((end_minutes - start_minutes) / 660) * 100
-
-            creneaux.append({
-                'reservation': res, 'is_blocked': False,
-                'left': left_percent, 'width': width_percent,
-                'debut_str': debut_hour.strftime('%H:%M'), 'fin_str': fin_hour.strftime('%H:%M'),
-                'color': '#6366f1',
-            })
-
-        liste_salles.append({
-            'type': 'salle',
-            'sort_type_val': -1,
-            'local': piece,
-            'nom': piece.Nom,
-            'id': piece.Id_piece,
-            'piece': piece,
-            'creneaux': creneaux,
-        })
-
-    # --- 3. FUSION ET TRI FINAL ---
-    locaux_data = liste_bureaux + liste_salles
+    # 3. Construction groupée des créneaux (nombre de requêtes constant)
+    locaux_data = build_locaux_data(selected_date, search_query)
 
+    # 4. Tri final
     if sort_option == 'type':
         locaux_data.sort(key=lambda x: (x['sort_type_val'], x['piece'].Etage, x['nom']))
 
@@ -679,21 +471,44 @@ def bureau_occupation(request, bureau_id):
     return render(request, 'reservations/bureau_occupation.html', context)
 
 
+def _fenetre_bureau(request):
+    """Fenêtre demandée ; à défaut, les 7 prochains jours"""
+    start_dt = _parse_iso(request.GET.get('start')) or timezone.now()
+    end_dt = _parse_iso(request.GET.get('end')) or timezone.now() + datetime.timedelta(days=7)
+    return start_dt, end_dt
+
+
+def _version_bureau(request, bureau_id):
+    """Réservations de la fenêtre et sources des blocages : type du bureau, propriétaires, télétravail, libérations"""
+    start_dt, end_dt = _fenetre_bureau(request)
+    reservations = Reservation.objects.filter(Id_bureau=bureau_id, Debut__lt=end_dt, Fin__gt=start_dt)
+    proprietaires = Personne.objects.filter(Id_bureau=bureau_id)
+    teletravail = RecurringTelework.objects.filter(
+        schedule__user__personne__Id_bureau=bureau_id, start_date__lte=end_dt.date(), end_date__gte=start_dt.date(),
+    )
+    liberations = LiberationBureau.objects.filter(Id_bureau=bureau_id, Date__range=(start_dt.date(), end_dt.date()))
+    return version_ligne(
+        Bureau.objects.filter(pk=bureau_id), start_dt, end_dt,
+        bureau=F('Date_maj'),
+        n=nombre(reservations), maj=derniere_maj(reservations, 'Date_maj'),
+        personnes=derniere_maj(reservations, 'Id_Matricule__Date_maj'),
+        # Au plus quelques propriétaires : leur nombre et la somme des matricules changent avec eux
+        n_prop=nombre(proprietaires), prop=somme(proprietaires, 'Id_Matricule'),
+        prop_maj=derniere_maj(proprietaires, 'Date_maj'),
+        n_tele=nombre(teletravail), tele=derniere_maj(teletravail, 'updated_at'),
+        n_lib=nombre(liberations), lib=derniere_maj(liberations, 'Date_creation'),
+    )
+
+
 @login_required
+@flux_versionne(_version_bureau)
 def bureau_events_json(request, bureau_id):
     """API pour récupérer les événements d'un bureau spécifique avec Debug"""
     # 1. On charge le bureau
     bureau = get_object_or_404(Bureau, pk=bureau_id)
 
-    start = request.GET.get('start')
-    end = request.GET.get('end')
-
     # 2. Parsing sécurisé des dates (avec valeurs par défaut en cas d'échec)
-    parsed_start = _parse_iso(start) if start else None
-    start_dt = parsed_start if parsed_start else timezone.now()
-
-    parsed_end = _parse_iso(end) if end else None
-    end_dt = parsed_end if parsed_end else timezone.now() + datetime.timedelta(days=7)
+    start_dt, end_dt = _fenetre_bureau(request)
 
     events = []
 
@@ -701,7 +516,7 @@ def bureau_events_json(request, bureau_id):
     print(f"Période: {start_dt} à {end_dt}")
 
     # 3. Récupérer les réservations (classiques)
-    qs = Reservation.objects.filter(Id_bureau=bureau).select_related('Id_Matricule')
+    qs = differer_binaires(Reservation.objects.filter(Id_bureau=bureau).select_related('Id_Matricule'))
     if start_dt and end_dt:
         qs = qs.filter(Debut__lt=end_dt, Fin__gt=start_dt)
 
@@ -728,68 +543,43 @@ def bureau_events_json(request, bureau_id):
         })
 
     # 4. Générer les blocages (Grisé)
-    current_date = start_dt.date()
+    start_date = start_dt.date()
     end_date = end_dt.date()
 
-    proprietaires = []
-    try:
-        if hasattr(bureau, 'personne_set'):
-            proprietaires = list(bureau.personne_set.all())
-        elif hasattr(bureau, 'personnes'):
-            proprietaires = list(bureau.personnes.all())
-        else:
-            # Fallback: requête manuelle si on ne trouve pas l'attribut
-            from ILIA.models import Personne  # Import local pour éviter boucle
-            proprietaires = list(Personne.objects.filter(Id_bureau=bureau))
-
-        print(f"Propriétaires trouvés : {len(proprietaires)}")
-    except Exception as e:
-        print(f"Erreur récupération propriétaires: {e}")
-
-    is_admin_occupied = (bureau.Type == Bureau.TypeBureau.OCCUPE)
-
-    while current_date <= end_date:
-        is_blocked = False
-        block_title = ""
-
-        # A. Bureau marqué OCCUPÉ (Type 2)
-        if is_admin_occupied:
-            is_blocked = True
-            block_title = "Bureau Occupé"
-
-        # B. Propriétaire présent
-        elif proprietaires:
-            for prop in proprietaires:
-                if est_en_presentiel(prop, current_date):
-                    has_liberation = LiberationBureau.objects.filter(
-                        Id_Matricule=prop,
-                        Id_bureau=bureau,
-                        Date=current_date
-                    ).exists()
-
-                    if not has_liberation:
-                        is_blocked = True
-                        block_title = f"Assigné: {prop}"
-                        break
-
-        if is_blocked:
-            start_block = datetime.datetime.combine(current_date, datetime.time(7, 0))
-            end_block = datetime.datetime.combine(current_date, datetime.time(19, 0))
-
-            events.append({
-                'id': f'blocked_{current_date}_{bureau_id}',
-                'title': block_title,
-                'start': start_block.isoformat(),
-                'end': end_block.isoformat(),
-                'display': 'background',
-                'backgroundColor': '#95a5a6',
-                'extendedProps': {
-                    'type': 'blocage',
-                    'motif': block_title
-                }
-            })
+    proprietaires = list(
+        Personne.objects.filter(Id_bureau=bureau)
+        .only('Id_Matricule', 'Nom', 'Prenom', 'user_id', 'Id_bureau_id')
+        .order_by('Id_Matricule')
+    )
+
+    # Jours bloqués calculés par ensembles sur toute la fenêtre :
+    # jours de la fenêtre - jours de télétravail - jours libérés, par propriétaire
+    blocages = {}
+    if bureau.Type == Bureau.TypeBureau.OCCUPE:
+        blocages = {jour: "Bureau Occupé" for jour in jours_entre(start_date, end_date)}
+    elif proprietaires:
+        presence = resoudre_presence(proprietaires, start_date, end_date)
+        for prop in proprietaires:
+            for jour in presence.jours_occupes(prop) - blocages.keys():
+                blocages[jour] = f"Assigné: {prop}"
+
+    for jour in sorted(blocages):
+        block_title = blocages[jour]
+        start_block = datetime.datetime.combine(jour, datetime.time(7, 0))
+        end_block = datetime.datetime.combine(jour, datetime.time(19, 0))
 
-        current_date += datetime.timedelta(days=1)
+        events.append({
+            'id': f'blocked_{jour}_{bureau_id}',
+            'title': block_title,
+            'start': start_block.isoformat(),
+            'end': end_block.isoformat(),
+            'display': 'background',
+            'backgroundColor': '#95a5a6',
+            'extendedProps': {
+                'type': 'blocage',
+                'motif': block_title
+            }
+        })
 
     return JsonResponse(events, safe=False)
 
@@ -806,19 +596,23 @@ def piece_occupation(request, piece_id):
     return render(request, 'reservations/piece_occupation.html', context)
 
 
+def _version_piece(request, piece_id):
+    reservations = _reservations_fenetre(request, Reservation.objects.filter(Id_piece=piece_id))
+    return version_ligne(
+        Piece.objects.filter(pk=piece_id),
+        n=nombre(reservations), maj=derniere_maj(reservations, 'Date_maj'),
+        personnes=derniere_maj(reservations, 'Id_Matricule__Date_maj'),
+    )
+
+
 @login_required
+@flux_versionne(_version_piece)
 def piece_events_json(request, piece_id):
     """API pour récupérer les événements d'une salle de réunion spécifique"""
     piece = get_object_or_404(Piece, pk=piece_id)
-    start = request.GET.get('start')
-    end = request.GET.get('end')
-
-    start_dt = _parse_iso(start) if start else None
-    end_dt = _parse_iso(end) if end else None
-
-    qs = Reservation.objects.filter(Id_piece=piece).select_related('Id_Matricule')
-    if start_dt and end_dt:
-        qs = qs.filter(Debut__lt=end_dt, Fin__gt=start_dt)
+    qs = _reservations_fenetre(
+        request, differer_binaires(Reservation.objects.filter(Id_piece=piece).select_related('Id_Matricule'))
+    )
 
     events = []
     color = get_piece_color(piece_id)
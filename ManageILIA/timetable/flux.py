@@ -0,0 +1,231 @@
+"""
+Flux du calendrier personnel : événements et réservations d'une personne,
+entrées personnelles et télétravail.
+
+Seule la fenêtre affichée par FullCalendar (`start` / `end`) est lue, par des
+requêtes filtrées sur la plage en base : le coût ne dépend pas de l'historique
+de la personne. Le flux d'une fenêtre est gardé en cache sous sa version
+(version_flux, lue en base) : toute modification d'un événement, d'une
+participation ou d'une réservation de la fenêtre change la clé, quel que soit
+le processus qui l'a faite, sans invalidation à propager.
+
+Les règles de télétravail récurrent sont développées ici en occurrences
+concrètes, limitées elles aussi à la fenêtre.
+
+Les fonctions version_* donnent aussi l'ETag de chaque flux (ILIA.conditionnel).
+"""
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from events.models import Event, Participant
+from ILIA.binaires import differer_binaires
+from ILIA.conditionnel import derniere_maj, nombre, version_ligne
+from reservations.models import PersonneReservation
+from reservations.presence import jours_de_la_semaine
+from .models import PersonalScheduleEntry, RecurringTelework
+
+CLE_FLUX = 'calendrier:flux:{}:{}:{}:{}'
+
+
+def duree_cache():
+    return getattr(settings, 'CALENDRIER_FLUX_DUREE', 300)
+
+
+def _aware(valeur):
+    if timezone.is_naive(valeur):
+        return timezone.make_aware(valeur, timezone.get_current_timezone())
+    return valeur
+
+
+def _lire_date(texte):
+    if not texte:
+        return None
+    try:
+        valeur = parse_datetime(texte) or datetime.fromisoformat(texte)
+    except ValueError:
+        return None
+    return _aware(valeur)
+
+
+def plage(request, defaut=None):
+    """Fenêtre demandée par FullCalendar ; `defaut` (ou les 30 prochains jours) à défaut"""
+    debut = _lire_date(request.GET.get('start'))
+    fin = _lire_date(request.GET.get('end'))
+    if debut is None or fin is None:
+        if defaut:
+            return tuple(_aware(d) for d in defaut)
+        debut = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        fin = debut + timedelta(days=30)
+    return debut, fin
+
+
+def _evenements(personne, debut, fin):
+    accepte = Participant.objects.filter(event=OuterRef('pk'), person=personne, status=Participant.Status.ACCEPTED)
+    qs = differer_binaires(
+        Event.objects.filter(start__lte=fin, end__gte=debut)
+        .filter(Q(organiser=personne) | Exists(accepte))
+        .select_related('organiser')
+        .order_by('start')
+    )
+    donnees = []
+    for event in qs:
+        is_organiser = event.organiser_id == personne.pk
+        donnees.append({
+            'id': f'event_{event.id}',
+            'title': event.title,
+            'start': event.start.isoformat(),
+            'end': event.end.isoformat(),
+            'description': event.description or '',
+            'type': 'event',
+            'is_organiser': is_organiser,
+            'can_edit': is_organiser,
+            'can_delete': is_organiser,
+            'organiser_name': f"{event.organiser.Prenom} {event.organiser.Nom}" if event.organiser else 'N/A',
+            'event_id': event.id,
+        })
+    return donnees
+
+
+def _reservations(personne, debut, fin):
+    qs = differer_binaires(
+        PersonneReservation.objects.filter(
+            Id_Matricule=personne,
+            Valide=True,
+            Id_reservation__Debut__lte=fin,
+            Id_reservation__Fin__gte=debut,
+        ).select_related(
+            'Id_reservation',
+            'Id_reservation__Id_Matricule',
+            'Id_reservation__Id_bureau',
+            'Id_reservation__Id_bureau__Id_piece',
+            'Id_reservation__Id_piece',
+        ).order_by('Id_reservation__Debut')
+    )
+    donnees = []
+    for pr in qs:
+        r = pr.Id_reservation
+        is_creator = r.Id_Matricule_id == personne.pk
+
+        # Description avec les infos du bureau/pièce
+        bureau_name = None
+        piece_name = None
+        description = f"Type: {r.get_Type_display()}"
+        if r.Id_bureau:
+            bureau_name = r.Id_bureau.Nom if r.Id_bureau.Nom else f"Bureau {r.Id_bureau.Id_bureau}"
+            piece_name = r.Id_bureau.Id_piece.Nom if r.Id_bureau.Id_piece else None
+            description = f"Bureau: {bureau_name}"
+            if piece_name:
+                description += f" - Pièce: {piece_name}"
+        elif r.Id_piece:
+            piece_name = r.Id_piece.Nom
+            description = f"Pièce: {piece_name}"
+
+        donnees.append({
+            'id': f'reservation_{r.Id_reservation}',
+            'title': r.Nom,
+            'start': _aware(r.Debut).isoformat(),
+            'end': _aware(r.Fin).isoformat(),
+            'description': description,
+            'type': 'reservation',
+            'is_creator': is_creator,
+            'can_edit': is_creator,
+            'can_delete': is_creator,
+            'creator_name': f"{r.Id_Matricule.Prenom} {r.Id_Matricule.Nom}",
+            'reservation_id': r.Id_reservation,
+            'bureau_name': bureau_name,
+            'bureau_id': r.Id_bureau.Id_bureau if r.Id_bureau else None,
+            'piece_name': piece_name,
+        })
+    return donnees
+
+
+def version_flux(user, debut, fin):
+    """
+    Version du flux personnel de `user` : participations, événements organisés
+    et réservations de la fenêtre, et personnes et locaux dont le nom est affiché
+    """
+    participations = Participant.objects.filter(person__user=user, event__start__lte=fin, event__end__gte=debut)
+    organises = Event.objects.filter(organiser__user=user, start__lte=fin, end__gte=debut)
+    reservations = PersonneReservation.objects.filter(
+        Id_Matricule__user=user, Id_reservation__Debut__lte=fin, Id_reservation__Fin__gte=debut,
+    )
+    return version_ligne(
+        User.objects.filter(pk=user.pk), debut, fin,
+        n_part=nombre(participations), part=derniere_maj(participations, 'updated_at'),
+        ev=derniere_maj(participations, 'event__updated_at'),
+        ev_org=derniere_maj(participations, 'event__organiser__Date_maj'),
+        n_org=nombre(organises), org=derniere_maj(organises, 'updated_at'),
+        n_res=nombre(reservations), res=derniere_maj(reservations, 'Date_maj'),
+        res_maj=derniere_maj(reservations, 'Id_reservation__Date_maj'),
+        # Noms affichés : créateur, bureau et pièce de chaque réservation
+        res_pers=derniere_maj(reservations, 'Id_reservation__Id_Matricule__Date_maj'),
+        res_bureau=derniere_maj(reservations, 'Id_reservation__Id_bureau__Date_maj'),
+        res_bureau_piece=derniere_maj(reservations, 'Id_reservation__Id_bureau__Id_piece__Date_maj'),
+        res_piece=derniere_maj(reservations, 'Id_reservation__Id_piece__Date_maj'),
+    )
+
+
+def flux_personnel(personne, debut, fin, version):
+    """
+    {'events': [...], 'reservations': [...]} de la personne entre `debut` et
+    `fin` ; `version` est celle de version_flux() pour cette fenêtre.
+    """
+    cle = CLE_FLUX.format(personne.pk, version, debut.isoformat(), fin.isoformat())
+    flux = cache.get(cle)
+    if flux is None:
+        flux = {
+            'events': _evenements(personne, debut, fin),
+            'reservations': _reservations(personne, debut, fin),
+        }
+        cache.set(cle, flux, duree_cache())
+    return flux
+
+
+def agenda_personnel(schedule, debut, fin):
+    """{'entries': [...], 'teleworks': [...]} du calendrier personnel entre `debut` et `fin`"""
+    entrees = schedule.entries.filter(start_datetime__lte=fin, end_datetime__gte=debut).order_by('start_datetime')
+    # La fin de fenêtre de FullCalendar est exclue : minuit du jour suivant
+    premier, dernier = timezone.localdate(debut), timezone.localdate(fin - timedelta(microseconds=1))
+    regles = schedule.recurring_teleworks.filter(
+        day_of_week__isnull=False,
+        start_date__lte=dernier,
+        end_date__gte=premier,
+    ).values_list('id', 'day_of_week', 'start_date', 'end_date')
+
+    occurrences = [
+        {'id': pk, 'date': jour.isoformat()}
+        for pk, jour_semaine, start_date, end_date in regles
+        for jour in jours_de_la_semaine(jour_semaine, max(start_date, premier), min(end_date, dernier))
+    ]
+    return {
+        'entries': [
+            {
+                'id': entry.id,
+                'title': entry.title,
+                'start_datetime': entry.start_datetime.isoformat(),
+                'end_datetime': entry.end_datetime.isoformat(),
+                'description': entry.description or '',
+            }
+            for entry in entrees
+        ],
+        'teleworks': sorted(occurrences, key=lambda o: o['date']),
+    }
+
+
+def version_agenda(user, debut, fin):
+    """Version de l'agenda personnel de `user` : entrées et règles de télétravail de la fenêtre"""
+    entrees = PersonalScheduleEntry.objects.filter(schedule__user=user, start_datetime__lte=fin, end_datetime__gte=debut)
+    regles = RecurringTelework.objects.filter(
+        schedule__user=user, start_date__lte=timezone.localdate(fin), end_date__gte=timezone.localdate(debut),
+    )
+    return version_ligne(
+        User.objects.filter(pk=user.pk), debut, fin,
+        n_entrees=nombre(entrees), entrees=derniere_maj(entrees, 'updated_at'),
+        n_regles=nombre(regles), regles=derniere_maj(regles, 'updated_at'),
+    )
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timetable', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='personalscheduleentry',
+            index=models.Index(fields=['schedule', 'start_datetime'], name='timetable_p_schedul_379171_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timetable', '0002_entree_schedule_debut'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='personalscheduleentry',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='recurringtelework',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
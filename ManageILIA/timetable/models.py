@@ -17,9 +17,12 @@ class PersonalScheduleEntry(models.Model):
     start_datetime = models.DateTimeField()
     end_datetime = models.DateTimeField()
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["start_datetime"]
+        # Fenêtre du calendrier : schedule = … AND start_datetime <= fin
+        indexes = [models.Index(fields=["schedule", "start_datetime"])]
 
     def __str__(self):
         return f"{self.title} - {self.start_datetime}"
@@ -37,6 +40,7 @@ class RecurringTelework(models.Model):
     ], help_text="Jour de la semaine", null=True, blank=True)
     start_date = models.DateField(help_text="Date de début de la répétition", null=True, blank=True)
     end_date = models.DateField(help_text="Date de fin de la répétition", null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["start_date", "day_of_week"]
@@ -1,3 +1,145 @@
+from datetime import date, datetime, timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from events.models import Event, Participant
+from ILIA.models import Personne
+from reservations.models import PersonneReservation, Reservation
+from .models import PersonalSchedule, PersonalScheduleEntry, RecurringTelework
+
+
+class FluxCalendrierTest(TestCase):
+    """Le flux du calendrier ne lit que la fenêtre affichée, et reste en cache jusqu'à une modification."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('agenda', password='secret')
+        self.moi = Personne.objects.create(
+            Id_Matricule=730000, Nom="Agenda", Prenom="Ada", Email="ada@ilia.be", user=self.user,
+        )
+        self.autre = Personne.objects.create(Id_Matricule=730001, Nom="Autre", Prenom="Otto", Email="otto@ilia.be")
+        self.debut = timezone.now().replace(microsecond=0) + timedelta(days=1)
+        self.client.login(username='agenda', password='secret')
+
+    def evenement(self, titre, decalage, organiser=None, statut=Participant.Status.ACCEPTED):
+        debut = self.debut + timedelta(days=decalage)
+        ev = Event.objects.create(title=titre, start=debut, end=debut + timedelta(hours=1),
+                                  organiser=organiser or self.autre)
+        Participant.objects.create(event=ev, person=self.moi, status=statut)
+        return ev
+
+    def fenetre(self):
+        return {'start': self.debut.isoformat(), 'end': (self.debut + timedelta(days=7)).isoformat()}
+
+    def lire(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('get_events_and_reservations'), self.fenetre())
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(ctx.captured_queries)
+
+    def test_fenetre_et_cache(self):
+        self.evenement("Visible", 1)
+        self.evenement("Organisé", 2, organiser=self.moi)
+        self.evenement("En attente", 3, statut=Participant.Status.INVITED)
+        for i in range(10):
+            self.evenement(f"Passé {i}", -30 - i)
+        r = Reservation.objects.create(Nom="Réunion", Debut=self.debut + timedelta(days=4),
+                                       Fin=self.debut + timedelta(days=4, hours=1), Id_Matricule=self.moi)
+        PersonneReservation.objects.create(Id_Matricule=self.moi, Id_reservation=r, Valide=True)
+
+        flux, requetes = self.lire()
+        self.assertEqual([e['title'] for e in flux['events']], ["Visible", "Organisé"])
+        self.assertEqual([e['is_organiser'] for e in flux['events']], [False, True])
+        self.assertEqual(flux['events'][0]['organiser_name'], "Otto Autre")
+        self.assertEqual([r['creator_name'] for r in flux['reservations']], ["Ada Agenda"])
+
+        # En cache : plus aucune requête pour le flux lui-même
+        _, requetes_cache = self.lire()
+        self.assertEqual(requetes_cache, requetes - 2)
+
+        # Accepter une invitation rend le flux caduc
+        etag = self.client.get(reverse('get_events_and_reservations'), self.fenetre())['ETag']
+        self.assertEqual(self.client.get(reverse('get_events_and_reservations'), self.fenetre(),
+                                         HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            participant = Participant.objects.get(event__title="En attente")
+            participant.status = Participant.Status.ACCEPTED
+            participant.save()
+        self.assertEqual(self.client.get(reverse('get_events_and_reservations'), self.fenetre(),
+                                         HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        flux, _ = self.lire()
+        self.assertEqual(len(flux['events']), 3)
+
+        # Modification faite ailleurs (autre processus, update() sans signal) : la version en base suffit
+        Participant.objects.filter(event__title="Visible").update(
+            status=Participant.Status.DECLINED, updated_at=timezone.now() + timedelta(seconds=1),
+        )
+        flux, _ = self.lire()
+        self.assertEqual([e['title'] for e in flux['events']], ["Organisé", "En attente"])
+
+
+    def test_organisateur_renomme(self):
+        self.evenement("Visible", 1)
+        etag = self.client.get(reverse('get_events_and_reservations'), self.fenetre())['ETag']
+        self.autre.Prenom = "Oscar"
+        self.autre.save()
+        response = self.client.get(reverse('get_events_and_reservations'), self.fenetre(), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['events'][0]['organiser_name'], "Oscar Autre")
+
+
+class AgendaPersonnelTest(TestCase):
+    """Le flux JSON de l'horaire personnel est borné par la fenêtre affichée."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('horaire', password='secret')
+        self.schedule = PersonalSchedule.objects.create(user=self.user)
+        self.client.login(username='horaire', password='secret')
+
+    def entree(self, titre, jour):
+        debut = timezone.make_aware(datetime.combine(jour, datetime.min.time()).replace(hour=9))
+        PersonalScheduleEntry.objects.create(schedule=self.schedule, title=titre,
+                                             start_datetime=debut, end_datetime=debut + timedelta(hours=2))
+
+    def test_fenetre(self):
+        self.entree("Dans la fenêtre", date(2026, 3, 4))
+        self.entree("Avant", date(2026, 2, 20))
+        self.entree("Après", date(2026, 3, 20))
+        # Tous les lundis de 2025 à 2027 ; le 2 et le 9 mars 2026 sont des lundis
+        RecurringTelework.objects.create(schedule=self.schedule, day_of_week=0,
+                                         start_date=date(2025, 1, 1), end_date=date(2027, 12, 31))
+        RecurringTelework.objects.create(schedule=self.schedule, day_of_week=2,
+                                         start_date=date(2024, 1, 1), end_date=date(2024, 12, 31))
+
+        response = self.client.get(reverse('personal_schedule'), {
+            'format': 'json', 'start': '2026-03-02T00:00:00+01:00', 'end': '2026-03-16T00:00:00+01:00',
+        })
+        donnees = response.json()
+        self.assertEqual([e['title'] for e in donnees['entries']], ["Dans la fenêtre"])
+        self.assertEqual([o['date'] for o in donnees['teleworks']], ['2026-03-02', '2026-03-09'])
+        self.assertNotIn('recurring_teleworks', donnees)
+
+    def test_get_conditionnel(self):
+        self.entree("Réunion", date(2026, 3, 4))
+        url, fenetre = reverse('personal_schedule'), {
+            'format': 'json', 'start': '2026-03-02T00:00:00+01:00', 'end': '2026-03-16T00:00:00+01:00',
+        }
+        etag = self.client.get(url, fenetre)['ETag']
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, fenetre, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(ctx.captured_queries), 3)
 
-# Create your tests here.
+        RecurringTelework.objects.create(schedule=self.schedule, day_of_week=0,
+                                         start_date=date(2026, 1, 1), end_date=date(2026, 6, 30))
+        response = self.client.get(url, fenetre, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['teleworks']), 2)
+        # La page HTML n'est pas versionnée
+        self.assertFalse(self.client.get(url).has_header('ETag'))
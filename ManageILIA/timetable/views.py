@@ -2,21 +2,51 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
-from django.db.models import Q
 from datetime import datetime, timedelta, date
-from django.utils.dateparse import parse_datetime
 from .models import PersonalSchedule, PersonalScheduleEntry, RecurringTelework
 from .forms import PersonalScheduleEntryForm, RecurringTeleworkForm
-from django.utils import timezone as dj_tz
+from . import flux
+from ILIA.conditionnel import flux_versionne
 import json
 from ILIA.models import Personne
 from reservations.models import Bureau
 
 
+def _mois(request):
+    """(année, mois) affichés, et la fenêtre par défaut du flux JSON : le mois à une semaine près"""
+    today = date.today()
+    year = int(request.GET.get('year', today.year))
+    month = int(request.GET.get('month', today.month))
+    start_date = date(year, month, 1)
+    end_date = (start_date + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    defaut = (
+        datetime.combine(start_date - timedelta(days=7), datetime.min.time()),
+        datetime.combine(end_date + timedelta(days=7), datetime.max.time()),
+    )
+    return year, month, defaut
+
+
+def _version_agenda(request):
+    """ETag du flux JSON uniquement ; la page HTML n'est pas versionnée"""
+    if request.GET.get('format') != 'json':
+        return None
+    _, _, defaut = _mois(request)
+    return flux.version_agenda(request.user, *flux.plage(request, defaut=defaut))
+
+
 @login_required
+@flux_versionne(_version_agenda)
 def personal_schedule(request):
     schedule, created = PersonalSchedule.objects.get_or_create(user=request.user)
 
+    today = date.today()
+    year, month, defaut = _mois(request)
+
+    # Requête AJAX du calendrier : seule la fenêtre affichée est renvoyée
+    if request.GET.get('format') == 'json':
+        debut, fin = flux.plage(request, defaut=defaut)
+        return JsonResponse({**flux.agenda_personnel(schedule, debut, fin), 'year': year, 'month': month})
+
     has_shareable_bureau = False
     try:
         # Tenter de récupérer l'objet Personne lié à l'utilisateur
@@ -31,86 +61,9 @@ def personal_schedule(request):
         # L'utilisateur n'a pas de profil Personne, has_shareable_bureau reste False
         pass
 
-    today = date.today()
-    year = int(request.GET.get('year', today.year))
-    month = int(request.GET.get('month', today.month))
-
-    # Calculer les dates du mois
-    start_date = date(year, month, 1)
-    last_day = (start_date + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-    end_date = last_day
-
-    fc_start = request.GET.get('start')
-    fc_end = request.GET.get('end')
-
-    start_range = None
-    end_range = None
-
-    if fc_start and fc_end:
-        # 1) Essai avec parse_datetime
-        start_range = parse_datetime(fc_start)
-        end_range = parse_datetime(fc_end)
-
-        # 2) Si échec, essai avec datetime.fromisoformat
-        if start_range is None:
-            try:
-                start_range = datetime.fromisoformat(fc_start)
-            except Exception:
-                start_range = None
-
-        if end_range is None:
-            try:
-                end_range = datetime.fromisoformat(fc_end)
-            except Exception:
-                end_range = None
-
-    # 3) Si on n'a toujours pas de plage valide, revenir à l’ancienne logique
-    if start_range is None or end_range is None:
-        extended_start = start_date - timedelta(days=7)
-        extended_end = end_date + timedelta(days=7)
-        start_range = datetime.combine(extended_start, datetime.min.time())
-        end_range = datetime.combine(extended_end, datetime.max.time())
-
-    entries = PersonalScheduleEntry.objects.filter(
-        schedule=schedule,
-        # start_datetime__gte=start_range,
-        # start_datetime__lte=end_range
-    ).order_by('start_datetime')
-
+    entries = PersonalScheduleEntry.objects.filter(schedule=schedule).order_by('start_datetime')
     recurring_teleworks = RecurringTelework.objects.filter(schedule=schedule)
 
-    # Si demande au format JSON (depuis AJAX du calendrier)
-    if request.GET.get('format') == 'json':
-        entries_data = [
-            {
-                'id':entry.id,
-                'title': entry.title,
-                'start_datetime': entry.start_datetime.isoformat(),
-                'end_datetime': entry.end_datetime.isoformat(),
-                'description': entry.description or ''
-            }
-            for entry in entries
-        ]
-
-        recurring_data = [
-            {
-                'id':telework.id,
-                'day_of_week': telework.day_of_week,
-                'start_date': telework.start_date.isoformat(),
-                'end_date': telework.end_date.isoformat()
-            }
-            for telework in recurring_teleworks
-            if telework.start_date and telework.end_date and telework.day_of_week is not None
-        ]
-
-        print(f"DEBUG: Retour {len(entries_data)} entries et {len(recurring_data)} télétravaux")
-        return JsonResponse({
-            'entries': entries_data,
-            'recurring_teleworks': recurring_data,
-            'year': year,
-            'month': month
-        })
-
     context = {
         "schedule": schedule,
         "entries": entries,
@@ -312,7 +265,12 @@ def sync_office_bookings(request):
         return JsonResponse({'status': 'error', 'error': str(e)}, status=400)
 
 
+def _version_flux(request):
+    return flux.version_flux(request.user, *flux.plage(request))
+
+
 @login_required
+@flux_versionne(_version_flux)
 def get_events_and_reservations(request):
     """
     API JSON pour récupérer les événements et réservations de l'utilisateur
@@ -321,145 +279,16 @@ def get_events_and_reservations(request):
     Retourne:
     - events: événements auquel l'utilisateur participe (ACCEPTED)
     - reservations: réservations de l'utilisateur
+    
+    Seule la fenêtre demandée (start / end) est lue ; voir timetable.flux.
     """
     try:
-        from ILIA.models import Personne
-        from events.models import Event, Participant
-        from reservations.models import Reservation, PersonneReservation
-        
-        # Récupérer la personne associée à l'utilisateur
         personne = Personne.objects.filter(user=request.user).first()
-        
-        fc_start = request.GET.get('start')
-        fc_end = request.GET.get('end')
-        
-        start_range = None
-        end_range = None
-        
-        if fc_start and fc_end:
-            try:
-                start_range = parse_datetime(fc_start)
-            except Exception:
-                try:
-                    start_range = datetime.fromisoformat(fc_start)
-                except Exception:
-                    pass
-            
-            try:
-                end_range = parse_datetime(fc_end)
-            except Exception:
-                try:
-                    end_range = datetime.fromisoformat(fc_end)
-                except Exception:
-                    pass
-        
-        # Fallback si les dates ne sont pas valides
-        if start_range is None or end_range is None:
-            today = date.today()
-            start_range = dj_tz.now().replace(hour=0, minute=0, second=0, microsecond=0)
-            end_range = start_range + timedelta(days=30)
-        else:
-            # Assurer que les dates sont awareness-aware (avec timezone)
-            if dj_tz.is_naive(start_range):
-                start_range = dj_tz.make_aware(start_range, dj_tz.get_current_timezone())
-            if dj_tz.is_naive(end_range):
-                end_range = dj_tz.make_aware(end_range, dj_tz.get_current_timezone())
-        
-        events_data = []
-        reservations_data = []
-        
-        # ===== ÉVÉNEMENTS =====
-        if personne:
-            # Événements où l'utilisateur est:
-            # 1. Participant avec status ACCEPTED
-            # 2. OU organisateur (créateur de l'événement)
-            accepted_events = Event.objects.filter(
-                Q(participants__person=personne, participants__status=Participant.Status.ACCEPTED) |
-                Q(organiser=personne)
-            ).distinct()
-            
-            for event in accepted_events:
-                # Vérifier si l'événement est dans la plage
-                if event.start <= end_range and event.end >= start_range:
-                    is_organiser = event.organiser == personne
-                    events_data.append({
-                        'id': f'event_{event.id}',
-                        'title': event.title,
-                        'start': event.start.isoformat(),
-                        'end': event.end.isoformat(),
-                        'description': event.description or '',
-                        'type': 'event',
-                        'is_organiser': is_organiser,
-                        'can_edit': is_organiser,
-                        'can_delete': is_organiser,
-                        'organiser_name': f"{event.organiser.Prenom} {event.organiser.Nom}" if event.organiser else 'N/A',
-                        'event_id': event.id,
-                    })
-        
-        # ===== RÉSERVATIONS =====
-        if personne:
-            # Réservations validées de l'utilisateur
-            # IMPORTANT: Ajouter select_related pour charger Id_bureau et Id_piece
-            user_reservations = PersonneReservation.objects.filter(
-                Id_Matricule=personne,
-                Valide=True,
-                Id_reservation__Debut__lte=end_range,
-                Id_reservation__Fin__gte=start_range
-            ).select_related(
-                'Id_reservation',
-                'Id_reservation__Id_bureau',
-                'Id_reservation__Id_bureau__Id_piece',
-                'Id_reservation__Id_piece'
-            )
-
-            for pr in user_reservations:
-                r = pr.Id_reservation
-                start_dt = r.Debut
-                end_dt = r.Fin
-
-                if dj_tz.is_naive(start_dt):
-                    start_dt = dj_tz.make_aware(start_dt, dj_tz.get_current_timezone())
-                if dj_tz.is_naive(end_dt):
-                    end_dt = dj_tz.make_aware(end_dt, dj_tz.get_current_timezone())
-
-                is_creator = r.Id_Matricule == personne
-
-                # Construire la description avec les infos du bureau/pièce
-                bureau_name = None
-                piece_name = None
-                description = f"Type: {r.get_Type_display()}"
-
-                if r.Id_bureau:
-                    bureau_name = r.Id_bureau.Nom if r.Id_bureau.Nom else f"Bureau {r.Id_bureau.Id_bureau}"
-                    piece_name = r.Id_bureau.Id_piece.Nom if r.Id_bureau.Id_piece else None
-                    description = f"Bureau: {bureau_name}"
-                    if piece_name:
-                        description += f" - Pièce: {piece_name}"
-                elif r.Id_piece:
-                    piece_name = r.Id_piece.Nom
-                    description = f"Pièce: {piece_name}"
-
-                reservations_data.append({
-                    'id': f'reservation_{r.Id_reservation}',
-                    'title': r.Nom,
-                    'start': start_dt.isoformat(),
-                    'end': end_dt.isoformat(),
-                    'description': description,
-                    'type': 'reservation',
-                    'is_creator': is_creator,
-                    'can_edit': is_creator,
-                    'can_delete': is_creator,
-                    'creator_name': f"{r.Id_Matricule.Prenom} {r.Id_Matricule.Nom}",
-                    'reservation_id': r.Id_reservation,
-                    'bureau_name': bureau_name,
-                    'bureau_id': r.Id_bureau.Id_bureau if r.Id_bureau else None,
-                    'piece_name': piece_name,
-                })
-        
-        return JsonResponse({
-            'events': events_data,
-            'reservations': reservations_data,
-        })
+        if not personne:
+            return JsonResponse({'events': [], 'reservations': []})
+        debut, fin = flux.plage(request)
+        version = flux.version_flux(request.user, debut, fin)
+        return JsonResponse(flux.flux_personnel(personne, debut, fin, version))
     
     except Exception as e:
         print(f"DEBUG get_events_and_reservations: {e}")